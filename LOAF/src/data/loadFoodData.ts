@@ -12,10 +12,11 @@ export interface Food {
     protein: number;
     carbs: number;
     fat: number;
-    fiber: number;
-    iron: number;
-    calcium: number;
-    vitaminD_ug: number;
+    // Left out when the source did not measure them (food_schema.py)
+    fiber?: number;
+    iron?: number;
+    calcium?: number;
+    vitaminD_ug?: number;
   };
   confidence: number;
   source: string;
@@ -41,10 +42,7 @@ export async function loadFoodDataAsync(): Promise<Food[]> {
         protein: c.protein,
         carbs: c.carbs,
         fat: c.fat,
-        fiber: c.fiber,
-        iron: 0,
-        calcium: 0,
-        vitaminD_ug: 0
+        fiber: c.fiber
       },
       confidence: 1.0,
       source: 'user_custom',
@@ -90,6 +88,11 @@ export function getPortionOptions(food: Food): Array<{ label: string; grams: num
   }));
 }
 
+// Unmeasured nutrients stay undefined instead of reading as 0
+function scaled(value: number | undefined, factor: number, precision: number): number | undefined {
+  return value === undefined ? undefined : Math.round(value * factor * precision) / precision;
+}
+
 export function calculateNutrition(food: Food, grams: number) {
   const perGram = grams / 100;
   return {
@@ -97,9 +100,9 @@ export function calculateNutrition(food: Food, grams: number) {
     protein: Math.round(food.nutrition.protein * perGram * 10) / 10,
     carbs: Math.round(food.nutrition.carbs * perGram * 10) / 10,
     fat: Math.round(food.nutrition.fat * perGram * 10) / 10,
-    fiber: Math.round(food.nutrition.fiber * perGram * 10) / 10,
-    iron: Math.round(food.nutrition.iron * perGram * 100) / 100,
-    calcium: Math.round(food.nutrition.calcium * perGram),
-    vitaminD_ug: Math.round(food.nutrition.vitaminD_ug * perGram * 10) / 10,
+    fiber: scaled(food.nutrition.fiber, perGram, 10),
+    iron: scaled(food.nutrition.iron, perGram, 100),
+    calcium: scaled(food.nutrition.calcium, perGram, 1),
+    vitaminD_ug: scaled(food.nutrition.vitaminD_ug, perGram, 10),
   };
 }
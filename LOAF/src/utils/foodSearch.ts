@@ -10,10 +10,11 @@ export interface FoodNutrition {
   protein: number;
   carbohydrates: number;
   fat: number;
-  fiber: number;
-  iron: number;
-  calcium: number;
-  vitaminD: number;
+  // Undefined when the catalog has no measurement
+  fiber?: number;
+  iron?: number;
+  calcium?: number;
+  vitaminD?: number;
 }
 
 export interface IndianFood {
@@ -24,15 +25,21 @@ export interface IndianFood {
   servingSize: number;
   servingSizeUnit: string;
   portionHints: Record<string, number>;
+  // Canonical schema (food_schema.py): flat numbers, units in the catalog's nutritionSchema
   nutrition: {
     calories: number;
-    protein: { value: number; unit: string };
-    carbohydrates: { value: number; unit: string };
-    fat: { value: number; unit: string };
-    fiber: { value: number; unit: string };
-    iron: { value: number; unit: string };
-    calcium: { value: number; unit: string };
-    vitaminC?: { value: number; unit: string };
+    protein: number;
+    carbs: number;
+    fat: number;
+    // Optional nutrients are left out when the source did not measure them
+    fiber?: number;
+    iron?: number;
+    calcium?: number;
+    vitaminD_ug?: number;
+    sugar?: number;
+    sodium?: number;
+    vitaminC?: number;
+    folate?: number;
   };
   confidence: number;
   source: string;
@@ -52,7 +59,7 @@ export function loadIndianFoodDatabase(): IndianFood[] {
   if (cachedFoods) return cachedFoods;
 
   const raw = foodDatabaseRaw as any;
-  cachedFoods = raw.foodDatabase?.foods || [];
+  cachedFoods = raw.foods || raw.foodDatabase?.foods || [];
 
   console.log(`✅ Loaded ${cachedFoods.length} foods from database`);
   return cachedFoods;
@@ -128,6 +135,11 @@ export function getPortionOptions(food: IndianFood): Array<{
   });
 }
 
+// Unmeasured nutrients stay undefined instead of reading as 0
+function scaled(value: number | undefined, factor: number, precision: number): number | undefined {
+  return value === undefined ? undefined : Math.round(value * factor * precision) / precision;
+}
+
 /**
  * Calculate nutrition for a specific serving size
  * Uses per-100g base and scales proportionally
@@ -141,13 +153,13 @@ export function calculateNutrition(
 
   return {
     calories: Math.round(food.nutrition.calories * multiplier * 100) / 100,
-    protein: Math.round(food.nutrition.protein.value * multiplier * 10) / 10,
-    carbohydrates: Math.round(food.nutrition.carbohydrates.value * multiplier * 10) / 10,
-    fat: Math.round(food.nutrition.fat.value * multiplier * 10) / 10,
-    fiber: Math.round(food.nutrition.fiber.value * multiplier * 10) / 10,
-    iron: Math.round(food.nutrition.iron.value * multiplier * 100) / 100,
-    calcium: Math.round(food.nutrition.calcium.value * multiplier),
-    vitaminD: food.nutrition.vitaminC ? Math.round(food.nutrition.vitaminC.value * multiplier * 10) / 10 : 0,
+    protein: Math.round(food.nutrition.protein * multiplier * 10) / 10,
+    carbohydrates: Math.round(food.nutrition.carbs * multiplier * 10) / 10,
+    fat: Math.round(food.nutrition.fat * multiplier * 10) / 10,
+    fiber: scaled(food.nutrition.fiber, multiplier, 10),
+    iron: scaled(food.nutrition.iron, multiplier, 100),
+    calcium: scaled(food.nutrition.calcium, multiplier, 1),
+    vitaminD: scaled(food.nutrition.vitaminD_ug, multiplier, 10),
   };
 }
 
@@ -195,9 +207,9 @@ export function formatNutrition(nutrition: FoodNutrition): Record<string, string
     protein: `${nutrition.protein.toFixed(1)}g`,
     carbs: `${nutrition.carbohydrates.toFixed(1)}g`,
     fat: `${nutrition.fat.toFixed(1)}g`,
-    fiber: `${nutrition.fiber.toFixed(1)}g`,
-    iron: `${nutrition.iron.toFixed(2)}mg`,
-    calcium: `${nutrition.calcium.toFixed(0)}mg`,
-    vitaminD: `${nutrition.vitaminD.toFixed(1)}µg`,
+    fiber: nutrition.fiber === undefined ? '—' : `${nutrition.fiber.toFixed(1)}g`,
+    iron: nutrition.iron === undefined ? '—' : `${nutrition.iron.toFixed(2)}mg`,
+    calcium: nutrition.calcium === undefined ? '—' : `${nutrition.calcium.toFixed(0)}mg`,
+    vitaminD: nutrition.vitaminD === undefined ? '—' : `${nutrition.vitaminD.toFixed(1)}µg`,
   };
 }
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Precomputed, token-budgeted AI context digests
+Writes a short nutrient summary per food and, per goal in
+goalMappings.json, an allowed-food list with each food's key nutrients
+per serving, trimmed to a token budget, so the chat client reads one key
+of foodAIContext.json instead of scanning the catalog on every turn and
+sends a compact prompt instead of bare name lists
+"""
+
+import json
+import math
+import os
+from typing import Dict, List, Any
+
+from data_quality import energy_unexplained, implausible_foods, impossible_values
+from build_cache import rules_digest
+from goal_rankings import GOALS_PATH, RDA_PATH, build_goal_rankings, load_json, profile_key
+from portion_table import DEFAULT_SERVING_GRAMS, TABLE_NUTRIENTS, normalize_portion_hints
+from food_schema import NUTRITION_UNITS
+
+# Matches the 50-food slice buildAIContext sends today
+MAX_GOAL_FOODS = 50
+GOAL_TOKEN_BUDGET = 600
+FOOD_TOKEN_BUDGET = 40
+# RDA profile whose targets order the foods filled in after a goal's topFoods matches
+REFERENCE_PROFILE = "19-30_female"
+_DIGEST_NUTRIENTS = ["calories", "protein", "carbs", "fat", "fiber"]
+_SHORT_NAMES = {"calories": "", "protein": "P", "carbs": "C", "fat": "F", "fiber": "fiber ", "vitaminD_ug": "vitD "}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for English-like text (about 4 characters per token)"""
+    return math.ceil(len(text) / 4)
+
+
+def _amount(value: float, nutrient: str) -> str:
+    unit = NUTRITION_UNITS.get(nutrient, "")
+    number = f"{round(value):d}" if nutrient == "calories" or value >= 100 else f"{round(value, 1):g}"
+    return f"{_SHORT_NAMES.get(nutrient, nutrient + ' ')}{number}{unit}"
+
+
+def serving(food: Dict[str, Any]) -> tuple:
+    """(label, grams) of a food's default portion"""
+    hints = normalize_portion_hints(food.get("portionHints"), food.get("servingSize"))
+    if "1_serving" in hints:
+        return "1_serving", float(hints["1_serving"])
+    label = next(iter(hints), None)
+    return (label, float(hints[label])) if label else ("1_serving", float(DEFAULT_SERVING_GRAMS))
+
+
+def food_digest(food: Dict[str, Any]) -> str:
+    """One-line summary, e.g. "Idli: 130kcal P3.9g C28g F0.4g fiber 1.5g per 100g; serving 50g\""""
+    nutrition = food.get("nutrition", {})
+    parts = [_amount(float(nutrition.get(n) or 0.0), n) for n in _DIGEST_NUTRIENTS]
+    _label, grams = serving(food)
+    text = f"{food['name']}: {' '.join(parts)} per 100g; serving {grams:g}g"
+    while estimate_tokens(text) > FOOD_TOKEN_BUDGET and len(parts) > 1:
+        parts.pop()
+        text = f"{food['name']}: {' '.join(parts)} per 100g; serving {grams:g}g"
+    return text
+
+
+def goal_line(food: Dict[str, Any], nutrients: List[str]) -> str:
+    """A goal list entry: the food with its key nutrients for one serving"""
+    nutrition = food.get("nutrition", {})
+    _label, grams = serving(food)
+    amounts = [_amount(float(nutrition.get(n) or 0.0) * grams / 100.0, n) for n in nutrients]
+    return f"- {food['name']} ({grams:g}g): {' '.join(amounts)}"
+
+
+def plausible(foods: List[Dict[str, Any]]) -> List[bool]:
+    """
+    Per food, whether data_quality finds its values possible: macro mass and
+    energy within 100 g, and energy its macros account for (some sources
+    store whole meals)
+    """
+    return [not implausible for implausible in implausible_foods(foods)]
+
+
+def top_food_matches(foods: List[Dict[str, Any]], top_foods: List[str]) -> List[int]:
+    """Indexes of foods whose name or alias contains a topFoods entry (the buildAIContext filter), in catalog order"""
+    needles = [t.lower() for t in top_foods if t]
+    matches = []
+    for i, food in enumerate(foods):
+        texts = [food.get("name", "").lower()] + [a.lower() for a in food.get("aliases") or []]
+        if any(needle in text for needle in needles for text in texts):
+            matches.append(i)
+    return matches
+
+
+def build_digest(title: str, lines: List[str], budget: int) -> Dict[str, Any]:
+    """Header plus as many lines as fit the token budget"""
+    text, kept = title, 0
+    for line in lines:
+        candidate = f"{text}\n{line}"
+        if estimate_tokens(candidate) > budget:
+            break
+        text, kept = candidate, kept + 1
+    return {"digest": text, "tokens": estimate_tokens(text), "count": kept}
+
+
+def rules_fingerprint() -> str:
+    """Fingerprint of the digest code and budgets, for build cache keys"""
+    return rules_digest(build_ai_context, food_digest, goal_line, build_digest, plausible, top_food_matches, serving,
+                        _amount, implausible_foods, impossible_values, energy_unexplained,
+                        [MAX_GOAL_FOODS, GOAL_TOKEN_BUDGET, FOOD_TOKEN_BUDGET, REFERENCE_PROFILE, _DIGEST_NUTRIENTS,
+                         _SHORT_NAMES])
+
+
+def build_ai_context(foods: List[Dict[str, Any]], goals: List[Dict[str, Any]],
+                     recommendations: List[Dict[str, Any]], goal_budget: int = GOAL_TOKEN_BUDGET,
+                     max_goal_foods: int = MAX_GOAL_FOODS, tagger=None,
+                     profile: str = REFERENCE_PROFILE) -> Dict[str, Any]:
+    """
+    Per-food digests keyed by id, and per goal the allowed foods (topFoods
+    matches first, then the goal's best-ranked foods for the reference
+    profile) with a prompt-ready digest that fits goal_budget tokens. Foods
+    with implausible values get no digest and are listed under
+    implausibleFoods instead, since their per-100 g figures cannot be trusted.
+    """
+    possible = plausible(foods)
+    food_entries = {}
+    for food, ok in zip(foods, possible):
+        if ok:
+            text = food_digest(food)
+            food_entries[food["id"]] = {"digest": text, "tokens": estimate_tokens(text)}
+
+    reference = [r for r in recommendations if profile_key(r) == profile] or recommendations[:1]
+    candidates = [food for food, ok in zip(foods, possible) if ok]
+    rankings = build_goal_rankings(candidates, goals, reference, max_goal_foods, tagger) if reference else None
+    index = {food["id"]: i for i, food in enumerate(foods)}
+
+    goal_entries = {}
+    for goal in goals:
+        goal_id = goal["goalId"]
+        chosen = top_food_matches(foods, goal.get("topFoods") or [])
+        if rankings:
+            ranked = rankings["rankings"][goal_id][profile_key(reference[0])]["all"]
+            chosen += [index[food_id] for food_id in ranked if index[food_id] not in chosen]
+        chosen = [i for i in chosen if possible[i]][:max_goal_foods]
+        nutrients = list(rankings["goals"][goal_id]["nutrients"]) if rankings else []
+        nutrients = nutrients or [n for n in _DIGEST_NUTRIENTS if n in TABLE_NUTRIENTS][:3]
+        title = f"{goal.get('goalName', goal_id)} foods, key nutrients per serving:"
+        digest = build_digest(title, [goal_line(foods[i], nutrients) for i in chosen], goal_budget)
+        goal_entries[goal_id] = {
+            "goalName": goal.get("goalName", goal_id),
+            "keyNutrients": nutrients,
+            "foods": [foods[i]["id"] for i in chosen[:digest["count"]]],
+            "digest": digest["digest"],
+            "tokens": digest["tokens"],
+        }
+
+    # buildAIContext allows the first foods of the catalog when the user has no goals
+    default = build_digest("Foods:", [f"- {food['name']}" for food in foods[:max_goal_foods]], goal_budget)
+    return {
+        "version": 1,
+        "tokenEstimate": "chars/4",
+        "goalTokenBudget": goal_budget,
+        "referenceProfile": profile_key(reference[0]) if reference else None,
+        "totalFoods": len(foods),
+        "foods": food_entries,
+        "implausibleFoods": [food["id"] for food, ok in zip(foods, possible) if not ok],
+        "goals": goal_entries,
+        "default": {"foods": [food["id"] for food in foods[:default["count"]]],
+                    "digest": default["digest"], "tokens": default["tokens"]},
+    }
+
+
+def write_ai_context(context: Dict[str, Any], output_path: str) -> None:
+    """Write the digests as a compact JSON artifact"""
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(context, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def main():
+    """Build foodAIContext.json from an existing foodDatabase.json"""
+    import argparse
+    from goal_rankings import diet_tagger
+
+    repo_root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Build token-budgeted AI context digests per food and per goal")
+    parser.add_argument("--database", default=os.path.join(repo_root, "LOAF", "data", "foodDatabase.json"))
+    parser.add_argument("--goals", default=GOALS_PATH)
+    parser.add_argument("--rda", default=RDA_PATH)
+    parser.add_argument("--output", default=None, help="defaults to foodAIContext.json next to the database")
+    parser.add_argument("--goal-budget", type=int, default=GOAL_TOKEN_BUDGET, help="token budget per goal digest")
+    parser.add_argument("--profile", default=REFERENCE_PROFILE, help="RDA profile that ranks the goal foods")
+    args = parser.parse_args()
+
+    output_path = args.output or os.path.join(os.path.dirname(args.database), "foodAIContext.json")
+
+    with open(args.database, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+    foods = database.get("foods") or database.get("foodDatabase", {}).get("foods", [])
+    goals = load_json(args.goals, "mappings")
+    recommendations = load_json(args.rda, "recommendations")
+
+    print(f"\n🤖 Building AI context digests for {len(foods)} foods and {len(goals)} goals...")
+    context = build_ai_context(foods, goals, recommendations, args.goal_budget, tagger=diet_tagger(),
+                               profile=args.profile)
+    write_ai_context(context, output_path)
+    for goal_id, entry in context["goals"].items():
+        print(f"  {goal_id}: {len(entry['foods'])} foods, ~{entry['tokens']} tokens")
+    average = sum(entry["tokens"] for entry in context["foods"].values()) / max(len(context["foods"]), 1)
+    print(f"  ✅ Food digests average ~{average:.0f} tokens "
+          f"({len(context['implausibleFoods'])} foods with implausible values left out)")
+    print(f"  File size: {os.path.getsize(output_path) / 1024:.1f} KB")
+    return True
+
+
+if __name__ == "__main__":
+    main()
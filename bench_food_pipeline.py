@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the food database build pipeline
+Generates synthetic CSVs that mimic the three schemas under Data/ at
+increasing scale factors, runs generate_food_db.py and then
+migrate_foods.py (merging into the generated catalog) over them under
+PipelineMetrics, and compares each stage's time and peak memory against
+stored baselines
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from typing import Dict, List, Any, Optional, Tuple
+
+import generate_food_db
+import migrate_foods
+from pipeline_metrics import PipelineMetrics
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(REPO_ROOT, "bench_baselines.json")
+
+# Row counts of the real files at scale 1x
+BASE_ROWS = {"ifct": 1014, "healthy": 2000, "rda": 89}
+SOURCES = [
+    ("Indian_Food_Nutrition_Processed.csv", "IFCT2017", "ifct"),
+    ("healthy_eating_dataset.csv", "Healthy Eating Dataset", "healthy"),
+    ("indian_rda_based_diet_recommendation_system.csv", "RDA System", "rda"),
+]
+# Migration stages as reported here, and the prefix of the stage records each one sums up
+# (per-source read / parse / tag / duplicate-check stages, both normalize passes)
+MIGRATE_STAGES = {
+    "read": "read-",
+    "parse": "parse-",
+    "tag": "tag-",
+    "dedupe": "migrate-",
+    "near-duplicates": "near-duplicates",
+    "normalize": "normalize-",
+    "quality": "data-quality",
+    "merge": "merge-existing",
+    "validate": "validate-schema",
+    "serialize": "write-database",
+}
+PIPELINES = ["generate", "migrate"]
+REGRESSION_TOLERANCE = 0.25
+
+IFCT_HEADER = ["Dish Name", "Calories (kcal)", "Carbohydrates (g)", "Protein (g)", "Fats (g)", "Free Sugar (g)",
+               "Fibre (g)", "Sodium (mg)", "Calcium (mg)", "Iron (mg)", "Vitamin C (mg)", "Folate (µg)"]
+HEALTHY_HEADER = ["meal_id", "meal_name", "cuisine", "meal_type", "diet_type", "calories", "protein_g", "carbs_g",
+                  "fat_g", "fiber_g", "sugar_g", "sodium_mg", "cholesterol_mg", "serving_size_g", "cooking_method",
+                  "prep_time_min", "cook_time_min", "rating", "is_healthy", "image_url"]
+RDA_HEADER = ["Food_items", "Breakfast", "Lunch", "Dinner", "VegNovVeg", "Calories", "Fats", "Proteins", "Iron",
+              "Calcium", "Sodium", "Potassium", "Carbohydrates", "Fibre", "VitaminD", "Sugars"]
+
+_BASES = ["rice", "dal", "roti", "paratha", "dosa", "idli", "curry", "sabzi", "biryani", "pulao", "khichdi",
+          "paneer", "chicken", "fish", "egg", "tea", "coffee", "lassi", "soup", "salad", "samosa", "pakora",
+          "kheer", "halwa", "ladoo", "chutney", "raita", "upma", "poha", "sandwich", "wrap", "pasta", "cake"]
+_MODIFIERS = ["masala", "plain", "spicy", "sweet", "mixed vegetable", "tandoori", "butter", "palak", "aloo",
+              "matar", "gobhi", "methi", "moong", "chana", "rajma", "mushroom", "coconut", "lemon", "jeera",
+              "kashmiri", "hyderabadi", "punjabi", "south indian", "fried", "steamed", "roasted", "baked"]
+# Syllables for a made-up regional word per name, so names stay as diverse as the real sources
+_SYLLABLES = ["ka", "ri", "mo", "the", "pu", "la", "ndi", "go", "sha", "vu", "ba", "kki", "ru", "dha", "ne", "yo"]
+
+
+class _DishNamer:
+    """Synthetic dish names; every 20th row is a one-letter typo of the previous name"""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.last = ""
+
+    def __call__(self, i: int) -> str:
+        if i % 20 == 19 and self.last:
+            cut = self.rng.randrange(1, len(self.last) - 1)
+            return self.last[:cut] + self.last[cut + 1:]
+        word = "".join(self.rng.choice(_SYLLABLES) for _ in range(self.rng.randint(2, 4)))
+        self.last = f"{word} {self.rng.choice(_MODIFIERS)} {self.rng.choice(_BASES)}".capitalize()
+        return self.last
+
+
+def _macros(rng: random.Random) -> Tuple[float, float, float, float]:
+    protein, carbs, fat = rng.uniform(0, 30), rng.uniform(0, 80), rng.uniform(0, 35)
+    calories = 4 * protein + 4 * carbs + 9 * fat + rng.uniform(-15, 15)
+    return round(max(calories, 0), 2), round(protein, 2), round(carbs, 2), round(fat, 2)
+
+
+def generate_synthetic_data(output_dir: str, scale: int, seed: int = 42) -> Dict[str, int]:
+    """Write the three synthetic CSVs for a scale factor; returns row counts"""
+    rng = random.Random(seed + scale)
+    dish_name = _DishNamer(rng)
+    os.makedirs(output_dir, exist_ok=True)
+    counts = {}
+
+    rows = BASE_ROWS["ifct"] * scale
+    with open(os.path.join(output_dir, SOURCES[0][0]), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(IFCT_HEADER)
+        for i in range(rows):
+            calories, protein, carbs, fat = _macros(rng)
+            writer.writerow([dish_name(i), calories, carbs, protein, fat, round(rng.uniform(0, 20), 2),
+                             round(rng.uniform(0, 10), 2), round(rng.uniform(0, 900), 2),
+                             round(rng.uniform(0, 300), 2), round(rng.uniform(0, 8), 2),
+                             round(rng.uniform(0, 40), 2), round(rng.uniform(0, 90), 2)])
+    counts["ifct"] = rows
+
+    rows = BASE_ROWS["healthy"] * scale
+    with open(os.path.join(output_dir, SOURCES[1][0]), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEALTHY_HEADER)
+        for i in range(rows):
+            calories, protein, carbs, fat = _macros(rng)
+            writer.writerow([i + 1, dish_name(i + 7), rng.choice(["Indian", "Mexican", "Italian"]),
+                             rng.choice(["Breakfast", "Lunch", "Dinner", "Snack"]),
+                             rng.choice(["Vegan", "Keto", "Paleo", "Balanced"]), calories, protein, carbs, fat,
+                             round(rng.uniform(0, 25), 1), round(rng.uniform(0, 40), 1), rng.randint(10, 2500),
+                             rng.randint(0, 200), rng.randint(80, 450), rng.choice(["Grilled", "Fried", "Baked"]),
+                             rng.randint(1, 60), rng.randint(1, 90), round(rng.uniform(1, 5), 1), rng.randint(0, 1),
+                             f"https://example.com/images/meal_{i + 1}.jpg"])
+    counts["healthy"] = rows
+
+    rows = BASE_ROWS["rda"] * scale
+    with open(os.path.join(output_dir, SOURCES[2][0]), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(RDA_HEADER)
+        for i in range(rows):
+            calories, protein, carbs, fat = _macros(rng)
+            writer.writerow([dish_name(i + 13), rng.randint(0, 1), rng.randint(0, 1), rng.randint(0, 1),
+                             rng.randint(0, 1), calories, fat, protein, round(rng.uniform(0, 8), 2),
+                             rng.randint(0, 300), rng.randint(0, 900), rng.randint(0, 600), carbs,
+                             round(rng.uniform(0, 10), 1), 0, round(rng.uniform(0, 30), 1)])
+    counts["rda"] = rows
+    return counts
+
+
+def _stage_stats(records: List[Dict[str, Any]], trace_memory: bool) -> Dict[str, Any]:
+    """Time, RSS and rows of one or more stage records (summed), or their traced peak"""
+    if trace_memory:
+        return {"peakMB": round(max(r["tracedPeakBytes"] for r in records) / (1 << 20), 2)}
+    return {
+        "seconds": round(sum(r["wallSeconds"] for r in records), 4),
+        "maxRssMB": round(max(r["maxRssKB"] for r in records) / 1024, 1),
+        "rowsIn": sum(r["rowsIn"] for r in records),
+    }
+
+
+def _run_quietly(pipeline: str, argv: List[str], metrics: PipelineMetrics) -> None:
+    """Run generate_food_db.generate / migrate_foods.migrate with command line options, output discarded"""
+    module = generate_food_db if pipeline == "generate" else migrate_foods
+    with open(os.devnull, 'w') as quiet, redirect_stdout(quiet):
+        ok = getattr(module, pipeline)(module.parse_args(argv), metrics)
+    if not ok:
+        raise RuntimeError(f"{pipeline} failed on {' '.join(argv)}")
+
+
+def run_pipeline(data_dir: str, near_duplicates: bool = True, trace_memory: bool = False,
+                 results: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Run generate_food_db.py over one data directory, then migrate_foods.py
+    merging the same CSVs into the generated catalog, both without the build
+    cache and with the quality check on. Timings are only taken with
+    trace_memory off (tracemalloc slows the allocation-heavy stages several
+    times over); a traced run fills in the per-stage peakMB of an existing
+    results dict instead.
+    """
+    results = {} if results is None else results
+    output_dir = tempfile.mkdtemp(prefix="out-", dir=data_dir)
+    database = os.path.join(output_dir, "foodDatabase.json")
+    options = ["--data-dir", data_dir, "--no-cache", "--quality-check"]
+    if near_duplicates:
+        options.append("--merge-duplicates")
+    try:
+        generate_metrics = PipelineMetrics("bench-generate", trace_memory=trace_memory)
+        _run_quietly("generate", options + ["--output", database], generate_metrics)
+        migrate_metrics = PipelineMetrics("bench-migrate", trace_memory=trace_memory)
+        _run_quietly("migrate", options + ["--database", database], migrate_metrics)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    generated = results.setdefault("generate", {})
+    for record in generate_metrics.records:
+        generated.setdefault(record["stage"], {}).update(_stage_stats([record], trace_memory))
+    migrated = results.setdefault("migrate", {})
+    for stage, prefix in MIGRATE_STAGES.items():
+        records = [r for r in migrate_metrics.records if r["stage"].startswith(prefix)]
+        if records:
+            migrated.setdefault(stage, {}).update(_stage_stats(records, trace_memory))
+
+    if not trace_memory:
+        results["rows"] = {
+            "generate": sum(s["rowsIn"] for name, s in generated.items() if name.startswith("load-")),
+            "migrate": migrated["read"]["rowsIn"],
+        }
+        results["foods"] = migrated["serialize"]["rowsIn"]
+        for pipeline in PIPELINES:
+            results[f"{pipeline}Seconds"] = round(sum(s["seconds"] for s in results[pipeline].values()), 4)
+    return results
+
+
+def compare_to_baseline(current: Dict[str, Any], baseline: Dict[str, Any],
+                        tolerance: float = REGRESSION_TOLERANCE) -> List[str]:
+    """Stage timings or peak memory that got worse than the baseline by more than tolerance"""
+    regressions = []
+    for scale, results in current.items():
+        previous = baseline.get(scale)
+        if not previous:
+            continue
+        for pipeline in PIPELINES:
+            stages, old_stages = results.get(pipeline, {}), previous.get(pipeline, {})
+            for stage in stages:
+                if stage not in old_stages:
+                    continue
+                for metric in ("seconds", "peakMB"):
+                    if metric not in old_stages[stage] or metric not in stages[stage]:
+                        continue
+                    old, new = old_stages[stage][metric], stages[stage][metric]
+                    # Ignore noise on stages that take a few milliseconds / kilobytes
+                    floor = 0.05 if metric == "seconds" else 1.0
+                    if new > max(old * (1 + tolerance), old + floor):
+                        regressions.append(f"{scale} {pipeline} {stage} {metric}: {old} -> {new}")
+    return regressions
+
+
+def main():
+    """Benchmark every requested scale and compare with the stored baseline"""
+    parser = argparse.ArgumentParser(description="Benchmark the food database build pipeline")
+    parser.add_argument("--scales", default="1,10",
+                        help="comma-separated scale factors, e.g. 1,10,100,1000 (add --skip-near-duplicates past 10x)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file to compare against / update")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    parser.add_argument("--skip-near-duplicates", action="store_true",
+                        help="exclude near-duplicate clustering from the dedupe stage")
+    parser.add_argument("--memory", action="store_true",
+                        help="second pass per scale tracing per-stage peak memory (several times slower)")
+    parser.add_argument("--keep-data", action="store_true", help="keep the generated CSVs")
+    parser.add_argument("--output", default=None, help="also write the results as JSON here")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    work_dir = tempfile.mkdtemp(prefix="loaf-bench-")
+    current: Dict[str, Any] = {}
+
+    print("\n" + "="*60)
+    print("⏱️  FOOD PIPELINE BENCHMARK")
+    print("="*60)
+
+    try:
+        for scale in scales:
+            data_dir = os.path.join(work_dir, f"x{scale}")
+            counts = generate_synthetic_data(data_dir, scale)
+            print(f"\n📐 Scale {scale}x ({sum(counts.values())} rows)")
+            results = run_pipeline(data_dir, near_duplicates=not args.skip_near_duplicates)
+            if args.memory:
+                run_pipeline(data_dir, near_duplicates=not args.skip_near_duplicates, trace_memory=True,
+                             results=results)
+            current[f"{scale}x"] = results
+            for pipeline in PIPELINES:
+                print(f"  {pipeline}")
+                for stage, r in results[pipeline].items():
+                    peak = f"  peak {r['peakMB']:>8.1f} MB" if "peakMB" in r else ""
+                    print(f"    {stage:<29} {r['seconds']:>9.3f}s  rss {r['maxRssMB']:>8.1f} MB{peak}")
+                seconds, rows = results[f"{pipeline}Seconds"], results["rows"][pipeline]
+                print(f"    {'total':<29} {seconds:>9.3f}s  ({rows / max(seconds, 1e-9):,.0f} rows/s)")
+    finally:
+        if not args.keep_data:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        else:
+            print(f"\n📁 Synthetic data kept in {work_dir}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    regressions = compare_to_baseline(current, baseline, args.tolerance)
+    if baseline:
+        print(f"\n📊 Compared against {args.baseline}")
+        for regression in regressions:
+            print(f"  ❌ Regression: {regression}")
+        if not regressions:
+            print("  ✅ No regressions")
+
+    if args.save_baseline:
+        baseline.update(current)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+
+    return not regressions
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
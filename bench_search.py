@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Query-replay benchmark for food search latency and relevance
+Replays a corpus of labeled queries (exact names, prefixes, aliases,
+typos, real Hinglish spelling variants and voice-style phrases, generated
+from the catalog or loaded from a file of real queries) against Python reference
+implementations of the app's three search paths and against the generated
+indexes, similarity matcher and SQLite FTS catalog, and reports p50/p99 latency and top-k recall per strategy and
+query kind
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from contextlib import ExitStack
+from typing import Dict, List, Any, Callable, Optional
+
+from binary_catalog import BinaryCatalog, write_binary_catalog
+from build_search_index import build_search_index, normalize_text
+from build_search_index import lookup as search_index_lookup
+from build_sqlite_catalog import search_catalog, write_sqlite_catalog
+from phonetic_index import build_phonetic_index
+from phonetic_index import lookup as phonetic_lookup
+from similarity_index import SimilarityMatcher, build_similarity_index
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(REPO_ROOT, "LOAF", "data", "foodDatabase.json")
+BASELINE_PATH = os.path.join(REPO_ROOT, "bench_search_baselines.json")
+
+QUERY_KINDS = ["exact", "prefix", "alias", "typo", "hinglish", "voice"]
+QUERIES_PER_KIND = 200
+TOP_K = 10
+AI_CONTEXT_LIMIT = 50
+# Recall may drop by this much, and p99 latency grow by this share, before a run counts as a regression
+RECALL_TOLERANCE = 0.01
+LATENCY_TOLERANCE = 0.25
+
+# Romanized spellings users actually type for the same dish word. Curated by hand rather than
+# derived from phonetic_index.PHONETIC_RULES, so hinglish recall measures the rules instead of
+# restating them; a hinglish query swaps one word of a catalog name for another spelling in its group
+REAL_VARIANTS = [
+    ["khichdi", "khichri", "khichuri", "khitchdi"], ["makhani", "makhni"], ["poha", "pohe"], ["dosa", "dosai"],
+    ["paneer", "panir"], ["pulao", "pulav"], ["dal", "daal"], ["aloo", "alu"], ["gobi", "gobhi"],
+    ["vada", "wada"], ["halwa", "halva"], ["kheer", "khir"], ["idli", "idly"], ["raita", "raitha"],
+    ["sambar", "sambhar"], ["keema", "kheema"], ["ladoo", "laddu"], ["burfi", "barfi"], ["korma", "kurma"],
+    ["chutney", "chatni"], ["rajma", "rajmah"], ["kachori", "kachauri"], ["jeera", "zeera"],
+]
+_VARIANT_GROUPS = {word: group for group in REAL_VARIANTS for word in group}
+_VOICE_TEMPLATES = ["i had {name}", "i ate a {name}", "two {name}", "half {name}", "i had one {name}",
+                    "double {name}"]
+# parseVoiceTranscript in services/voiceParser.ts
+_VOICE_FILLERS = ["i had", "i ate", "a", "an", "and", "one", "two", "three"]
+_VOICE_QUANTITIES = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "double": 2, "triple": 3,
+                     "half": 0.5, "quarter": 0.25, "1": 1, "2": 2, "3": 3, "4": 4, "5": 5}
+
+
+# --- Reference implementations of the app's search paths -------------------
+
+def search_foods(foods: List[Dict[str, Any]], query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """searchFoods in utils/foodSearch.ts: 1000 exact / 100 prefix / 50 contains, 75 / 25 for aliases"""
+    q = query.lower().strip()
+    if not q:
+        return foods[:limit]
+    scored = []
+    for food in foods:
+        name = food["name"].lower()
+        score = 1000 if name == q else 100 if name.startswith(q) else 50 if q in name else 0
+        aliases = [alias.lower() for alias in food.get("aliases") or []]
+        if any(alias == q or alias.startswith(q) for alias in aliases):
+            score = max(score, 75)
+        elif any(q in alias for alias in aliases):
+            score = max(score, 25)
+        if score > 0:
+            scored.append((score, food))
+    scored.sort(key=lambda pair: -pair[0])  # stable, like Array.prototype.sort
+    return [food for _score, food in scored[:limit]]
+
+
+def search_food_dictionary(foods: List[Dict[str, Any]], query: str) -> List[Dict[str, Any]]:
+    """searchFoodDictionary in services/foodMatcher.ts: contains filter, exact names first, then prefixes"""
+    q = query.lower().strip()
+    if not q:
+        return []
+    matches = [food for food in foods
+               if q in food["name"].lower() or any(q in alias.lower() for alias in food.get("aliases") or [])]
+    return sorted(matches, key=lambda food: (food["name"].lower() != q, not food["name"].lower().startswith(q)))
+
+
+def find_best_match(foods: List[Dict[str, Any]], query: str) -> List[Dict[str, Any]]:
+    """findBestMatch in services/foodMatcher.ts (the first dictionary hit)"""
+    return search_food_dictionary(foods, query)[:1]
+
+
+def parse_voice_transcript(foods: List[Dict[str, Any]], transcript: str) -> List[Dict[str, Any]]:
+    """parseVoiceTranscript in services/voiceParser.ts: quantity word, fillers, then findBestMatch per suffix"""
+    words = transcript.lower().strip().split(" ")
+    quantity = _VOICE_QUANTITIES.get(words[0], 1) if words else 1
+    for i in range(len(words)):
+        start = 1 if i == 0 and quantity != 1 else i
+        query = " ".join(words[start:])
+        for filler in _VOICE_FILLERS:
+            if query.startswith(filler + " "):
+                query = query.replace(filler + " ", "", 1).strip()
+        match = find_best_match(foods, query)
+        if match:
+            return match
+    return []
+
+
+def ai_context_filter(foods: List[Dict[str, Any]], query: str, limit: int = AI_CONTEXT_LIMIT) -> List[Dict[str, Any]]:
+    """The allowedFoods filter of buildAIContext in utils/aiContextBuilder.ts, with the query as the top food"""
+    q = query.lower()
+    return [food for food in foods
+            if q in food["name"].lower() or any(q in alias.lower() for alias in food.get("aliases") or [])][:limit]
+
+
+# --- Query corpus -----------------------------------------------------------
+
+def _typo(rng: random.Random, text: str) -> Optional[str]:
+    """One deletion, transposition or substitution of a letter inside a word (None for very short names)"""
+    positions = [i for i in range(1, len(text) - 1) if text[i].isalpha() and text[i - 1].isalpha()]
+    if len(positions) < 3:
+        return None
+    i = rng.choice(positions)
+    edit = rng.randrange(3)
+    if edit == 0:
+        return text[:i] + text[i + 1:]
+    if edit == 1 and text[i + 1].isalpha():
+        return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+    return text[:i] + rng.choice("aeioukrstn".replace(text[i], "")) + text[i + 1:]
+
+
+def _hinglish(rng: random.Random, text: str) -> Optional[str]:
+    """The name with one word respelled as another REAL_VARIANTS spelling, if any word has one"""
+    words = text.split()
+    spots = [i for i, word in enumerate(words) if word in _VARIANT_GROUPS]
+    if not spots:
+        return None
+    i = rng.choice(spots)
+    words[i] = rng.choice([word for word in _VARIANT_GROUPS[words[i]] if word != words[i]])
+    return " ".join(words)
+
+
+def _alias(rng: random.Random, food: Dict[str, Any], name: str) -> Optional[str]:
+    """A random alias that differs from the name"""
+    aliases = [a for a in food.get("aliases") or [] if normalize_text(a) != name and len(a) >= 3]
+    return rng.choice(aliases) if aliases else None
+
+
+def generate_corpus(foods: List[Dict[str, Any]], per_kind: int = QUERIES_PER_KIND,
+                    seed: int = 7) -> List[Dict[str, Any]]:
+    """
+    Labeled synthetic queries: each targets one food, and every food with
+    the same normalized name counts as a correct answer
+    """
+    rng = random.Random(seed)
+    by_name: Dict[str, List[str]] = {}
+    for food in foods:
+        by_name.setdefault(normalize_text(food["name"]), []).append(food["id"])
+
+    makers: Dict[str, Callable[[Dict[str, Any], str], Optional[str]]] = {
+        "exact": lambda food, name: name,
+        "prefix": lambda food, name: name[:max(3, len(name) // 2)].rstrip() if len(name) > 4 else None,
+        "alias": lambda food, name: _alias(rng, food, name),
+        "typo": lambda food, name: _typo(rng, name),
+        "hinglish": lambda food, name: _hinglish(rng, name),
+        "voice": lambda food, name: rng.choice(_VOICE_TEMPLATES).format(name=name),
+    }
+    corpus = []
+    for kind in QUERY_KINDS:
+        made = 0
+        for food in rng.sample(foods, len(foods)):
+            if made >= per_kind:
+                break
+            name = normalize_text(food["name"])
+            query = makers[kind](food, name)
+            if not query:
+                continue
+            corpus.append({"kind": kind, "query": query, "answers": by_name[name]})
+            made += 1
+    return corpus
+
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    """Queries from a JSON-lines file of {"query", "answers": [food ids], "kind"} (kind defaults to "real")"""
+    corpus = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                corpus.append({"kind": entry.get("kind", "real"), "query": entry["query"],
+                               "answers": list(entry["answers"])})
+    return corpus
+
+
+# --- Replay -----------------------------------------------------------------
+
+def build_strategies(foods: List[Dict[str, Any]], work_dir: str, stack: ExitStack,
+                     top_k: int = TOP_K) -> Dict[str, Callable[[str], List[str]]]:
+    """
+    Every strategy as query -> ranked food ids (the binary catalog stays
+    mapped and the SQLite catalog open until stack closes)
+    """
+    ids = lambda results: [food["id"] for food in results]
+    search_index = build_search_index(foods)
+    phonetic_index = build_phonetic_index(foods)
+    matcher = SimilarityMatcher(build_similarity_index(foods))
+    binary_path = os.path.join(work_dir, "foodCatalog.bin")
+    write_binary_catalog(foods, binary_path)
+    binary = stack.enter_context(BinaryCatalog(binary_path))
+    sqlite_path = os.path.join(work_dir, "foodCatalog.db")
+    write_sqlite_catalog(foods, sqlite_path)
+    catalog = sqlite3.connect(sqlite_path)
+    stack.callback(catalog.close)
+    limit = max(top_k, 20)
+    return {
+        "searchFoods": lambda q: ids(search_foods(foods, q, limit)),
+        "findBestMatch": lambda q: ids(find_best_match(foods, q)),
+        "voiceParser": lambda q: ids(parse_voice_transcript(foods, q)),
+        "aiContextFilter": lambda q: ids(ai_context_filter(foods, q)),
+        "searchIndex": lambda q: [food_id for food_id, _tier in search_index_lookup(search_index, q, limit)],
+        "phoneticIndex": lambda q: phonetic_lookup(phonetic_index, q, limit),
+        "binaryCatalog": lambda q: [binary.entry(i)["id"] for i in binary.lookup_name(q)],
+        "similarityMatch": lambda q: [food_id for food_id, _score in matcher.match(q, limit)],
+        "sqliteFts": lambda q: search_catalog(catalog, q, limit),
+    }
+
+
+def _percentile(sorted_values: List[float], share: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(share * len(sorted_values)))]
+
+
+def replay(strategy: Callable[[str], List[str]], corpus: List[Dict[str, Any]],
+           top_k: int = TOP_K) -> Dict[str, Dict[str, float]]:
+    """Latency percentiles (ms), recall@1, recall@k and MRR per query kind and overall"""
+    samples: Dict[str, List[tuple]] = {}
+    for entry in corpus:
+        start = time.perf_counter()
+        results = strategy(entry["query"])
+        elapsed = (time.perf_counter() - start) * 1000
+        answers = set(entry["answers"])
+        rank = next((i + 1 for i, food_id in enumerate(results[:top_k]) if food_id in answers), None)
+        for kind in (entry["kind"], "all"):
+            samples.setdefault(kind, []).append((elapsed, rank))
+
+    report = {}
+    for kind, rows in samples.items():
+        latencies = sorted(elapsed for elapsed, _rank in rows)
+        ranks = [rank for _elapsed, rank in rows]
+        report[kind] = {
+            "queries": len(rows),
+            "p50Ms": round(_percentile(latencies, 0.50), 3),
+            "p99Ms": round(_percentile(latencies, 0.99), 3),
+            "recallAt1": round(sum(1 for r in ranks if r == 1) / len(rows), 4),
+            f"recallAt{top_k}": round(sum(1 for r in ranks if r) / len(rows), 4),
+            "mrr": round(sum(1.0 / r for r in ranks if r) / len(rows), 4),
+        }
+    return report
+
+
+def compare_to_baseline(current: Dict[str, Any], baseline: Dict[str, Any], top_k: int = TOP_K) -> List[str]:
+    """Strategies whose overall recall fell or p99 latency grew past the tolerances"""
+    regressions = []
+    for strategy, kinds in current.items():
+        previous = baseline.get(strategy, {}).get("all")
+        if not previous:
+            continue
+        now = kinds["all"]
+        for metric in ("recallAt1", f"recallAt{top_k}"):
+            if metric in previous and now[metric] < previous[metric] - RECALL_TOLERANCE:
+                regressions.append(f"{strategy} {metric}: {previous[metric]} -> {now[metric]}")
+        # Ignore noise on sub-millisecond lookups
+        if now["p99Ms"] > max(previous["p99Ms"] * (1 + LATENCY_TOLERANCE), previous["p99Ms"] + 0.5):
+            regressions.append(f"{strategy} p99Ms: {previous['p99Ms']} -> {now['p99Ms']}")
+    return regressions
+
+
+def main():
+    """Replay the query corpus against every strategy and compare with the stored baseline"""
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Benchmark food search latency and relevance")
+    parser.add_argument("--database", default=DB_PATH)
+    parser.add_argument("--corpus", default=None,
+                        help="JSON lines of real queries with labeled answers (default: synthetic corpus)")
+    parser.add_argument("--queries", type=int, default=QUERIES_PER_KIND, help="synthetic queries per kind")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    parser.add_argument("--strategies", default=None, help="comma-separated subset of strategies to run")
+    parser.add_argument("--write-corpus", default=None, help="save the corpus used as JSON lines")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file to compare against / update")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--output", default=None, help="also write the results as JSON here")
+    args = parser.parse_args()
+
+    with open(args.database, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+    foods = database.get("foods") or database.get("foodDatabase", {}).get("foods", [])
+    corpus = load_corpus(args.corpus) if args.corpus else generate_corpus(foods, args.queries, args.seed)
+    if args.write_corpus:
+        with open(args.write_corpus, 'w', encoding='utf-8') as f:
+            for entry in corpus:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    print("\n" + "="*60)
+    print("🔎 FOOD SEARCH BENCHMARK")
+    print("="*60)
+    kinds = sorted({entry["kind"] for entry in corpus}, key=lambda k: (QUERY_KINDS + [k]).index(k))
+    print(f"\n📚 {len(corpus)} queries ({', '.join(kinds)}) against {len(foods)} foods")
+
+    current: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="loaf-bench-search-") as work_dir, ExitStack() as stack:
+        strategies = build_strategies(foods, work_dir, stack, args.top_k)
+        selected = args.strategies.split(",") if args.strategies else list(strategies)
+        for name in selected:
+            if name not in strategies:
+                print(f"  ⚠️  Unknown strategy {name!r} (have {', '.join(strategies)})")
+                continue
+            report = replay(strategies[name], corpus, args.top_k)
+            current[name] = report
+            print(f"\n🧪 {name}")
+            print(f"  {'kind':<10} {'p50 ms':>8} {'p99 ms':>8} {'R@1':>6} {f'R@{args.top_k}':>6} {'MRR':>6}")
+            for kind in kinds + ["all"]:
+                r = report[kind]
+                print(f"  {kind:<10} {r['p50Ms']:>8.3f} {r['p99Ms']:>8.3f} {r['recallAt1']:>6.2f} "
+                      f"{r[f'recallAt{args.top_k}']:>6.2f} {r['mrr']:>6.2f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    regressions = compare_to_baseline(current, baseline, args.top_k)
+    if baseline:
+        print(f"\n📊 Compared against {args.baseline}")
+        for regression in regressions:
+            print(f"  ❌ Regression: {regression}")
+        if not regressions:
+            print("  ✅ No regressions")
+
+    if args.save_baseline:
+        baseline.update(current)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+
+    return not regressions
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Fixed-layout binary food catalog and its memory-mapped reader
+Writes foodCatalog.bin: a header, a UTF-8 string table, fixed-size food
+records, an id index sorted by id, an open-addressing hash table over
+normalized names and aliases, and a contiguous float32 nutrient block.
+BinaryCatalog mmaps the file and answers lookups by id, name or alias
+straight from the mapped pages, so any number of worker processes share
+one page-cached copy and nothing is parsed up front
+"""
+
+import json
+import math
+import mmap
+import os
+import struct
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+from build_search_index import normalize_text
+from food_schema import NUTRITION_UNITS
+
+MAGIC = b"LOAFCAT\0"
+FORMAT_VERSION = 1
+NUTRIENTS = list(NUTRITION_UNITS)
+
+# magic, format version, foods, nutrients, hash slots, then the offset of each section
+HEADER = struct.Struct("<8sIIII6Q")
+# id, name, category, source, full food JSON: (offset, length) into the string table; then confidence
+RECORD = struct.Struct("<10If")
+# FNV-1a hash of the key, key (offset, length), food index + 1 (0 marks an empty slot)
+SLOT = struct.Struct("<IIII")
+STRING_REF = struct.Struct("<II")
+ALIGN = 8
+
+_FNV_OFFSET = 0x811C9DC5
+_FNV_PRIME = 0x01000193
+
+
+def fnv1a(data: bytes) -> int:
+    """32-bit FNV-1a hash"""
+    h = _FNV_OFFSET
+    for byte in data:
+        h = ((h ^ byte) * _FNV_PRIME) & 0xFFFFFFFF
+    return h
+
+
+def _name_keys(food: Dict[str, Any]) -> List[str]:
+    """Distinct normalized name and aliases of a food"""
+    keys = []
+    for text in [food.get("name", "")] + [a for a in food.get("aliases") or [] if isinstance(a, str)]:
+        key = normalize_text(text)
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+class _StringTable:
+    """Deduplicated UTF-8 blob of every string the records and slots point at"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets: Dict[bytes, int] = {}
+
+    def add(self, text: Optional[str]) -> Tuple[int, int]:
+        encoded = (text or "").encode("utf-8")
+        if encoded not in self.offsets:
+            self.offsets[encoded] = len(self.data)
+            self.data += encoded
+        return self.offsets[encoded], len(encoded)
+
+
+def _pad(buffer: bytearray) -> None:
+    buffer += bytes(-len(buffer) % ALIGN)
+
+
+def build_binary_catalog(foods: List[Dict[str, Any]]) -> bytes:
+    """The complete foodCatalog.bin image for a foods list"""
+    strings = _StringTable()
+    nutrient_refs = [strings.add(n) for n in NUTRIENTS]
+
+    records = bytearray()
+    values = []
+    entries: List[Tuple[int, int, int, int]] = []
+    for i, food in enumerate(foods):
+        document = json.dumps(food, ensure_ascii=False, separators=(",", ":"))
+        refs = [strings.add(food.get(field)) for field in ("id", "name", "category", "source")]
+        refs.append(strings.add(document))
+        records += RECORD.pack(*(x for ref in refs for x in ref), float(food.get("confidence") or 0.0))
+
+        nutrition = food.get("nutrition", {})
+        for nutrient in NUTRIENTS:
+            value = nutrition.get(nutrient)
+            values.append(float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else math.nan)
+
+        for key in _name_keys(food):
+            encoded = key.encode("utf-8")
+            offset, length = strings.add(key)
+            entries.append((fnv1a(encoded), offset, length, i + 1))
+
+    order = sorted(range(len(foods)), key=lambda i: str(foods[i].get("id", "")).encode("utf-8"))
+    id_index = struct.pack(f"<{len(order)}I", *order)
+
+    # Power-of-two table at most half full, linear probing
+    slots = 1
+    while slots < 2 * len(entries):
+        slots *= 2
+    table = [None] * slots
+    for entry in entries:
+        position = entry[0] & (slots - 1)
+        while table[position] is not None:
+            position = (position + 1) & (slots - 1)
+        table[position] = entry
+    hash_table = b"".join(SLOT.pack(*(entry or (0, 0, 0, 0))) for entry in table)
+
+    body = bytearray()
+    offsets = []
+    for section in (b"".join(STRING_REF.pack(*ref) for ref in nutrient_refs), strings.data, records,
+                    id_index, hash_table, struct.pack(f"<{len(values)}f", *values)):
+        offsets.append(HEADER.size + len(body))
+        body += section
+        _pad(body)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(foods), len(NUTRIENTS), slots, *offsets)
+    return header + bytes(body)
+
+
+def write_binary_catalog(foods: List[Dict[str, Any]], output_path: str) -> int:
+    """Write foodCatalog.bin (atomically, since readers may have the old file mapped); returns its size"""
+    image = build_binary_catalog(foods)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(image)
+    os.replace(tmp_path, output_path)
+    return len(image)
+
+
+class BinaryCatalog:
+    """
+    Read-only view of a foodCatalog.bin. Lookups return food indexes;
+    entry() decodes the few fields a caller usually needs and food() the
+    full food, both on demand.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            (magic, version, self.count, width, self._slots,
+             nutrients_at, self._strings_at, self._records_at, self._ids_at, self._table_at, values_at
+             ) = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"{path} is not a version {FORMAT_VERSION} binary food catalog")
+            self.nutrients = [self._string(*STRING_REF.unpack_from(self._map, nutrients_at + j * STRING_REF.size))
+                              for j in range(width)]
+            self._values = memoryview(self._map)[values_at:values_at + 4 * self.count * width].cast("f")
+        except Exception:
+            self._map.close()
+            raise
+        self._width = width
+
+    def close(self) -> None:
+        self._values.release()
+        self._map.close()
+
+    def __enter__(self) -> "BinaryCatalog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _bytes(self, offset: int, length: int) -> bytes:
+        start = self._strings_at + offset
+        return self._map[start:start + length]
+
+    def _string(self, offset: int, length: int) -> str:
+        return self._bytes(offset, length).decode("utf-8")
+
+    def _record(self, index: int) -> Tuple[Any, ...]:
+        return RECORD.unpack_from(self._map, self._records_at + index * RECORD.size)
+
+    def _id_bytes(self, index: int) -> bytes:
+        record = self._record(index)
+        return self._bytes(record[0], record[1])
+
+    def lookup_id(self, food_id: str) -> Optional[int]:
+        """Index of the food with this id (binary search over the sorted id index)"""
+        target = food_id.encode("utf-8")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            index = struct.unpack_from("<I", self._map, self._ids_at + 4 * mid)[0]
+            current = self._id_bytes(index)
+            if current == target:
+                return index
+            if current < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def lookup_name(self, name: str) -> List[int]:
+        """Indexes of every food whose name or an alias matches, after normalization"""
+        key = normalize_text(name).encode("utf-8")
+        h = fnv1a(key)
+        mask = self._slots - 1
+        position = h & mask
+        found = []
+        while True:
+            slot_hash, offset, length, food = SLOT.unpack_from(self._map, self._table_at + position * SLOT.size)
+            if not food:
+                return found
+            if slot_hash == h and self._bytes(offset, length) == key:
+                found.append(food - 1)
+            position = (position + 1) & mask
+
+    def nutrition(self, index: int) -> Dict[str, Optional[float]]:
+        """Nutrient values of one food (None where the catalog had no value), to float32 precision"""
+        base = index * self._width
+        return {n: (None if math.isnan(v) else float(f"{v:.6g}"))
+                for n, v in zip(self.nutrients, self._values[base:base + self._width])}
+
+    def entry(self, index: int) -> Dict[str, Any]:
+        """id, name, category, source, confidence and nutrition of one food"""
+        record = self._record(index)
+        return {
+            "id": self._string(record[0], record[1]),
+            "name": self._string(record[2], record[3]),
+            "category": self._string(record[4], record[5]),
+            "source": self._string(record[6], record[7]),
+            "confidence": round(record[10], 4),
+            "nutrition": self.nutrition(index),
+        }
+
+    def food(self, index: int) -> Dict[str, Any]:
+        """The full food as written to foodDatabase.json"""
+        record = self._record(index)
+        return json.loads(self._bytes(record[8], record[9]))
+
+    def get(self, food_id: str) -> Optional[Dict[str, Any]]:
+        index = self.lookup_id(food_id)
+        return None if index is None else self.entry(index)
+
+    def find(self, name: str) -> List[Dict[str, Any]]:
+        return [self.entry(index) for index in self.lookup_name(name)]
+
+    def ids(self) -> Iterator[str]:
+        """Every food id, in id order"""
+        for position in range(self.count):
+            yield self._id_bytes(struct.unpack_from("<I", self._map, self._ids_at + 4 * position)[0]).decode("utf-8")
+
+
+def main():
+    """Build foodCatalog.bin from an existing foodDatabase.json, or look foods up in one"""
+    import argparse
+
+    repo_root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Build or query the binary food catalog")
+    parser.add_argument("--database", default=os.path.join(repo_root, "LOAF", "data", "foodDatabase.json"))
+    parser.add_argument("--output", default=None, help="defaults to foodCatalog.bin next to the database")
+    parser.add_argument("--lookup", metavar="ID_OR_NAME", default=None,
+                        help="query an existing catalog instead of building one")
+    args = parser.parse_args()
+
+    output_path = args.output or os.path.join(os.path.dirname(args.database), "foodCatalog.bin")
+
+    if args.lookup:
+        with BinaryCatalog(output_path) as catalog:
+            index = catalog.lookup_id(args.lookup)
+            matches = [index] if index is not None else catalog.lookup_name(args.lookup)
+            for index in matches:
+                print(json.dumps(catalog.entry(index), ensure_ascii=False))
+            if not matches:
+                print(f"  No food with id or name {args.lookup!r}")
+        return True
+
+    with open(args.database, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+    foods = database.get("foods") or database.get("foodDatabase", {}).get("foods", [])
+
+    print(f"\n🗃️  Writing binary catalog for {len(foods)} foods...")
+    size = write_binary_catalog(foods, output_path)
+    print(f"  ✅ {len(foods)} foods x {len(NUTRIENTS)} nutrients")
+    print(f"  File size: {size / 1024:.1f} KB")
+    return True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Bundle writer for the LOAF food database
+Splits the catalog into minified, key-interned shards (by category or
+source) plus a small "hot foods" shard for the first screen, writes
+precompressed gzip/brotli variants and a manifest with sizes and hashes
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, Any, Optional, Tuple
+
+from build_cache import rules_digest
+
+try:
+    import brotli  # optional, only needed for .br variants
+except ImportError:
+    brotli = None
+
+MANIFEST_NAME = "manifest.json"
+HOT_SHARD = "hot"
+HOT_LIMIT = 50
+
+# Everyday foods that the first screen should be able to show without loading a full shard
+HOT_TERMS = [
+    "chai", "tea", "coffee", "milk", "rice", "dal", "roti", "chapati", "paratha", "dosa",
+    "idli", "poha", "upma", "paneer", "curd", "lassi", "samosa", "khichdi", "biryani",
+    "pulao", "banana", "apple", "egg", "omelette", "sambar", "rajma", "chole", "salad",
+]
+
+
+def _slug(value: str) -> str:
+    """File-name safe shard name"""
+    return re.sub(r"[^a-z0-9]+", "-", (value or "other").lower()).strip("-") or "other"
+
+
+def _dumps(data: Any) -> bytes:
+    """Minified, deterministic JSON bytes"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def select_hot_foods(foods: List[Dict[str, Any]], terms: List[str] = HOT_TERMS,
+                     limit: int = HOT_LIMIT) -> List[str]:
+    """Pick the best-matching food for each everyday term, in term order"""
+    names = [(food["id"], food["name"].lower(), food.get("confidence", 0)) for food in foods]
+    hot: List[str] = []
+    seen = set()
+    for term in terms:
+        matches = [
+            (name != term, not name.startswith(term), len(name), -confidence, food_id)
+            for food_id, name, confidence in names
+            if food_id not in seen and re.search(r"\b" + re.escape(term) + r"\b", name)
+        ]
+        if matches:
+            food_id = min(matches)[-1]
+            hot.append(food_id)
+            seen.add(food_id)
+        if len(hot) >= limit:
+            break
+    return hot
+
+
+def intern_keys(foods: List[Dict[str, Any]]) -> Tuple[List[str], List[str]]:
+    """Collect the top-level and nutrition keys used across the catalog, in first-seen order"""
+    keys: Dict[str, None] = {}
+    nutrients: Dict[str, None] = {}
+    for food in foods:
+        for key in food:
+            keys.setdefault(key, None)
+        for key in food.get("nutrition") or {}:
+            nutrients.setdefault(key, None)
+    return list(keys), list(nutrients)
+
+
+def pack_shard(foods: List[Dict[str, Any]], keys: List[str], nutrients: List[str]) -> Dict[str, Any]:
+    """Encode foods as positional rows; nutrition becomes a row aligned with the nutrient keys"""
+    rows = []
+    for food in foods:
+        row = []
+        for key in keys:
+            value = food.get(key)
+            if key == "nutrition" and isinstance(value, dict):
+                value = [value.get(n) for n in nutrients]
+            row.append(value)
+        rows.append(row)
+    return {"k": keys, "n": nutrients, "f": rows}
+
+
+def unpack_shard(shard: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Inverse of pack_shard"""
+    foods = []
+    for row in shard["f"]:
+        food = {}
+        for key, value in zip(shard["k"], row):
+            if value is None:
+                continue
+            if key == "nutrition" and isinstance(value, list):
+                value = {n: v for n, v in zip(shard["n"], value) if v is not None}
+            food[key] = value
+        foods.append(food)
+    return foods
+
+
+def _write_variant(path: str, payload: bytes) -> Dict[str, Any]:
+    """Write one file and describe it for the manifest"""
+    with open(path, 'wb') as f:
+        f.write(payload)
+    return {
+        "file": os.path.basename(path),
+        "bytes": len(payload),
+        "sha256": hashlib.sha256(payload).hexdigest(),
+    }
+
+
+def write_bundles(database: Dict[str, Any], output_dir: str, shard_by: str = "category",
+                  hot_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Write all shards, their compressed variants and the manifest; returns the manifest"""
+    if shard_by not in ("category", "source"):
+        raise ValueError(f"Unsupported shard key: {shard_by}")
+
+    foods = database.get("foods", [])
+    os.makedirs(output_dir, exist_ok=True)
+    keys, nutrients = intern_keys(foods)
+
+    if hot_ids is None:
+        hot_ids = select_hot_foods(foods)
+    hot_set = set(hot_ids)
+    by_id = {food["id"]: food for food in foods}
+
+    # Hot foods live only in the hot shard so the shards partition the catalog
+    groups: Dict[str, List[Dict[str, Any]]] = {HOT_SHARD: [by_id[i] for i in hot_ids if i in by_id]}
+    for food in foods:
+        if food["id"] in hot_set:
+            continue
+        groups.setdefault(_slug(food.get(shard_by)), []).append(food)
+
+    shards = []
+    for name in [HOT_SHARD] + sorted(g for g in groups if g != HOT_SHARD):
+        payload = _dumps(pack_shard(groups[name], keys, nutrients))
+        base = os.path.join(output_dir, f"foods.{name}.json")
+        entry = {"name": name, "foods": len(groups[name]), "preload": name == HOT_SHARD}
+        entry.update(_write_variant(base, payload))
+        entry["gzip"] = _write_variant(base + ".gz", gzip.compress(payload, compresslevel=9, mtime=0))
+        if brotli is not None:
+            entry["br"] = _write_variant(base + ".br", brotli.compress(payload, quality=11))
+        shards.append(entry)
+
+    manifest = {
+        "version": database.get("version", "1.0"),
+        "lastUpdated": database.get("lastUpdated", ""),
+        "totalFoods": len(foods),
+        "shardBy": shard_by,
+        "shards": shards,
+        "totalBytes": sum(s["bytes"] for s in shards),
+        "totalGzipBytes": sum(s["gzip"]["bytes"] for s in shards),
+    }
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def rules_fingerprint() -> str:
+    """Fingerprint of the shard code, hot terms and available codecs, for build cache keys"""
+    return rules_digest(write_bundles, select_hot_foods, intern_keys, pack_shard, _slug, _dumps, _write_variant,
+                        [MANIFEST_NAME, HOT_SHARD, HOT_LIMIT, HOT_TERMS, brotli is not None])
+
+
+def check_budget(manifest: Dict[str, Any], max_shard_kb: Optional[float] = None,
+                 max_total_kb: Optional[float] = None, max_hot_kb: Optional[float] = None) -> List[str]:
+    """Return a list of size budget violations (empty when everything fits)"""
+    violations = []
+    for shard in manifest["shards"]:
+        size_kb = shard["bytes"] / 1024
+        if max_shard_kb is not None and size_kb > max_shard_kb:
+            violations.append(f"shard '{shard['name']}' is {size_kb:.1f} KB (budget {max_shard_kb} KB)")
+        if shard["name"] == HOT_SHARD and max_hot_kb is not None and size_kb > max_hot_kb:
+            violations.append(f"hot shard is {size_kb:.1f} KB (budget {max_hot_kb} KB)")
+    total_kb = manifest["totalBytes"] / 1024
+    if max_total_kb is not None and total_kb > max_total_kb:
+        violations.append(f"bundle total is {total_kb:.1f} KB (budget {max_total_kb} KB)")
+    return violations
+
+
+def main():
+    """Build sharded bundles from an existing foodDatabase.json"""
+    import argparse
+
+    repo_root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Build sharded, precompressed food database bundles")
+    parser.add_argument("--database", default=os.path.join(repo_root, "LOAF", "data", "foodDatabase.json"))
+    parser.add_argument("--output-dir", default=None, help="defaults to a bundles/ directory next to the database")
+    parser.add_argument("--shard-by", choices=["category", "source"], default="category")
+    parser.add_argument("--max-shard-kb", type=float, default=None)
+    parser.add_argument("--max-total-kb", type=float, default=None)
+    parser.add_argument("--max-hot-kb", type=float, default=None)
+    args = parser.parse_args()
+
+    output_dir = args.output_dir or os.path.join(os.path.dirname(args.database), "bundles")
+
+    with open(args.database, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+    database = database.get("foodDatabase", database)
+
+    print(f"\n📦 Writing bundles for {len(database.get('foods', []))} foods to {output_dir}...")
+    manifest = write_bundles(database, output_dir, args.shard_by)
+    for shard in manifest["shards"]:
+        print(f"  {shard['name']}: {shard['foods']} foods, {shard['bytes'] / 1024:.1f} KB "
+              f"({shard['gzip']['bytes'] / 1024:.1f} KB gzip)")
+    if brotli is None:
+        print("  ⚠️  brotli module not installed, skipped .br variants")
+
+    violations = check_budget(manifest, args.max_shard_kb, args.max_total_kb, args.max_hot_kb)
+    for violation in violations:
+        print(f"  ❌ Over budget: {violation}")
+    return not violations
+
+
+if __name__ == "__main__":
+    exit(0 if main() else 1)
@@ -0,0 +1,131 @@
+"""
+Content-hashed build cache for the food database pipeline
+Caches per-source derived rows keyed on the source file hash and a
+fingerprint of the derivation rules, and avoids rewriting outputs whose
+content has not changed
+"""
+
+import hashlib
+import inspect
+import json
+import os
+from typing import Any, Callable, Optional
+
+CACHE_DIR_NAME = ".build_cache"
+INDEX_NAME = "index.json"
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """sha256 of a file's bytes, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def bytes_digest(data: bytes) -> str:
+    """sha256 of an in-memory payload"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def rules_digest(*parts: Any) -> str:
+    """
+    Fingerprint of the derivation rules.
+    Modules, and functions, methods and classes through their module,
+    contribute the source of the whole module (once), so helpers and
+    constants next to the code passed in count too; everything else
+    contributes its canonical JSON form. Editing either a keyword table or
+    any code in a module that applies it invalidates the cache.
+    """
+    digest = hashlib.sha256()
+    seen = set()
+    for part in parts:
+        module = part if inspect.ismodule(part) else inspect.getmodule(part) if callable(part) else None
+        if module is not None:
+            if module.__name__ in seen:
+                continue
+            seen.add(module.__name__)
+            digest.update(inspect.getsource(module).encode("utf-8"))
+        else:
+            digest.update(json.dumps(part, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def write_if_changed(path: str, data: bytes) -> bool:
+    """Write data to path unless the file already holds exactly these bytes; returns True if written"""
+    if os.path.exists(path) and os.path.getsize(path) == len(data):
+        if file_digest(path) == bytes_digest(data):
+            return False
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+class BuildCache:
+    """On-disk cache of derived stage results and of the inputs each output was built from"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, INDEX_NAME)
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+        self.index.setdefault("entries", {})
+        self.index.setdefault("outputs", {})
+
+    def _entry_path(self, namespace: str, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{namespace}-{key[:24]}.json")
+
+    def memoize(self, namespace: str, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached result for (namespace, key), computing and storing it on a miss"""
+        if self.index["entries"].get(namespace) == key:
+            try:
+                with open(self._entry_path(namespace, key), 'r', encoding='utf-8') as f:
+                    result = json.load(f)
+                self.hits += 1
+                return result
+            except (OSError, ValueError):
+                pass
+
+        self.misses += 1
+        result = compute()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        previous = self.index["entries"].get(namespace)
+        if previous and previous != key:
+            try:
+                os.remove(self._entry_path(namespace, previous))
+            except OSError:
+                pass
+        with open(self._entry_path(namespace, key), 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, separators=(",", ":"))
+        self.index["entries"][namespace] = key
+        return result
+
+    def output_fresh(self, path: str, inputs_digest: str) -> bool:
+        """True if path exists and was last built from the same inputs"""
+        return os.path.exists(path) and self.index["outputs"].get(os.path.abspath(path)) == inputs_digest
+
+    def record_output(self, path: str, inputs_digest: str) -> None:
+        self.index["outputs"][os.path.abspath(path)] = inputs_digest
+
+    def save(self) -> None:
+        """Persist the cache index"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self.index_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=2, sort_keys=True)
+
+
+def cached(cache: Optional[BuildCache], namespace: str, key: str, compute: Callable[[], Any]) -> Any:
+    """Memoize through cache when one is configured, otherwise just compute"""
+    if cache is None:
+        return compute()
+    return cache.memoize(namespace, key, compute)
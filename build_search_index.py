@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Search index builder for the LOAF food database
+Precomputes a prefix / n-gram inverted index over food names and aliases
+so typeahead in the app becomes a lookup instead of a full scan. The
+normalized terms of every food are stored too, so n-gram candidates can be
+checked with a real substring test.
+"""
+
+import json
+import os
+import re
+from typing import Dict, List, Any, Tuple
+
+from build_cache import rules_digest
+
+# Relevance tiers, mirroring the scores used by searchFoods in foodSearch.ts
+TIER_EXACT = 1000
+TIER_PREFIX = 100
+TIER_ALIAS_PREFIX = 75
+TIER_CONTAINS = 50
+TIER_ALIAS_CONTAINS = 25
+
+MAX_PREFIX_LENGTH = 12
+MAX_POSTINGS = 50
+NGRAM_SIZE = 3
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize a name, alias or query the same way on both sides of the index"""
+    return _WHITESPACE_RE.sub(" ", (text or "").lower()).strip()
+
+
+def _word_starts(term: str) -> List[int]:
+    """Offsets of every word start inside a normalized term (excluding 0)"""
+    return [i + 1 for i, ch in enumerate(term[:-1]) if not ch.isalnum() and term[i + 1].isalnum()]
+
+
+def _ngrams(term: str, size: int = NGRAM_SIZE) -> List[str]:
+    """Character n-grams of a normalized term"""
+    return [term[i:i + size] for i in range(len(term) - size + 1)]
+
+
+def _term_tiers(term: str, is_alias: bool, max_prefix: int) -> Dict[str, int]:
+    """Best tier for every prefix key produced by a single name or alias"""
+    tiers: Dict[str, int] = {}
+
+    def offer(key: str, tier: int) -> None:
+        if tier > tiers.get(key, 0):
+            tiers[key] = tier
+
+    # Prefixes of the whole term: exact / prefix matches
+    for length in range(1, min(len(term), max_prefix) + 1):
+        key = term[:length]
+        if is_alias:
+            offer(key, TIER_ALIAS_PREFIX)
+        elif length == len(term):
+            offer(key, TIER_EXACT)
+        else:
+            offer(key, TIER_PREFIX)
+
+    # Prefixes of inner words: the query is contained in the term
+    for start in _word_starts(term):
+        for length in range(1, min(len(term) - start, max_prefix) + 1):
+            offer(term[start:start + length], TIER_ALIAS_CONTAINS if is_alias else TIER_CONTAINS)
+
+    return tiers
+
+
+def build_search_index(foods: List[Dict[str, Any]],
+                       max_prefix: int = MAX_PREFIX_LENGTH,
+                       max_postings: int = MAX_POSTINGS) -> Dict[str, Any]:
+    """Build the prefix and n-gram inverted index for a list of foods"""
+    prefix_scores: Dict[str, Dict[int, int]] = {}
+    ngram_postings: Dict[str, set] = {}
+    name_lengths: List[int] = []
+    food_terms: List[List[str]] = []
+
+    for idx, food in enumerate(foods):
+        name = normalize_text(food.get("name", ""))
+        name_lengths.append(len(name))
+        aliases = {normalize_text(a) for a in food.get("aliases", []) if a}
+        aliases.discard("")
+
+        terms: List[Tuple[str, bool]] = [(name, False)]
+        terms.extend((alias, True) for alias in sorted(aliases) if alias != name)
+        food_terms.append([term for term, _is_alias in terms])
+
+        for term, is_alias in terms:
+            if not term:
+                continue
+            for key, tier in _term_tiers(term, is_alias, max_prefix).items():
+                scores = prefix_scores.setdefault(key, {})
+                if tier > scores.get(idx, 0):
+                    scores[idx] = tier
+            for gram in _ngrams(term):
+                ngram_postings.setdefault(gram, set()).add(idx)
+
+    # Rank each posting list once at build time and keep only the head
+    prefixes: Dict[str, List[List[int]]] = {}
+    for key in sorted(prefix_scores):
+        ranked = sorted(prefix_scores[key].items(), key=lambda item: (-item[1], name_lengths[item[0]], item[0]))
+        prefixes[key] = [[idx, tier] for idx, tier in ranked[:max_postings]]
+
+    ngrams = {gram: sorted(ngram_postings[gram]) for gram in sorted(ngram_postings)}
+
+    return {
+        "version": 2,
+        "totalFoods": len(foods),
+        "maxPrefixLength": max_prefix,
+        "maxPostings": max_postings,
+        "ngramSize": NGRAM_SIZE,
+        "tiers": {
+            "exact": TIER_EXACT,
+            "prefix": TIER_PREFIX,
+            "aliasPrefix": TIER_ALIAS_PREFIX,
+            "contains": TIER_CONTAINS,
+            "aliasContains": TIER_ALIAS_CONTAINS,
+        },
+        "foods": [food.get("id") for food in foods],
+        "prefixes": prefixes,
+        "ngrams": ngrams,
+        # Normalized name, then aliases, per food
+        "terms": food_terms,
+    }
+
+
+def rules_fingerprint() -> str:
+    """Fingerprint of the index code and constants, for build cache keys"""
+    return rules_digest(build_search_index, normalize_text, _word_starts, _ngrams, _term_tiers, _match_tier,
+                        [TIER_EXACT, TIER_PREFIX, TIER_ALIAS_PREFIX, TIER_CONTAINS, TIER_ALIAS_CONTAINS,
+                         MAX_PREFIX_LENGTH, MAX_POSTINGS, NGRAM_SIZE])
+
+
+def _match_tier(terms: List[str], q: str) -> int:
+    """searchFoods' score for one food's [name, *aliases]: exact / prefix / contains on the name, then aliases"""
+    name, aliases = terms[0], terms[1:]
+    tier = TIER_EXACT if name == q else TIER_PREFIX if name.startswith(q) else TIER_CONTAINS if q in name else 0
+    if any(alias.startswith(q) for alias in aliases):
+        tier = max(tier, TIER_ALIAS_PREFIX)
+    elif any(q in alias for alias in aliases):
+        tier = max(tier, TIER_ALIAS_CONTAINS)
+    return tier
+
+
+def lookup(index: Dict[str, Any], query: str, limit: int = 20) -> List[Tuple[str, int]]:
+    """
+    Resolve a typeahead query against a built index with the semantics of
+    searchFoods: every food whose name or an alias contains the query
+    anywhere, best tier first, then shorter names. Returns (food id, tier)
+    pairs. Candidates come from the intersected n-gram postings (every food
+    for queries shorter than one n-gram) and are checked against their
+    stored terms.
+    """
+    q = normalize_text(query)
+    if not q:
+        return []
+
+    terms = index["terms"]
+    candidates = None
+    for gram in _ngrams(q, index["ngramSize"]):
+        postings = set(index["ngrams"].get(gram, []))
+        candidates = postings if candidates is None else candidates & postings
+        if not candidates:
+            return []
+    if candidates is None:
+        candidates = range(len(terms))
+
+    tiers = ((idx, _match_tier(terms[idx], q)) for idx in candidates)
+    hits = sorted(((idx, tier) for idx, tier in tiers if tier),
+                  key=lambda hit: (-hit[1], len(terms[hit[0]][0]), hit[0]))
+    food_ids = index["foods"]
+    return [(food_ids[idx], tier) for idx, tier in hits[:limit]]
+
+
+def write_search_index(index: Dict[str, Any], output_path: str) -> None:
+    """Write the index as a compact JSON artifact"""
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def main():
+    """Build foodSearchIndex.json from an existing foodDatabase.json"""
+    import argparse
+
+    repo_root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Build the food search index artifact")
+    parser.add_argument("--database", default=os.path.join(repo_root, "LOAF", "data", "foodDatabase.json"))
+    parser.add_argument("--output", default=None, help="defaults to foodSearchIndex.json next to the database")
+    args = parser.parse_args()
+
+    output_path = args.output or os.path.join(os.path.dirname(args.database), "foodSearchIndex.json")
+
+    with open(args.database, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+    foods = database.get("foods") or database.get("foodDatabase", {}).get("foods", [])
+
+    print(f"\n🔎 Building search index for {len(foods)} foods...")
+    index = build_search_index(foods)
+    write_search_index(index, output_path)
+    print(f"  ✅ {len(index['prefixes'])} prefix keys, {len(index['ngrams'])} n-grams")
+    print(f"  File size: {os.path.getsize(output_path) / 1024:.1f} KB")
+    return True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+SQLite catalog writer for the LOAF food database
+Writes a ready-to-ship SQLite file (normalized food, alias, nutrient and
+portion tables plus an FTS5 index) that expo-sqlite can open and query
+lazily instead of parsing foodDatabase.json at startup
+"""
+
+import json
+import os
+import re
+import sqlite3
+from typing import Dict, List, Any, Optional, Tuple
+
+from build_cache import rules_digest
+from goal_rankings import diet_tagger, food_diet
+
+SCHEMA_VERSION = 1
+
+# Default units for nutrients written as bare numbers
+NUTRIENT_UNITS = {
+    "calories": "kcal",
+    "protein": "g",
+    "carbs": "g",
+    "fat": "g",
+    "fiber": "g",
+    "sugar": "g",
+    "sodium": "mg",
+    "calcium": "mg",
+    "iron": "mg",
+    "vitaminC": "mg",
+    "folate": "µg",
+    "vitaminD_ug": "µg",
+}
+
+# Alternate nutrient keys used by the different producers
+NUTRIENT_KEY_ALIASES = {
+    "carbohydrates": "carbs",
+}
+
+SCHEMA_SQL = """
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+) WITHOUT ROWID;
+
+CREATE TABLE foods (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    category TEXT,
+    cuisine TEXT,
+    source TEXT,
+    confidence REAL,
+    vegetarian INTEGER,
+    vegan INTEGER,
+    is_healthy INTEGER,
+    serving_size REAL,
+    serving_unit TEXT,
+    last_verified TEXT
+);
+
+CREATE TABLE food_aliases (
+    food_rowid INTEGER NOT NULL REFERENCES foods(rowid),
+    alias TEXT NOT NULL,
+    PRIMARY KEY (food_rowid, alias)
+) WITHOUT ROWID;
+
+CREATE TABLE nutrients (
+    nutrient_id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    unit TEXT
+);
+
+CREATE TABLE food_nutrients (
+    food_rowid INTEGER NOT NULL REFERENCES foods(rowid),
+    nutrient_id INTEGER NOT NULL REFERENCES nutrients(nutrient_id),
+    value REAL NOT NULL,
+    PRIMARY KEY (food_rowid, nutrient_id)
+) WITHOUT ROWID;
+
+CREATE TABLE food_portions (
+    food_rowid INTEGER NOT NULL REFERENCES foods(rowid),
+    label TEXT NOT NULL,
+    grams REAL NOT NULL,
+    PRIMARY KEY (food_rowid, label)
+) WITHOUT ROWID;
+
+CREATE VIRTUAL TABLE foods_fts USING fts5(
+    name,
+    aliases,
+    content='',
+    tokenize="unicode61 remove_diacritics 2",
+    prefix='2 3 4'
+);
+"""
+
+# Created after the bulk insert so they are built in one sorted pass
+INDEX_SQL = """
+CREATE INDEX idx_foods_category ON foods(category, vegetarian, vegan, name, id);
+CREATE INDEX idx_foods_diet ON foods(vegetarian, vegan, category, name, id);
+CREATE INDEX idx_food_aliases_alias ON food_aliases(alias, food_rowid);
+"""
+
+
+def _flag(value: Any) -> Optional[int]:
+    """Store optional booleans as 0/1/NULL"""
+    if value is None:
+        return None
+    return 1 if value else 0
+
+
+def nutrient_rows(nutrition: Dict[str, Any]) -> List[Tuple[str, float, str]]:
+    """Flatten either nutrition shape ({value, unit} objects or bare numbers) into (key, value, unit)"""
+    rows = []
+    for key, raw in (nutrition or {}).items():
+        key = NUTRIENT_KEY_ALIASES.get(key, key)
+        if isinstance(raw, dict):
+            value, unit = raw.get("value"), raw.get("unit") or NUTRIENT_UNITS.get(key)
+        else:
+            value, unit = raw, NUTRIENT_UNITS.get(key)
+        if value is None:
+            continue
+        try:
+            rows.append((key, float(value), unit))
+        except (ValueError, TypeError):
+            continue
+    return rows
+
+
+def diet_flags(food: Dict[str, Any], tagger=None) -> Tuple[Optional[int], Optional[int]]:
+    """(vegetarian, vegan) as 0/1, from the food's flags or else the tagger; NULL without either"""
+    if "vegetarian" not in food and "vegan" not in food and tagger is None:
+        return None, None
+    diet = food_diet(food, tagger)
+    return _flag(diet in ("vegetarian", "vegan")), _flag(diet == "vegan")
+
+
+def write_sqlite_catalog(foods: List[Dict[str, Any]], output_path: str,
+                         version: str = "1.0", last_updated: str = "", tagger=None) -> Dict[str, int]:
+    """
+    Write the catalog to a fresh SQLite file, replacing any previous one
+    atomically. Foods without vegetarian / vegan fields (generator output)
+    get them from the keyword tagger when one is given.
+    """
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = output_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA page_size = 4096")
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(SCHEMA_SQL)
+
+        nutrient_ids: Dict[str, int] = {}
+        food_rows, alias_rows, value_rows, portion_rows, fts_rows = [], [], [], [], []
+
+        for rowid, food in enumerate(foods, start=1):
+            vegetarian, vegan = diet_flags(food, tagger)
+            food_rows.append((
+                rowid,
+                food["id"],
+                food["name"],
+                food.get("category"),
+                food.get("cuisine"),
+                food.get("source"),
+                food.get("confidence"),
+                vegetarian,
+                vegan,
+                _flag(food.get("isHealthy")),
+                food.get("servingSize", 100),
+                food.get("servingSizeUnit", "g"),
+                food.get("lastVerified"),
+            ))
+
+            aliases = sorted({a.strip().lower() for a in food.get("aliases", []) if a and a.strip()})
+            alias_rows.extend((rowid, alias) for alias in aliases)
+            fts_rows.append((rowid, food["name"], " ".join(aliases)))
+
+            for key, value, unit in nutrient_rows(food.get("nutrition", {})):
+                if key not in nutrient_ids:
+                    nutrient_ids[key] = len(nutrient_ids) + 1
+                    conn.execute("INSERT INTO nutrients VALUES (?, ?, ?)", (nutrient_ids[key], key, unit))
+                value_rows.append((rowid, nutrient_ids[key], value))
+
+            for label, grams in (food.get("portionHints") or {}).items():
+                try:
+                    portion_rows.append((rowid, label, float(grams)))
+                except (ValueError, TypeError):
+                    continue
+
+        conn.executemany("INSERT INTO foods VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", food_rows)
+        conn.executemany("INSERT OR IGNORE INTO food_aliases VALUES (?, ?)", alias_rows)
+        conn.executemany("INSERT INTO food_nutrients VALUES (?, ?, ?)", value_rows)
+        conn.executemany("INSERT OR REPLACE INTO food_portions VALUES (?, ?, ?)", portion_rows)
+        conn.executemany("INSERT INTO foods_fts(rowid, name, aliases) VALUES (?, ?, ?)", fts_rows)
+
+        conn.executescript(INDEX_SQL)
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("schemaVersion", str(SCHEMA_VERSION)),
+            ("version", version),
+            ("lastUpdated", last_updated),
+            ("totalFoods", str(len(food_rows))),
+        ])
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.execute("INSERT INTO foods_fts(foods_fts) VALUES ('optimize')")
+        conn.commit()
+        conn.execute("ANALYZE")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, output_path)
+    return {
+        "foods": len(food_rows),
+        "aliases": len(alias_rows),
+        "nutrientValues": len(value_rows),
+        "portions": len(portion_rows),
+    }
+
+
+def fts_query(text: str) -> str:
+    """FTS5 MATCH expression for free text: every word as a quoted prefix term (implicit AND)"""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text.lower()))
+
+
+def search_catalog(conn: sqlite3.Connection, text: str, limit: int = 20) -> List[str]:
+    """Food ids whose name or aliases contain every word of text as a prefix, best bm25 rank first"""
+    query = fts_query(text)
+    if not query:
+        return []
+    rows = conn.execute("SELECT foods.id FROM foods_fts JOIN foods ON foods.rowid = foods_fts.rowid "
+                        "WHERE foods_fts MATCH ? ORDER BY foods_fts.rank LIMIT ?", (query, limit))
+    return [food_id for (food_id,) in rows]
+
+
+def rules_fingerprint() -> str:
+    """Fingerprint of the writer code, schema and diet keyword rules, for build cache keys"""
+    from migrate_foods import FoodDatabaseMigrator
+    return rules_digest(write_sqlite_catalog, nutrient_rows, _flag, diet_flags, food_diet,
+                        [SCHEMA_VERSION, SCHEMA_SQL, INDEX_SQL, NUTRIENT_UNITS, NUTRIENT_KEY_ALIASES]) + \
+        FoodDatabaseMigrator().rules_fingerprint()
+
+
+def main():
+    """Build foodCatalog.db from an existing foodDatabase.json"""
+    import argparse
+
+    repo_root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Build the SQLite food catalog")
+    parser.add_argument("--database", default=os.path.join(repo_root, "LOAF", "data", "foodDatabase.json"))
+    parser.add_argument("--output", default=None, help="defaults to foodCatalog.db next to the database")
+    args = parser.parse_args()
+
+    output_path = args.output or os.path.join(os.path.dirname(args.database), "foodCatalog.db")
+
+    with open(args.database, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+    # Accept both the generator layout and the migrator's foodDatabase wrapper
+    database = database.get("foodDatabase", database)
+    foods = database.get("foods", [])
+
+    print(f"\n🗄️  Writing SQLite catalog for {len(foods)} foods...")
+    counts = write_sqlite_catalog(foods, output_path, database.get("version", "1.0"), database.get("lastUpdated", ""),
+                                  diet_tagger())
+    print(f"  ✅ {counts['foods']} foods, {counts['aliases']} aliases, {counts['nutrientValues']} nutrient values")
+    print(f"  File size: {os.path.getsize(output_path) / 1024:.1f} KB")
+    return True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Catalog diff / patch generation for the LOAF food database
+Compares two versions of foodDatabase.json and writes a compact
+added / changed / removed patch so clients can sync kilobytes instead
+of re-downloading the whole catalog
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, List, Any, Optional
+
+from food_ids import identity_key
+
+PATCH_FORMAT = 1
+
+
+def catalog_foods(database: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Foods list of either the generator layout or the migrator's foodDatabase wrapper"""
+    return database.get("foodDatabase", database).get("foods", [])
+
+
+def canonical_json(value: Any) -> bytes:
+    """Key-sorted, minified JSON bytes of a value"""
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def canonical_food(food: Dict[str, Any]) -> bytes:
+    """Canonical bytes of one food (the unit every content hash is taken over)"""
+    return canonical_json(food)
+
+
+def catalog_hash(foods: List[Dict[str, Any]]) -> str:
+    """Order-independent content hash of a foods list"""
+    digest = hashlib.sha256()
+    for food in sorted(foods, key=lambda f: f["id"]):
+        digest.update(canonical_food(food))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def _field_changes(old: Dict[str, Any], new: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Top-level fields to set and unset to turn old into new, or None if equal.
+    Fields are compared as canonical JSON, like the hashes, so 75 and 75.0
+    count as different.
+    """
+    changes: Dict[str, Any] = {}
+    set_fields = {k: v for k, v in new.items()
+                  if k != "id" and (k not in old or canonical_json(old[k]) != canonical_json(v))}
+    unset_fields = sorted(k for k in old if k not in new)
+    if set_fields:
+        changes["set"] = set_fields
+    if unset_fields:
+        changes["unset"] = unset_fields
+    return changes or None
+
+
+def diff_catalogs(old_db: Dict[str, Any], new_db: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a patch that turns old_db's foods into new_db's foods"""
+    old_foods = catalog_foods(old_db)
+    new_foods = catalog_foods(new_db)
+    old_by_id = {f["id"]: f for f in old_foods}
+    new_by_id = {f["id"]: f for f in new_foods}
+
+    # Records whose id changed (e.g. positional -> stable ids) are matched by identity
+    new_by_identity = {identity_key(f.get("source", ""), f.get("name", "")): f["id"] for f in new_foods}
+    id_map: Dict[str, str] = {}
+    for old_id, food in old_by_id.items():
+        if old_id in new_by_id:
+            continue
+        new_id = new_by_identity.get(identity_key(food.get("source", ""), food.get("name", "")))
+        if new_id and new_id not in old_by_id:
+            id_map[old_id] = new_id
+    renamed_targets = {new_id: old_id for old_id, new_id in id_map.items()}
+
+    added, changed = [], []
+    for food in new_foods:
+        previous_id = renamed_targets.get(food["id"], food["id"])
+        previous = old_by_id.get(previous_id)
+        if previous is None:
+            added.append(food)
+            continue
+        changes = _field_changes(previous, food)
+        if changes:
+            changes = {"id": food["id"], **changes}
+            changed.append(changes)
+
+    removed = sorted(i for i in old_by_id if i not in new_by_id and i not in id_map)
+
+    return {
+        "format": PATCH_FORMAT,
+        "fromVersion": old_db.get("foodDatabase", old_db).get("version"),
+        "toVersion": new_db.get("foodDatabase", new_db).get("version"),
+        "fromHash": catalog_hash(old_foods),
+        "toHash": catalog_hash(new_foods),
+        "idMap": id_map,
+        "added": added,
+        "changed": changed,
+        "removed": removed,
+    }
+
+
+def apply_patch(foods: List[Dict[str, Any]], patch: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Apply a patch to a foods list, verifying the content hashes on both ends"""
+    if catalog_hash(foods) != patch["fromHash"]:
+        raise ValueError("Patch does not apply: base catalog hash mismatch")
+
+    removed = set(patch["removed"])
+    result: Dict[str, Dict[str, Any]] = {}
+    for food in foods:
+        if food["id"] in removed:
+            continue
+        new_id = patch["idMap"].get(food["id"], food["id"])
+        result[new_id] = dict(food, id=new_id)
+
+    for change in patch["changed"]:
+        food = result[change["id"]]
+        food.update(change.get("set", {}))
+        for key in change.get("unset", []):
+            food.pop(key, None)
+    for food in patch["added"]:
+        result[food["id"]] = food
+
+    patched = list(result.values())
+    if catalog_hash(patched) != patch["toHash"]:
+        raise ValueError("Patch produced an unexpected catalog (target hash mismatch)")
+    return patched
+
+
+def write_patch(patch: Dict[str, Any], output_path: str) -> int:
+    """Write a minified patch file; returns its size in bytes"""
+    payload = json.dumps(patch, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, 'wb') as f:
+        f.write(payload)
+    return len(payload)
+
+
+def main():
+    """Diff two foodDatabase.json files"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write a patch between two food database versions")
+    parser.add_argument("old", help="previous foodDatabase.json")
+    parser.add_argument("new", help="new foodDatabase.json")
+    parser.add_argument("-o", "--output", default="foodDatabase.patch.json")
+    args = parser.parse_args()
+
+    with open(args.old, 'r', encoding='utf-8') as f:
+        old_db = json.load(f)
+    with open(args.new, 'r', encoding='utf-8') as f:
+        new_db = json.load(f)
+
+    patch = diff_catalogs(old_db, new_db)
+    try:
+        apply_patch(catalog_foods(old_db), patch)
+    except ValueError as e:
+        print(f"  ❌ Patch does not round-trip, not written: {e}")
+        return False
+    size = write_patch(patch, args.output)
+    print(f"\n🧩 Patch {args.output}: {len(patch['added'])} added, {len(patch['changed'])} changed, "
+          f"{len(patch['removed'])} removed, {len(patch['idMap'])} re-keyed ({size / 1024:.1f} KB)")
+    return True
+
+
+if __name__ == "__main__":
+    main()
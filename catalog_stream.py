@@ -0,0 +1,259 @@
+"""
+Streaming access to foodDatabase.json for bounded-memory migrations
+Foods are read one at a time from either layout (the generator's flat
+{"foods": [...]} or the migrator's {"foodDatabase": {"foods": [...]}}),
+names are tracked in an on-disk SQLite index, and the merged catalog is
+written progressively to a temp file that atomically replaces the target
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import stat
+import tempfile
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+READ_CHUNK_CHARS = 1 << 16
+INDEX_BATCH = 5000
+WRAPPER_KEY = "foodDatabase"
+_WHITESPACE = " \t\r\n"
+
+
+class _TextCursor:
+    """Buffered character cursor over a text file for incremental raw_decode parsing"""
+
+    def __init__(self, f, chunk_chars: int = READ_CHUNK_CHARS):
+        self.f = f
+        self.chunk_chars = chunk_chars
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        data = self.f.read(self.chunk_chars)
+        if not data:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character (without consuming it); '' at end of file"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, ch: str) -> None:
+        found = self.peek()
+        if found != ch:
+            raise ValueError(f"Malformed food database: expected {ch!r}, found {found!r}")
+        self.pos += 1
+
+    def value(self, decoder: json.JSONDecoder) -> Any:
+        """Decode the next complete JSON value, reading more text until it is whole"""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            if not self._fill():
+                self.eof = True
+
+
+class CatalogReader:
+    """
+    Incremental reader for either catalog layout. foods() yields one food at
+    a time; meta holds every other key (in file order, with "foods" as a
+    placeholder) once iteration has finished, and wrapped tells which layout
+    the file used.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.meta: Dict[str, Any] = {}
+        self.wrapped = False
+        self.count = 0
+
+    def foods(self) -> Iterator[Dict[str, Any]]:
+        decoder = json.JSONDecoder()
+        self.meta, self.count = {}, 0
+        with open(self.path, 'r', encoding='utf-8') as f:
+            cursor = _TextCursor(f)
+            cursor.expect("{")
+            yield from self._object(cursor, decoder, self.meta, top_level=True)
+
+    def _object(self, cursor: _TextCursor, decoder: json.JSONDecoder, meta: Dict[str, Any],
+                top_level: bool) -> Iterator[Dict[str, Any]]:
+        if cursor.peek() == "}":
+            cursor.pos += 1
+            return
+        while True:
+            key = cursor.value(decoder)
+            cursor.expect(":")
+            if key == "foods" and cursor.peek() == "[":
+                meta["foods"] = None
+                yield from self._array(cursor, decoder)
+            elif top_level and key == WRAPPER_KEY and cursor.peek() == "{":
+                cursor.pos += 1
+                self.wrapped = True
+                inner: Dict[str, Any] = {}
+                meta[WRAPPER_KEY] = inner
+                yield from self._object(cursor, decoder, inner, top_level=False)
+            else:
+                meta[key] = cursor.value(decoder)
+            separator = cursor.peek()
+            cursor.pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError(f"Malformed food database: unexpected {separator!r}")
+
+    def _array(self, cursor: _TextCursor, decoder: json.JSONDecoder) -> Iterator[Dict[str, Any]]:
+        cursor.expect("[")
+        if cursor.peek() == "]":
+            cursor.pos += 1
+            return
+        while True:
+            self.count += 1
+            yield cursor.value(decoder)
+            separator = cursor.peek()
+            cursor.pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(f"Malformed food database: unexpected {separator!r} in foods")
+
+    def container(self) -> Dict[str, Any]:
+        """The dict that holds "foods" (the wrapper's contents or the top level)"""
+        return self.meta[WRAPPER_KEY] if self.wrapped else self.meta
+
+
+class NameIndex:
+    """On-disk set of lowercased food names backed by SQLite"""
+
+    def __init__(self, path: Optional[str] = None):
+        self._tmp_dir = None
+        if path is None:
+            self._tmp_dir = tempfile.TemporaryDirectory(prefix="loaf-names-")
+            path = os.path.join(self._tmp_dir.name, "names.sqlite")
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode = OFF")
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS names (name TEXT PRIMARY KEY) WITHOUT ROWID")
+        self._pending: List[Tuple[str]] = []
+
+    def add(self, name: str) -> None:
+        self._pending.append((name.lower(),))
+        if len(self._pending) >= INDEX_BATCH:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending:
+            self.conn.executemany("INSERT OR IGNORE INTO names VALUES (?)", self._pending)
+            self.conn.commit()
+            self._pending = []
+
+    def __contains__(self, name: str) -> bool:
+        self.flush()
+        return self.conn.execute("SELECT 1 FROM names WHERE name = ?", (name.lower(),)).fetchone() is not None
+
+    def close(self) -> None:
+        self.conn.close()
+        if self._tmp_dir is not None:
+            self._tmp_dir.cleanup()
+
+
+def _indented(value: Any, depth: int) -> str:
+    """json.dumps(indent=2) text of a value nested depth levels deep"""
+    return json.dumps(value, ensure_ascii=False, indent=2).replace("\n", "\n" + "  " * depth)
+
+
+class _HashingWriter:
+    def __init__(self, f):
+        self.f = f
+        self.digest = hashlib.sha256()
+
+    def write(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self.digest.update(data)
+        self.f.write(data)
+
+
+def _write_object(out: _HashingWriter, meta: Dict[str, Any], foods: Iterable[Dict[str, Any]], depth: int) -> None:
+    pad = "  " * (depth + 1)
+    out.write("{")
+    for i, (key, value) in enumerate(meta.items()):
+        out.write(("," if i else "") + "\n" + pad + json.dumps(key, ensure_ascii=False) + ": ")
+        if key == "foods":
+            first = True
+            for food in foods:
+                out.write(("[" if first else ",") + "\n" + pad + "  " + _indented(food, depth + 2))
+                first = False
+            out.write("[]" if first else "\n" + pad + "]")
+        elif isinstance(value, dict) and "foods" in value:
+            _write_object(out, value, foods, depth + 1)
+        else:
+            out.write(_indented(value, depth + 1))
+    out.write(("\n" + "  " * depth if meta else "") + "}")
+
+
+def _replacement_mode(path: str) -> int:
+    """Permission bits for a file replacing path: the current file's, else what open() would create"""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def write_catalog_stream(path: str, meta: Dict[str, Any], foods: Iterable[Dict[str, Any]]) -> bool:
+    """
+    Write a catalog progressively, producing the same bytes as
+    json.dumps(database, ensure_ascii=False, indent=2). meta is the layout
+    from CatalogReader (the "foods" entry is filled from the foods iterable).
+    Written to a temp file and atomically renamed; if the result is identical
+    to the current file it is discarded instead. Returns True if written.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".foodDatabase-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            out = _HashingWriter(f)
+            _write_object(out, meta, foods, 0)
+        if os.path.exists(path) and os.path.getsize(path) == os.path.getsize(tmp_path):
+            current = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    current.update(chunk)
+            if current.hexdigest() == out.digest.hexdigest():
+                os.remove(tmp_path)
+                return False
+        # mkstemp creates the file as 0600; the catalog keeps its usual permissions
+        os.chmod(tmp_path, _replacement_mode(path))
+        os.replace(tmp_path, path)
+        return True
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def empty_catalog_meta(version: str = "1.0") -> Dict[str, Any]:
+    """Layout used when there is no existing database (the migrator's wrapped form)"""
+    return {WRAPPER_KEY: {"version": version, "foods": None}}
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Data-quality checks over the whole nutrient matrix
+Builds one column per nutrient for the catalog and runs each check as a
+column operation: Atwater energy consistency (4/4/9 kcal per g of protein,
+carbs, fat), per-category robust z-score outliers (median / MAD) and
+impossible values. Foods with impossible values are quarantined; foods
+failing the softer checks keep their place with a lower confidence.
+"""
+
+import json
+import math
+import os
+from array import array
+from statistics import median
+from typing import Dict, List, Any, Iterable, Tuple
+
+ATWATER = {"protein": 4.0, "carbs": 4.0, "fat": 9.0}
+# Stated energy may differ from 4/4/9 energy by this share (fibre, polyols and rounding)...
+ATWATER_TOLERANCE = 0.25
+# ...or by this many kcal, so near-zero foods (tea, water) are not flagged
+ATWATER_SLACK_KCAL = 15.0
+# Micronutrients are heavy-tailed by nature (cheese and calcium), so only energy and macros are z-scored
+OUTLIER_NUTRIENTS = ["calories", "protein", "carbs", "fat", "fiber"]
+Z_THRESHOLD = 3.5           # Iglewicz-Hoaglin cut-off for the modified z-score
+MIN_GROUP_SIZE = 10         # smaller categories have no stable median / MAD
+MAX_KCAL_PER_GRAM = 9.0     # pure fat
+NUTRITION_BASIS_G = 100.0   # nutrition is per 100 g unless a food states a serving size
+MASS_SLACK = 1.02           # rounding in the source tables
+# Confidence multiplier per distinct soft check a food fails, and the floor it stops at
+CONFIDENCE_PENALTY = 0.8
+MIN_CONFIDENCE = 0.3
+
+
+def nutrient_columns(foods: List[Dict[str, Any]], nutrients: Iterable[str]) -> Dict[str, array]:
+    """One array('d') per nutrient (missing = 0.0, non-numeric = NaN)"""
+    columns = {}
+    for nutrient in nutrients:
+        column = array('d')
+        for food in foods:
+            value = food.get("nutrition", {}).get(nutrient, 0.0)
+            column.append(float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else math.nan)
+        columns[nutrient] = column
+    return columns
+
+
+def atwater_mismatches(columns: Dict[str, array]) -> List[bool]:
+    """Rows whose stated calories disagree with 4/4/9 energy from their macros"""
+    kp, kc, kf = ATWATER["protein"], ATWATER["carbs"], ATWATER["fat"]
+    expected = [kp * p + kc * c + kf * f for p, c, f in zip(columns["protein"], columns["carbs"], columns["fat"])]
+    return [abs(stated - energy) > max(ATWATER_SLACK_KCAL, ATWATER_TOLERANCE * max(stated, energy))
+            for stated, energy in zip(columns["calories"], expected)]
+
+
+def energy_unexplained(columns: Dict[str, array]) -> List[bool]:
+    """Atwater mismatches where the stated calories exceed what the macros can supply"""
+    kp, kc, kf = ATWATER["protein"], ATWATER["carbs"], ATWATER["fat"]
+    return [mismatch and stated > kp * p + kc * c + kf * f
+            for mismatch, stated, p, c, f in zip(atwater_mismatches(columns), columns["calories"],
+                                                 columns["protein"], columns["carbs"], columns["fat"])]
+
+
+def robust_z_scores(columns: Dict[str, array], groups: Dict[str, List[int]],
+                    nutrients: List[str]) -> Tuple[Dict[str, array], Dict[str, Dict[str, Dict[str, float]]]]:
+    """
+    Modified z-scores 0.6745 * (x - median) / MAD within each group, per
+    nutrient (0 where the group is too small or its MAD is 0), plus the
+    medians and MADs used
+    """
+    rows = len(next(iter(columns.values()))) if columns else 0
+    scores = {n: array('d', bytes(8 * rows)) for n in nutrients}
+    stats: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for group, members in groups.items():
+        if len(members) < MIN_GROUP_SIZE:
+            continue
+        stats[group] = {}
+        for nutrient in nutrients:
+            column = columns[nutrient]
+            values = [column[i] for i in members if not math.isnan(column[i])]
+            if not values:
+                continue
+            center = median(values)
+            mad = median(abs(v - center) for v in values)
+            stats[group][nutrient] = {"median": round(center, 3), "mad": round(mad, 3)}
+            if mad == 0:
+                continue
+            scale = 0.6745 / mad
+            out = scores[nutrient]
+            for i in members:
+                out[i] = (column[i] - center) * scale
+    return scores, stats
+
+
+def impossible_values(columns: Dict[str, array], bases: List[float]) -> List[List[str]]:
+    """
+    Per-row reasons a value cannot be right: negative or non-numeric
+    nutrients, sugar above carbs, and more macro grams or more energy
+    than the basis (grams the nutrition is stated for) could hold
+    """
+    rows = len(bases)
+    reasons: List[List[str]] = [[] for _ in range(rows)]
+    for nutrient, column in columns.items():
+        for i, value in enumerate(column):
+            if not value >= 0.0:
+                reasons[i].append(f"impossible:{nutrient}")
+    # Fibre is left out: many tables count it inside total carbohydrate
+    mass = [p + c + f for p, c, f in zip(columns["protein"], columns["carbs"], columns["fat"])]
+    for i, (grams, kcal, basis) in enumerate(zip(mass, columns["calories"], bases)):
+        if basis > 0 and grams > basis * MASS_SLACK:
+            reasons[i].append("impossible:mass")
+        if basis > 0 and kcal > MAX_KCAL_PER_GRAM * basis:
+            reasons[i].append("impossible:energy")
+    if "sugar" in columns:
+        for i, (sugar, carbs) in enumerate(zip(columns["sugar"], columns["carbs"])):
+            if sugar > carbs + 0.5:
+                reasons[i].append("impossible:sugar")
+    return reasons
+
+
+def _catalog_columns(foods: List[Dict[str, Any]]) -> Dict[str, array]:
+    return nutrient_columns(foods, OUTLIER_NUTRIENTS + ["iron", "calcium", "sugar"])
+
+
+def _bases(foods: List[Dict[str, Any]]) -> List[float]:
+    return [float(food.get("servingSize") or NUTRITION_BASIS_G) for food in foods]
+
+
+def implausible_foods(foods: List[Dict[str, Any]]) -> List[bool]:
+    """
+    Per food, whether its values cannot describe the food: an impossible
+    value, or energy its macros cannot account for (whole-meal rows
+    stored as per-100 g). For callers that leave such foods out rather
+    than quarantine them.
+    """
+    columns = _catalog_columns(foods)
+    return [bool(flags) or unexplained for flags, unexplained
+            in zip(impossible_values(columns, _bases(foods)), energy_unexplained(columns))]
+
+
+def check_catalog(foods: List[Dict[str, Any]]) -> Tuple[List[List[str]], Dict[str, Any]]:
+    """Quality flags per food (empty when clean) and the per-category statistics used"""
+    columns = _catalog_columns(foods)
+    groups: Dict[str, List[int]] = {}
+    for i, food in enumerate(foods):
+        groups.setdefault(food.get("category", "unknown"), []).append(i)
+
+    flags = impossible_values(columns, _bases(foods))
+    for i, mismatch in enumerate(atwater_mismatches(columns)):
+        if mismatch:
+            flags[i].append("atwater")
+    scores, stats = robust_z_scores(columns, groups, OUTLIER_NUTRIENTS)
+    for nutrient in OUTLIER_NUTRIENTS:
+        for i, z in enumerate(scores[nutrient]):
+            if abs(z) > Z_THRESHOLD:
+                flags[i].append(f"outlier:{nutrient}")
+    return flags, stats
+
+
+def apply_quality(foods: List[Dict[str, Any]], flags: List[List[str]]
+                  ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Drop foods with impossible values, lower the confidence of foods with
+    other flags (recording them under qualityFlags), and return the kept
+    foods with a report. Down-weighted foods are copies.
+    """
+    kept, quarantined, downweighted = [], [], []
+    by_check: Dict[str, int] = {}
+    sources: Dict[str, Dict[str, int]] = {}
+    for food, food_flags in zip(foods, flags):
+        if not food_flags:
+            kept.append(food)
+            continue
+        for flag in food_flags:
+            check = flag.split(":")[0]
+            by_check[check] = by_check.get(check, 0) + 1
+        entry = {"id": food.get("id"), "name": food.get("name"), "source": food.get("source"), "flags": food_flags}
+        counts = sources.setdefault(food.get("source") or "unknown", {"quarantined": 0, "downweighted": 0})
+        if any(flag.startswith("impossible") for flag in food_flags):
+            quarantined.append(entry)
+            counts["quarantined"] += 1
+        else:
+            food = dict(food)  # the input catalog is left untouched
+            before = food.get("confidence", 0.0)
+            checks = {flag.split(":")[0] for flag in food_flags}
+            after = round(max(MIN_CONFIDENCE, before * CONFIDENCE_PENALTY ** len(checks)), 2)
+            food["confidence"] = min(before, after)
+            food["qualityFlags"] = food_flags
+            entry["confidence"] = {"before": before, "after": food["confidence"]}
+            downweighted.append(entry)
+            counts["downweighted"] += 1
+            kept.append(food)
+
+    report = {
+        "summary": {
+            "checked": len(foods),
+            "kept": len(kept),
+            "quarantined": len(quarantined),
+            "downweighted": len(downweighted),
+            "byCheck": dict(sorted(by_check.items())),
+            "bySource": sources,
+        },
+        "quarantined": quarantined,
+        "downweighted": downweighted,
+    }
+    return kept, report
+
+
+def quality_pass(foods: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Check, quarantine and down-weight a catalog; returns the kept foods and the full report"""
+    flags, stats = check_catalog(foods)
+    kept, report = apply_quality(foods, flags)
+    report = {
+        "version": 1,
+        "thresholds": {
+            "atwaterTolerance": ATWATER_TOLERANCE,
+            "atwaterSlackKcal": ATWATER_SLACK_KCAL,
+            "zThreshold": Z_THRESHOLD,
+            "minGroupSize": MIN_GROUP_SIZE,
+            "confidencePenalty": CONFIDENCE_PENALTY,
+        },
+        **report,
+        "categoryStats": stats,
+    }
+    return kept, report
+
+
+def write_quality_report(report: Dict[str, Any], output_path: str) -> None:
+    """Write the report as readable JSON"""
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def main():
+    """Report on an existing foodDatabase.json without changing it"""
+    import argparse
+
+    repo_root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Check a food database for inconsistent and impossible values")
+    parser.add_argument("--database", default=os.path.join(repo_root, "LOAF", "data", "foodDatabase.json"))
+    parser.add_argument("--report", default=None, help="defaults to foodQualityReport.json next to the database")
+    args = parser.parse_args()
+
+    report_path = args.report or os.path.join(os.path.dirname(args.database), "foodQualityReport.json")
+
+    with open(args.database, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+    foods = database.get("foods") or database.get("foodDatabase", {}).get("foods", [])
+
+    print(f"\n🩺 Checking {len(foods)} foods...")
+    _kept, report = quality_pass(foods)
+    write_quality_report(report, report_path)
+    summary = report["summary"]
+    print(f"  ✅ {summary['quarantined']} would be quarantined, {summary['downweighted']} down-weighted")
+    for check, count in summary["byCheck"].items():
+        print(f"     {check}: {count}")
+    print(f"  Report: {report_path}")
+    return True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate detection and merging for the LOAF food database
+Proposes merge groups with MinHash / LSH blocking over character n-grams
+of every name variant, plus single-deletion keys so one-letter typos are
+always compared, picks a canonical record per group by source confidence
+and folds the other names into its aliases
+"""
+
+import json
+import os
+import re
+import zlib
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+from food_ids import canonical_name
+
+NGRAM_SIZE = 3
+NUM_PERMUTATIONS = 48
+BANDS = 16  # 16 bands x 3 rows: candidate threshold around Jaccard 0.4, 99.9% recall at the 0.7 threshold
+SIMILARITY_THRESHOLD = 0.7
+CALORIE_TOLERANCE = 0.35  # relative calorie difference allowed inside a group
+CALORIE_SLACK = 25.0  # absolute kcal difference always tolerated (low-energy drinks)
+# Bands shared by more names than this are common endings ("... soup"), not near-duplicates;
+# skipping them keeps candidate pairs linear in the catalog size
+MAX_BUCKET_SIZE = 32
+
+_PRIME = (1 << 61) - 1
+_PERMUTATIONS = [
+    ((i * 0x9E3779B97F4A7C15 + 0x632BE59BD9B4E019) % _PRIME or 1, (i * 0xC2B2AE3D27D4EB4F + 1) % _PRIME)
+    for i in range(1, NUM_PERMUTATIONS + 1)
+]
+_BRACKET_RE = re.compile(r"\(([^()]*)\)")
+
+# Bracketed text starting with these words qualifies the dish rather than translating it
+QUALIFIER_LEADS = {"with", "without", "made", "in", "for", "from"}
+# Generic words that do not make a food different (dropped in the "core" variant)
+NEUTRAL_WORDS = {"garam", "plain", "fresh", "homemade", "home", "made", "indian", "simple", "basic",
+                 "classic", "regular", "traditional", "style", "ka", "ki", "ke"}
+# Form / preparation words: "whole moong" and "dal moong" (split) are different foods, so a pair
+# is only merged when both names carry the same set of these
+FORM_WORDS = {"whole", "split", "washed", "dehusked", "husked", "sprouted", "germinated", "raw", "boiled",
+              "roasted", "fried", "steamed", "baked", "grilled", "dried", "dry", "instant", "cracked", "ground"}
+MAX_EXPANSIONS = 4
+
+
+def _expand_alternatives(text: str) -> List[str]:
+    """Expand 'a b/c d' into 'a b d' and 'a c d' (capped)"""
+    expansions = [[]]
+    for token in text.split():
+        options = [o for o in token.split("/") if o] or [token]
+        expansions = [e + [o] for e in expansions for o in options][:MAX_EXPANSIONS]
+    return [" ".join(e) for e in expansions]
+
+
+def name_variants(name: str) -> List[Tuple[str, bool]]:
+    """
+    Canonical forms a food may be known by: the name (with '/' alternatives
+    expanded), a bracketed translation such as 'Hot tea (Garam Chai)', and the
+    "core" of each form with neutral words like 'garam' or 'plain' removed.
+    Qualifiers such as '(toasted)' stay part of the name. Returns
+    (variant, is_translation) pairs.
+    """
+    text = name or ""
+    while _BRACKET_RE.search(text):
+        text = _BRACKET_RE.sub(lambda m: " [" + m.group(1) + "] ", text)
+    brackets = re.findall(r"\[([^\[\]]*)\]", text)
+    main = re.sub(r"\[[^\[\]]*\]", " ", text)
+
+    translations = []
+    for inner in brackets:
+        words = canonical_name(inner).split()
+        if len(words) >= 2 and words[0] not in QUALIFIER_LEADS:
+            translations.append(inner)
+        else:
+            main += " " + inner
+
+    variants: List[Tuple[str, bool]] = []
+    seen: Set[str] = set()
+    for position, base in enumerate([main] + translations):
+        for expansion in _expand_alternatives(base):
+            variant = canonical_name(expansion)
+            core = " ".join(w for w in variant.split() if w not in NEUTRAL_WORDS)
+            for candidate in (variant, core):
+                if len(candidate) >= 3 and candidate not in seen:
+                    seen.add(candidate)
+                    variants.append((candidate, position > 0))
+    return variants or [(canonical_name(name), False)]
+
+
+def _edit_distance(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def _typo_budget(a: str, b: str) -> int:
+    """Edits tolerated between two words; short words must match exactly"""
+    shortest = min(len(a), len(b))
+    return 0 if shortest < 7 else 1 if shortest < 10 else 2
+
+
+def _is_typo(a: str, b: str) -> bool:
+    """Close spellings of one word; typos keep the first letter, so 'million' / 'billion' are different words"""
+    return a[:1] == b[:1] and _edit_distance(a, b) <= _typo_budget(a, b)
+
+
+def tokens_compatible(a: str, b: str) -> bool:
+    """
+    True if two variants differ only by typos: every word that is not shared
+    must pair up with a close spelling on the other side. Rejects
+    'hot lemon souffle' vs 'cold lemon souffle' and 'pea curry' vs 'pea keema curry'.
+    """
+    only_a = sorted(set(a.split()) - set(b.split()))
+    only_b = sorted(set(b.split()) - set(a.split()))
+    if len(only_a) != len(only_b):
+        return False
+    for word in only_a:
+        match = next((w for w in only_b if _is_typo(word, w)), None)
+        if match is None:
+            return False
+        only_b.remove(match)
+    return True
+
+
+def form_words(name: str) -> Set[str]:
+    """FORM_WORDS appearing in any variant of a name"""
+    return {word for variant, _translated in name_variants(name) for word in variant.split() if word in FORM_WORDS}
+
+
+def deletion_keys(text: str) -> Set[str]:
+    """The text and every copy with one character removed; strings one edit apart share a key"""
+    return {text} | {text[:i] + text[i + 1:] for i in range(len(text))}
+
+
+def shingles(text: str, size: int = NGRAM_SIZE) -> Set[str]:
+    """Character n-grams of a padded string"""
+    padded = f" {text} "
+    return {padded[i:i + size] for i in range(max(1, len(padded) - size + 1))}
+
+
+def minhash(grams: Set[str]) -> Tuple[int, ...]:
+    """MinHash signature of a shingle set"""
+    hashed = [zlib.crc32(g.encode("utf-8")) for g in grams]
+    return tuple(min((a * h + b) % _PRIME for h in hashed) for a, b in _PERMUTATIONS)
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def _calories(food: Dict[str, Any]) -> Optional[float]:
+    value = (food.get("nutrition") or {}).get("calories")
+    if isinstance(value, dict):
+        value = value.get("value")
+    return float(value) if value is not None else None
+
+
+def _calories_compatible(a: Dict[str, Any], b: Dict[str, Any], tolerance: float) -> bool:
+    """Guard against merging same-named but different foods"""
+    ca, cb = _calories(a), _calories(b)
+    if ca is None or cb is None:
+        return True
+    return abs(ca - cb) <= max(tolerance * max(ca, cb), CALORIE_SLACK)
+
+
+def find_duplicate_pairs(foods: List[Dict[str, Any]], threshold: float = SIMILARITY_THRESHOLD,
+                         calorie_tolerance: float = CALORIE_TOLERANCE,
+                         max_bucket: int = MAX_BUCKET_SIZE) -> List[Tuple[int, int, float]]:
+    """
+    Candidate pairs from LSH buckets and single-deletion buckets of at most
+    max_bucket foods, verified with exact Jaccard; (i, j, similarity) with i < j
+    """
+    rows_per_band = NUM_PERMUTATIONS // BANDS
+    buckets: Dict[Tuple[Any, ...], List[int]] = {}
+    variant_grams: List[List[Tuple[str, bool, Set[str]]]] = []
+    forms: List[Set[str]] = []
+
+    for idx, food in enumerate(foods):
+        grams_list = [(v, translated, shingles(v)) for v, translated in name_variants(food.get("name", ""))]
+        variant_grams.append(grams_list)
+        forms.append(form_words(food.get("name", "")))
+        for variant, _translated, grams in grams_list:
+            signature = minhash(grams)
+            keys = [(band, signature[band * rows_per_band:(band + 1) * rows_per_band]) for band in range(BANDS)]
+            # LSH can miss a pair by chance; a one-letter typo ("espreso" / "espresso") always shares a key here
+            keys.extend(("deletion", key) for key in deletion_keys(variant))
+            for key in keys:
+                bucket = buckets.setdefault(key, [])
+                if not bucket or bucket[-1] != idx:
+                    bucket.append(idx)
+
+    candidates: Set[Tuple[int, int]] = set()
+    for members in buckets.values():
+        if len(members) < 2 or len(members) > max_bucket:
+            continue
+        for x in range(len(members)):
+            for y in range(x + 1, len(members)):
+                candidates.add((members[x], members[y]))
+
+    pairs = []
+    for i, j in sorted(candidates):
+        if forms[i] != forms[j]:
+            continue
+        # Two translations matching says nothing when the dishes themselves differ
+        similarity = max(
+            (jaccard(ga, gb) for va, ta, ga in variant_grams[i] for vb, tb, gb in variant_grams[j]
+             if not (ta and tb) and tokens_compatible(va, vb)),
+            default=0.0,
+        )
+        if similarity >= threshold and _calories_compatible(foods[i], foods[j], calorie_tolerance):
+            pairs.append((i, j, round(similarity, 3)))
+    return pairs
+
+
+def cluster_pairs(count: int, pairs: List[Tuple[int, int, float]]) -> List[List[int]]:
+    """Union-find over verified pairs; groups of two or more, in first-index order"""
+    parent = list(range(count))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j, _similarity in pairs:
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    groups: Dict[int, List[int]] = {}
+    for idx in range(count):
+        groups.setdefault(find(idx), []).append(idx)
+    return [members for _root, members in sorted(groups.items()) if len(members) > 1]
+
+
+def pick_canonical(foods: List[Dict[str, Any]], members: List[int]) -> int:
+    """Highest source confidence wins; earlier records win ties"""
+    return min(members, key=lambda idx: (-float(foods[idx].get("confidence", 0)), idx))
+
+
+def merge_near_duplicates(foods: List[Dict[str, Any]], threshold: float = SIMILARITY_THRESHOLD,
+                          calorie_tolerance: float = CALORIE_TOLERANCE) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Merge near-duplicate foods.
+    Returns the merged foods list (input order, duplicates removed) and a
+    report of the merge groups.
+    """
+    pairs = find_duplicate_pairs(foods, threshold, calorie_tolerance)
+    similarity = {(i, j): s for i, j, s in pairs}
+    groups = cluster_pairs(len(foods), pairs)
+
+    dropped: Set[int] = set()
+    merged: Dict[int, Dict[str, Any]] = {}
+    report = []
+    for members in groups:
+        keep = pick_canonical(foods, members)
+        # Only fold records that matched the canonical one directly (no chaining)
+        members = [idx for idx in members if idx == keep or (min(idx, keep), max(idx, keep)) in similarity]
+        if len(members) < 2:
+            continue
+        canonical = dict(foods[keep])
+        aliases = list(canonical.get("aliases", []))
+        merged_ids = list(canonical.get("mergedIds", []))
+        entries = []
+        for idx in members:
+            if idx == keep:
+                continue
+            other = foods[idx]
+            for alias in [other["name"].lower()] + list(other.get("aliases", [])):
+                if alias not in aliases:
+                    aliases.append(alias)
+            merged_ids.append(other["id"])
+            dropped.add(idx)
+            entries.append({
+                "id": other["id"],
+                "name": other["name"],
+                "source": other.get("source"),
+                "similarity": similarity.get((min(idx, keep), max(idx, keep))),
+            })
+        canonical["aliases"] = aliases
+        canonical["mergedIds"] = merged_ids
+        merged[keep] = canonical
+        report.append({
+            "canonical": {"id": canonical["id"], "name": canonical["name"], "source": canonical.get("source")},
+            "merged": entries,
+        })
+
+    result = [merged.get(idx, food) for idx, food in enumerate(foods) if idx not in dropped]
+    return result, report
+
+
+def write_merge_report(report: List[Dict[str, Any]], output_path: str) -> None:
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({"groups": len(report), "merges": report}, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    """Propose (and optionally apply) near-duplicate merges for a foodDatabase.json"""
+    import argparse
+
+    repo_root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Detect and merge near-duplicate foods")
+    parser.add_argument("--database", default=os.path.join(repo_root, "LOAF", "data", "foodDatabase.json"))
+    parser.add_argument("--report", default="mergeReport.json", help="where to write the proposed merge groups")
+    parser.add_argument("--output", default=None, help="write the merged catalog here (omit for a dry run)")
+    parser.add_argument("--threshold", type=float, default=SIMILARITY_THRESHOLD)
+    args = parser.parse_args()
+
+    with open(args.database, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+    container = database.get("foodDatabase", database)
+    foods = container.get("foods", [])
+
+    print(f"\n🧬 Looking for near-duplicates among {len(foods)} foods...")
+    merged, report = merge_near_duplicates(foods, args.threshold)
+    write_merge_report(report, args.report)
+    print(f"  ✅ {len(report)} merge groups, {len(foods) - len(merged)} foods folded into aliases")
+    print(f"  Report: {args.report}")
+
+    if args.output:
+        container["foods"] = merged
+        container["totalFoods"] = len(merged)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(database, f, ensure_ascii=False, indent=2)
+        print(f"  ✅ Merged catalog written to {args.output}")
+    return True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Stable, content-addressed food IDs
+IDs are derived from the source and the canonical food name, so they do
+not change when rows are reordered, added or removed elsewhere in a CSV
+"""
+
+import hashlib
+import re
+import unicodedata
+from typing import Dict, Set
+
+ID_PREFIX = "food_"
+ID_HASH_LENGTH = 12
+
+# Short, fixed keys so renaming a source label does not renumber the catalog
+SOURCE_KEYS = {
+    "IFCT2017": "ifct",
+    "Healthy Eating Dataset": "hed",
+    "RDA System": "rda",
+}
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+
+def canonical_name(name: str) -> str:
+    """Lowercase, accent-free, punctuation-free form of a food name"""
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_WORD_RE.sub(" ", text.lower()).strip()
+
+
+def source_key(source: str) -> str:
+    """Short key for a source label"""
+    return SOURCE_KEYS.get(source) or canonical_name(source).replace(" ", "-")
+
+
+def identity_key(source: str, name: str) -> str:
+    """The identity a stable ID is derived from"""
+    return f"{source_key(source)}:{canonical_name(name)}"
+
+
+def stable_food_id(source: str, name: str) -> str:
+    """Content-addressed ID for a food from a given source"""
+    digest = hashlib.sha1(identity_key(source, name).encode("utf-8")).hexdigest()
+    return f"{ID_PREFIX}{digest[:ID_HASH_LENGTH]}"
+
+
+class IdAllocator:
+    """Hands out stable IDs, suffixing the rare names that canonicalize to the same key"""
+
+    def __init__(self):
+        self.assigned: Set[str] = set()
+        self.collisions: Dict[str, int] = {}
+
+    def allocate(self, source: str, name: str) -> str:
+        food_id = stable_food_id(source, name)
+        if food_id not in self.assigned:
+            self.assigned.add(food_id)
+            return food_id
+
+        # Deterministic as long as colliding names keep their relative order
+        count = self.collisions.get(food_id, 1)
+        while f"{food_id}_{count + 1}" in self.assigned:
+            count += 1
+        self.collisions[food_id] = count + 1
+        suffixed = f"{food_id}_{count + 1}"
+        self.assigned.add(suffixed)
+        return suffixed
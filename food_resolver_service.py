@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Local food-resolution service for the AI chat and image flows
+Loads the generated catalog once and resolves batches of classifier labels
+("butter_naan") or free-text dishes ("i had two masala dosa") to food ids
+with a default portion, over a small asyncio HTTP server. Results are kept
+in an LRU cache, and concurrent requests for the same query within one
+event-loop tick share a single resolution. Nothing leaves the machine:
+the service binds to localhost and --bench drives it over loopback
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+
+from build_search_index import TIER_EXACT, build_search_index, lookup as search_index_lookup
+from phonetic_index import SPELLING_VARIANTS, build_phonetic_index, lookup as phonetic_lookup, phonetic_word
+from portion_table import PortionTable, build_portion_table
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(REPO_ROOT, "LOAF", "data", "foodDatabase.json")
+HOST = "127.0.0.1"
+PORT = 8765
+CACHE_SIZE = 10000
+MAX_BODY_BYTES = 1 << 20
+MAX_QUERIES = 1000
+DEFAULT_PORTION = "1_serving"
+# Sound-alike matches rank below every search-index tier
+PHONETIC_SCORE = 0.02
+# Longest sub-phrase tried when a whole phrase has no match
+MAX_PARTIAL_WORDS = 4
+# Search and phonetic hits checked for one that names the queried dish
+MATCH_CANDIDATES = 50
+
+_SEPARATOR_RE = re.compile(r"[_\-\s]+")
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+# Name segments: the main name and each bracketed alternative
+_SEGMENT_RE = re.compile(r"[()\[\];,]")
+# Words that make the following words a side ingredient ("Cornflakes with milk" is not milk)
+_CONNECTORS = {"with", "in", "and", "on", "of", "without", "aur", "ki", "ka", "ke"}
+# Leading words of spoken or typed phrases that never start a dish name
+_FILLER_WORDS = {"i", "had", "ate", "have", "a", "an", "and", "some", "of", "plate", "bowl", "glass", "cup",
+                 "one", "two", "three", "four", "five", "half", "double", "triple", "quarter", "1", "2", "3", "4", "5"}
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, classifier separators and punctuation to spaces, collapsed whitespace"""
+    return _SEPARATOR_RE.sub(" ", _PUNCTUATION_RE.sub(" ", (text or "").lower())).strip()
+
+
+def names_dish(text: str, words: List[str], key=lambda word: word) -> bool:
+    """
+    Whether a name or alias ends one of its segments with the query words
+    as whole words, not after a connector: "egg" names "Boiled egg (Ubla
+    anda)" but not "Egg nog" or "Egg sauce", and "milk" does not name
+    "Cornflakes with milk". key maps each word before comparing.
+    """
+    n = len(words)
+    for segment in _SEGMENT_RE.split(text):
+        alternatives = [normalize_query(part).split() for part in segment.split("/")]
+        phrases = [words_ for words_ in alternatives if words_]
+        # "Paneer shaslik/tikka": a single word after a slash replaces the last word before it
+        if alternatives[0]:
+            phrases += [alternatives[0][:-1] + alt for alt in alternatives[1:] if len(alt) == 1]
+        for raw in phrases:
+            if len(raw) < n or [key(w) for w in raw[-n:]] != words:
+                continue
+            if len(raw) == n or raw[-n - 1] not in _CONNECTORS:
+                return True
+    return False
+
+
+class FoodResolver:
+    """
+    Catalog indexes and the resolution order: exact name or alias, search
+    index, phonetic index, then the longest known name inside the phrase.
+    Search and phonetic hits count only when they name the queried dish;
+    otherwise the query resolves to no food rather than a wrong one.
+    """
+
+    def __init__(self, foods: List[Dict[str, Any]]):
+        self.foods = {food["id"]: food for food in foods}
+        self.exact: Dict[str, str] = {}
+        for food in foods:
+            for text in [food["name"]] + list(food.get("aliases") or []):
+                self.exact.setdefault(normalize_query(text), food["id"])
+        self.search_index = build_search_index(foods)
+        self.phonetic_index = build_phonetic_index(foods)
+        self.portions = PortionTable(build_portion_table(foods))
+        # Phonetic key of every spelling in a variant group -> one key for the group
+        self.sound_keys: Dict[str, str] = {}
+        for group in SPELLING_VARIANTS:
+            keys = sorted({phonetic_word(w) for w in group})
+            self.sound_keys.update((k, keys[0]) for k in keys)
+
+    def _sound(self, word: str) -> str:
+        key = phonetic_word(word)
+        return self.sound_keys.get(key, key)
+
+    def _names_dish(self, food_id: str, words: List[str], key=lambda word: word) -> bool:
+        food = self.foods[food_id]
+        return any(names_dish(text, words, key) for text in [food["name"]] + list(food.get("aliases") or []))
+
+    def _match(self, q: str) -> Optional[Tuple[str, str, float]]:
+        """(food id, match kind, score) for one normalized phrase"""
+        food_id = self.exact.get(q)
+        if food_id:
+            return food_id, "exact", 1.0
+        words = q.split(" ")
+        for food_id, tier in search_index_lookup(self.search_index, q, MATCH_CANDIDATES):
+            if tier >= TIER_EXACT or self._names_dish(food_id, words):
+                return food_id, "search", round(tier / TIER_EXACT, 3)
+        sounds = [self._sound(w) for w in words]
+        for food_id in phonetic_lookup(self.phonetic_index, q, MATCH_CANDIDATES):
+            if self._names_dish(food_id, sounds, self._sound):
+                return food_id, "phonetic", PHONETIC_SCORE
+        return None
+
+    def resolve(self, q: str) -> Dict[str, Any]:
+        """Best food for a normalized query, trying the phrase without leading filler words next"""
+        words = q.split(" ")
+        candidates = [q]
+        start = 0
+        while start < len(words) - 1 and words[start] in _FILLER_WORDS:
+            start += 1
+            candidates.append(" ".join(words[start:]))
+        for phrase in candidates:
+            match = self._match(phrase) if phrase else None
+            if match:
+                return self.describe(*match)
+        # "butter naan" -> "naan": the longest run of words that is exactly a known name,
+        # rightmost first since the dish noun usually comes last
+        words = words[start:]
+        for size in range(min(len(words) - 1, MAX_PARTIAL_WORDS), 0, -1):
+            for i in range(len(words) - size, -1, -1):
+                food_id = self.exact.get(" ".join(words[i:i + size]))
+                if food_id:
+                    return self.describe(food_id, "partial", round(size / len(words), 3))
+        return {"foodId": None}
+
+    def describe(self, food_id: str, kind: str, score: float) -> Dict[str, Any]:
+        """Response entry for a match, with the default portion and its nutrients"""
+        food = self.foods[food_id]
+        portions = self.portions.portions(food_id)
+        default = portions[0] if portions else (None, 0)
+        label, grams = next(((l, g) for l, g in portions if l == DEFAULT_PORTION), default)
+        nutrition = self.portions.portion_nutrition(food_id, label) if label else None
+        return {
+            "foodId": food_id,
+            "name": food["name"],
+            "match": kind,
+            "score": score,
+            "portion": {"label": label, "grams": round(grams, 1)} if label else None,
+            "nutrition": {k: round(v, 2) for k, v in nutrition.items()} if nutrition else None,
+        }
+
+
+class ResolverService:
+    """LRU cache and request coalescing in front of a FoodResolver"""
+
+    def __init__(self, resolver: FoodResolver, cache_size: int = CACHE_SIZE):
+        self.resolver = resolver
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.pending: Dict[str, asyncio.Future] = {}
+        self._drain_scheduled = False
+        self.stats = {"requests": 0, "lookups": 0, "hits": 0, "misses": 0, "coalesced": 0}
+
+    def _cached(self, key: str) -> Optional[Dict[str, Any]]:
+        result = self.cache.get(key)
+        if result is not None:
+            self.cache.move_to_end(key)
+        return result
+
+    def _store(self, key: str, result: Dict[str, Any]) -> None:
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def _drain(self) -> None:
+        """Resolve every query queued during the last loop tick, once each"""
+        self._drain_scheduled = False
+        pending, self.pending = self.pending, {}
+        for key, future in pending.items():
+            try:
+                result = self.resolver.resolve(key)
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            self._store(key, result)
+            future.set_result(result)
+
+    def _lookup(self, key: str) -> "asyncio.Future":
+        future = self.pending.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return future
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self.pending[key] = future
+        if not self._drain_scheduled:
+            self._drain_scheduled = True
+            asyncio.get_running_loop().call_soon(self._drain)
+        return future
+
+    async def resolve_batch(self, queries: List[str]) -> List[Dict[str, Any]]:
+        """Resolve a batch of labels or phrases, in order"""
+        self.stats["requests"] += 1
+        self.stats["lookups"] += len(queries)
+        keys = [normalize_query(q) for q in queries]
+        results: List[Any] = []
+        waiting = []
+        for i, key in enumerate(keys):
+            cached = self._cached(key) if key else {"foodId": None}
+            if cached is not None:
+                self.stats["hits"] += bool(key)
+                results.append(cached)
+            else:
+                results.append(None)
+                waiting.append((i, self._lookup(key)))
+        for i, future in waiting:
+            results[i] = await future
+        return [{"query": query, **result} for query, result in zip(queries, results)]
+
+    def health(self) -> Dict[str, Any]:
+        return {"status": "ok", "foods": len(self.resolver.foods), "cacheSize": len(self.cache), **self.stats}
+
+
+# --- HTTP -------------------------------------------------------------------
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+def _response(status: int, payload: Dict[str, Any], keep_alive: bool) -> bytes:
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("ascii") + body
+
+
+async def _handle(service: ResolverService, method: str, path: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+    if path == "/health":
+        return (200, service.health()) if method == "GET" else (405, {"error": "use GET"})
+    if path != "/resolve":
+        return 404, {"error": f"no route {path}"}
+    if method != "POST":
+        return 405, {"error": "use POST"}
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        return 400, {"error": "body is not JSON"}
+    queries = payload.get("queries") if isinstance(payload, dict) else None
+    if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+        return 400, {"error": 'expected {"queries": ["label or phrase", ...]}'}
+    if len(queries) > MAX_QUERIES:
+        return 413, {"error": f"at most {MAX_QUERIES} queries per request"}
+    return 200, {"results": await service.resolve_batch(queries)}
+
+
+async def serve_connection(service: ResolverService, reader: asyncio.StreamReader,
+                           writer: asyncio.StreamWriter) -> None:
+    """HTTP/1.1 with keep-alive: one JSON request/response at a time"""
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                return
+            lines = head.decode("latin-1").split("\r\n")
+            try:
+                method, path, version = lines[0].split(" ", 2)
+            except ValueError:
+                writer.write(_response(400, {"error": "malformed request line"}, False))
+                return
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                if name:
+                    headers[name.strip().lower()] = value.strip()
+            keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+            try:
+                length = int(headers.get("content-length") or 0)
+            except ValueError:
+                writer.write(_response(400, {"error": "bad Content-Length"}, False))
+                return
+            if length > MAX_BODY_BYTES:
+                writer.write(_response(413, {"error": "body too large"}, False))
+                return
+            body = await reader.readexactly(length) if length else b""
+            status, payload = await _handle(service, method, path.split("?", 1)[0], body)
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                return
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_service(service: ResolverService, host: str = HOST, port: int = PORT) -> asyncio.AbstractServer:
+    return await asyncio.start_server(lambda r, w: serve_connection(service, r, w), host, port)
+
+
+# --- Offline load test ------------------------------------------------------
+
+async def _client(host: str, port: int, batches: List[List[str]]) -> int:
+    reader, writer = await asyncio.open_connection(host, port)
+    resolved = 0
+    try:
+        for batch in batches:
+            body = json.dumps({"queries": batch}).encode("utf-8")
+            writer.write(f"POST /resolve HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body)
+            await writer.drain()
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(re.search(rb"Content-Length: (\d+)", head).group(1))
+            results = json.loads(await reader.readexactly(length))["results"]
+            resolved += sum(1 for r in results if r["foodId"])
+    finally:
+        writer.close()
+    return resolved
+
+
+async def bench(service: ResolverService, foods: List[Dict[str, Any]], lookups: int, clients: int,
+                batch_size: int, seed: int = 1) -> Dict[str, Any]:
+    """
+    Drive the service over loopback with a skewed mix of catalog names,
+    classifier-style labels and spoken phrases; returns throughput and
+    cache statistics
+    """
+    rng = random.Random(seed)
+    names = [food["name"] for food in foods]
+    # A few hundred hot dishes make up most traffic, like real logging
+    hot = rng.sample(names, min(300, len(names)))
+    makers = [lambda n: n, lambda n: n.lower().replace(" ", "_"), lambda n: f"i had two {n.lower()}"]
+    queries = [rng.choice(makers)(rng.choice(hot) if rng.random() < 0.8 else rng.choice(names))
+               for _ in range(lookups)]
+    batches = [queries[i:i + batch_size] for i in range(0, len(queries), batch_size)]
+
+    server = await start_service(service, HOST, 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        start = time.perf_counter()
+        resolved = await asyncio.gather(*(_client(HOST, port, batches[c::clients]) for c in range(clients)))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.close()
+        await server.wait_closed()
+    return {"lookups": lookups, "seconds": round(elapsed, 3), "lookupsPerSecond": round(lookups / elapsed),
+            "resolved": sum(resolved), **service.health()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve food-id resolution for labels and phrases on localhost")
+    parser.add_argument("--database", default=DB_PATH)
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE)
+    parser.add_argument("--bench", type=int, default=0, metavar="N",
+                        help="instead of serving, run N lookups against the service over loopback and report")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent connections for --bench")
+    parser.add_argument("--batch", type=int, default=8, help="queries per request for --bench")
+    args = parser.parse_args()
+
+    with open(args.database, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+    foods = database.get("foods") or database.get("foodDatabase", {}).get("foods", [])
+
+    start = time.perf_counter()
+    service = ResolverService(FoodResolver(foods), args.cache_size)
+    print(f"\n🍛 Loaded {len(foods)} foods in {time.perf_counter() - start:.2f}s")
+
+    if args.bench:
+        report = asyncio.run(bench(service, foods, args.bench, max(1, args.clients), max(1, args.batch)))
+        print(f"  ✅ {report['lookups']} lookups in {report['seconds']}s "
+              f"({report['lookupsPerSecond']:,} lookups/s), {report['resolved']} resolved")
+        print(f"  Cache: {report['hits']} hits, {report['misses']} misses, {report['coalesced']} coalesced")
+        return True
+
+    async def serve():
+        server = await start_service(service, args.host, args.port)
+        print(f"  🌐 Listening on http://{args.host}:{args.port} (POST /resolve, GET /health)")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print("\n  Stopped")
+    return True
+
+
+if __name__ == "__main__":
+    main()
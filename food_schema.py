@@ -0,0 +1,183 @@
+"""
+Canonical nutrition schema for the LOAF food catalog
+Every producer's nutrition block is normalized to one flat, unit-normalized
+shape (the Food interface in loadFoodData.ts: plain numbers, "carbs",
+"vitaminD_ug"), with units declared once per catalog. The catalog validator
+is generated from the schema and compiled once, then checks every food in a
+single pass and fails fast on the first bad row.
+"""
+
+import math
+from typing import Dict, List, Any, Callable, Iterable, Iterator, Optional, Tuple
+
+SCHEMA_VERSION = 1
+
+# (key, unit, required, upper bound, source keys). Nutrition is per 100 g (per-meal
+# sources are converted on ingest). Only the macros every source measures are required;
+# the others are left out when unknown, never written as 0. Bounds only reject values
+# no row could mean; data_quality flags the implausible ones.
+CANONICAL_NUTRIENTS: List[Tuple[str, str, bool, float, List[str]]] = [
+    ("calories", "kcal", True, 5000.0, ["calories", "energy"]),
+    ("protein", "g", True, 1000.0, ["protein"]),
+    ("carbs", "g", True, 1000.0, ["carbs", "carbohydrates"]),
+    ("fat", "g", True, 1000.0, ["fat", "fats"]),
+    ("fiber", "g", False, 1000.0, ["fiber", "fibre"]),
+    ("iron", "mg", False, 10000.0, ["iron"]),
+    ("calcium", "mg", False, 100000.0, ["calcium"]),
+    ("vitaminD_ug", "µg", False, 100000.0, ["vitaminD_ug", "vitaminD"]),
+    ("sugar", "g", False, 1000.0, ["sugar"]),
+    ("sodium", "mg", False, 100000.0, ["sodium"]),
+    ("vitaminC", "mg", False, 100000.0, ["vitaminC"]),
+    ("folate", "µg", False, 100000.0, ["folate"]),
+]
+NUTRITION_UNITS: Dict[str, str] = {key: unit for key, unit, _required, _bound, _sources in CANONICAL_NUTRIENTS}
+REQUIRED_NUTRIENTS = {key for key, _unit, required, _bound, _sources in CANONICAL_NUTRIENTS if required}
+ROUND_DIGITS = 4
+
+_SOURCE_KEYS = {source: key for key, _unit, _required, _bound, sources in CANONICAL_NUTRIENTS for source in sources}
+_UNIT_ALIASES = {"ug": "µg", "mcg": "µg", "μg": "µg", "cal": "kcal"}
+# Factor to multiply a value in the first unit by to express it in the second
+_UNIT_FACTORS = {
+    ("g", "mg"): 1000.0, ("mg", "g"): 0.001,
+    ("mg", "µg"): 1000.0, ("µg", "mg"): 0.001,
+    ("g", "µg"): 1000000.0, ("µg", "g"): 0.000001,
+    ("kj", "kcal"): 1 / 4.184,
+}
+
+
+class CatalogValidationError(ValueError):
+    """A food that does not match the canonical schema"""
+
+    def __init__(self, index: Optional[int], food_id: Any, field: str, value: Any, problem: str):
+        self.index = index
+        self.food_id = food_id
+        self.field = field
+        self.value = value
+        where = f"Food #{index} ({food_id!r})" if index is not None else f"Food {food_id!r}"
+        super().__init__(f"{where}: {field} {problem} (got {value!r})")
+
+
+def _convert(value: float, unit: Optional[str], target: str) -> Optional[float]:
+    """value in target units, or None when the unit is not one we can convert from"""
+    if not unit:
+        return value
+    unit = unit.strip().lower()
+    unit = _UNIT_ALIASES.get(unit, unit)
+    if unit == target.lower():
+        return value
+    factor = _UNIT_FACTORS.get((unit, target))
+    return value * factor if factor is not None else None
+
+
+def normalize_nutrition(nutrition: Dict[str, Any], index: Optional[int] = None, food_id: Any = None) -> Dict[str, Any]:
+    """
+    Canonical nutrition from either producer shape: flat numbers, or
+    {value, unit} objects keyed "carbohydrates" etc. Missing nutrients stay
+    missing (validation reports a missing required one); unknown keys are
+    kept so validation reports them. A unit that cannot be converted raises
+    CatalogValidationError.
+    """
+    values: Dict[str, Any] = {}
+    extras: Dict[str, Any] = {}
+    for source_key, raw in nutrition.items():
+        key = _SOURCE_KEYS.get(source_key)
+        if key is None:
+            extras[source_key] = raw
+            continue
+        unit = None
+        if isinstance(raw, dict):
+            raw, unit = raw.get("value"), raw.get("unit")
+        if isinstance(raw, (int, float)) and not isinstance(raw, bool):
+            converted = _convert(float(raw), unit, NUTRITION_UNITS[key])
+            if converted is None:
+                raise CatalogValidationError(index, food_id, f"nutrition.{source_key}", unit,
+                                             f"has a unit that cannot be converted to {NUTRITION_UNITS[key]}")
+            raw = round(converted, ROUND_DIGITS)
+        # The canonical key wins over an alias when both are present
+        if key not in values or source_key == key:
+            values[key] = raw
+
+    canonical = {key: values[key] for key, *_rest in CANONICAL_NUTRIENTS if key in values}
+    canonical.update(extras)
+    return canonical
+
+
+def normalize_food(food: Dict[str, Any], index: Optional[int] = None) -> Dict[str, Any]:
+    """Normalize one food's nutrition in place; returns the food"""
+    food["nutrition"] = normalize_nutrition(food.get("nutrition") or {}, index, food.get("id"))
+    return food
+
+
+def _validator_source(nutrients: List[Tuple[str, str, bool, float, List[str]]]) -> str:
+    """Python source of a per-food check with every schema rule inlined"""
+    allowed = sorted(key for key, *_rest in nutrients)
+    lines = [
+        "def check(i, food, seen):",
+        "    food_id = food.get('id')",
+        "    if food_id.__class__ is not str or not food_id:",
+        "        fail(i, food_id, 'id', food_id, 'must be a non-empty string')",
+        "    if food_id in seen:",
+        "        fail(i, food_id, 'id', food_id, 'is not unique')",
+        "    seen.add(food_id)",
+        "    name = food.get('name')",
+        "    if name.__class__ is not str or not name.strip():",
+        "        fail(i, food_id, 'name', name, 'must be a non-empty string')",
+        "    aliases = food.get('aliases', [])",
+        "    if aliases.__class__ is not list or any(a.__class__ is not str for a in aliases):",
+        "        fail(i, food_id, 'aliases', aliases, 'must be a list of strings')",
+        "    hints = food.get('portionHints')",
+        "    if hints.__class__ is not dict or not hints:",
+        "        fail(i, food_id, 'portionHints', hints, 'must be a non-empty object')",
+        "    for label, grams in hints.items():",
+        "        if grams.__class__ not in NUMBER or not 0.0 < grams < inf:",
+        "            fail(i, food_id, 'portionHints.' + label, grams, 'must be a positive number of grams')",
+        "    confidence = food.get('confidence')",
+        "    if confidence.__class__ not in NUMBER or not 0.0 <= confidence <= 1.0:",
+        "        fail(i, food_id, 'confidence', confidence, 'must be between 0 and 1')",
+        "    n = food.get('nutrition')",
+        "    if n.__class__ is not dict:",
+        "        fail(i, food_id, 'nutrition', n, 'must be an object')",
+        f"    if not n.keys() <= {set(allowed)!r}:",
+        f"        fail(i, food_id, 'nutrition', sorted(set(n) - {set(allowed)!r}), 'has unknown nutrients')",
+    ]
+    for key, unit, required, bound, _sources in nutrients:
+        lines.append(f"    v = n.get({key!r})")
+        check = f"v.__class__ not in NUMBER or not 0.0 <= v <= {bound!r}"
+        if not required:
+            check = f"v is not None and ({check})"
+        lines.append(f"    if {check}:")
+        lines.append(f"        fail(i, food_id, {'nutrition.' + key!r}, v, "
+                     f"{f'must be a number from 0 to {bound:g} {unit}'!r})")
+    return "\n".join(lines) + "\n"
+
+
+def _fail(index: int, food_id: Any, field: str, value: Any, problem: str) -> None:
+    raise CatalogValidationError(index, food_id, field, value, problem)
+
+
+def compile_validator(nutrients: List[Tuple[str, str, bool, float, List[str]]] = CANONICAL_NUTRIENTS
+                      ) -> Callable[[int, Dict[str, Any], set], None]:
+    """Generate and compile the per-food check for a schema (done once per schema)"""
+    namespace = {"fail": _fail, "NUMBER": (int, float), "inf": math.inf}
+    exec(compile(_validator_source(nutrients), "<food_schema validator>", "exec"), namespace)
+    return namespace["check"]
+
+
+_CHECK = compile_validator()
+
+
+def validate_catalog(foods: Iterable[Dict[str, Any]]) -> int:
+    """Check every food in one pass; raises CatalogValidationError on the first bad row, else returns the count"""
+    seen: set = set()
+    count = 0
+    for count, food in enumerate(foods, 1):
+        _CHECK(count - 1, food, seen)
+    return count
+
+
+def validated(foods: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Streaming form of validate_catalog: yields each food after it passes"""
+    seen: set = set()
+    for i, food in enumerate(foods):
+        _CHECK(i, food, seen)
+        yield food
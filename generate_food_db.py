@@ -4,31 +4,58 @@ Quick food database generator from CSV files
 Creates foodDatabase.json for use in the LOAF app
 """
 
-import csv
+import argparse
 import json
 import os
-from typing import Dict, List, Any
+from collections import Counter
+from typing import Dict, List, Any, Optional
+
+from ai_context_digests import build_ai_context, write_ai_context
+from ai_context_digests import rules_fingerprint as ai_context_rules
+from binary_catalog import FORMAT_VERSION, NUTRIENTS, build_binary_catalog, write_binary_catalog
+from build_cache import CACHE_DIR_NAME, BuildCache, bytes_digest, cached, file_digest, rules_digest, write_if_changed
+from build_search_index import build_search_index, normalize_text, write_search_index
+from build_search_index import rules_fingerprint as search_index_rules
+from build_sqlite_catalog import write_sqlite_catalog
+from build_sqlite_catalog import rules_fingerprint as sqlite_rules
+from build_bundles import write_bundles
+from build_bundles import rules_fingerprint as bundle_rules
+from catalog_diff import apply_patch, catalog_foods, diff_catalogs, write_patch
+from data_quality import quality_pass, write_quality_report
+from dedupe_foods import merge_near_duplicates, write_merge_report
+from food_ids import IdAllocator
+from food_schema import (NUTRITION_UNITS, REQUIRED_NUTRIENTS, SCHEMA_VERSION, CatalogValidationError, normalize_food,
+                         validate_catalog)
+from goal_rankings import GOALS_PATH, RDA_PATH, build_goal_rankings, diet_tagger, load_json, write_goal_rankings
+from goal_rankings import rules_fingerprint as ranking_rules
+from meal_planner import (CATEGORY_SLOTS, MEAL_SLOTS, PLAN_NUTRIENTS, TOLERANCE, MealPlanner, build_plan_library,
+                          meal_category, write_plan_library)
+from nutrient_matrix import row_dicts
+from parallel_ingest import map_chunks
+from phonetic_index import build_phonetic_index, phonetic_key, phonetic_word, rules_signature, write_phonetic_index
+from pipeline_metrics import PipelineMetrics, StageMetrics, add_metrics_arguments, metrics_from_args, rejection_reason
+from portion_table import TABLE_NUTRIENTS, build_portion_table, normalize_food_portions, write_portion_table
+from similarity_index import b64_array, build_similarity_index, food_document, write_similarity_index
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(REPO_ROOT, "Data")
+OUTPUT_PATH = os.path.join(REPO_ROOT, "LOAF", "data", "foodDatabase.json")
+CACHE_DIR = os.path.join(REPO_ROOT, CACHE_DIR_NAME)
 
 def parse_nutrition_from_ifct(row: Dict[str, Any]) -> Dict[str, Any]:
     """Parse nutrition data from IFCT2017 CSV"""
-    nutrition = {
-        "calories": 0.0,
-        "protein": 0.0,
-        "carbs": 0.0,
-        "fat": 0.0,
-        "fiber": 0.0
-    }
+    nutrition = {}
     try:
         if "Calories (kcal)" in row and row["Calories (kcal)"]:
             nutrition["calories"] = round(float(row["Calories (kcal)"]), 1)
-        if "Proteins" in row and row["Proteins"]:
-            nutrition["protein"] = round(float(row["Proteins"]), 1)
-        if "Carbohydrates" in row and row["Carbohydrates"]:
-            nutrition["carbs"] = round(float(row["Carbohydrates"]), 1)
-        if "Fats" in row and row["Fats"]:
-            nutrition["fat"] = round(float(row["Fats"]), 1)
-        if "Fibre" in row and row["Fibre"]:
-            nutrition["fiber"] = round(float(row["Fibre"]), 1)
+        if "Protein (g)" in row and row["Protein (g)"]:
+            nutrition["protein"] = round(float(row["Protein (g)"]), 1)
+        if "Carbohydrates (g)" in row and row["Carbohydrates (g)"]:
+            nutrition["carbs"] = round(float(row["Carbohydrates (g)"]), 1)
+        if "Fats (g)" in row and row["Fats (g)"]:
+            nutrition["fat"] = round(float(row["Fats (g)"]), 1)
+        if "Fibre (g)" in row and row["Fibre (g)"]:
+            nutrition["fiber"] = round(float(row["Fibre (g)"]), 1)
         if "Iron (mg)" in row and row["Iron (mg)"]:
             nutrition["iron"] = round(float(row["Iron (mg)"]), 2)
         if "Calcium (mg)" in row and row["Calcium (mg)"]:
@@ -38,169 +65,261 @@ def parse_nutrition_from_ifct(row: Dict[str, Any]) -> Dict[str, Any]:
     return nutrition
 
 def parse_nutrition_from_healthy(row: Dict[str, Any]) -> Dict[str, Any]:
-    """Parse nutrition data from Healthy Eating Dataset CSV"""
-    nutrition = {
-        "calories": 0.0,
-        "protein": 0.0,
-        "carbs": 0.0,
-        "fat": 0.0,
-        "fiber": 0.0
-    }
+    """Parse nutrition data from Healthy Eating Dataset CSV, converted from per meal to per 100 g"""
+    # Values describe one meal of serving_size_g grams; a row without it has no known basis
+    grams = float(row["serving_size_g"])
+    if not grams > 0:
+        raise ValueError(f"serving_size_g must be positive (got {grams})")
+    nutrition = {}
     try:
         if "calories" in row and row["calories"]:
-            nutrition["calories"] = round(float(row["calories"]), 1)
+            nutrition["calories"] = round(float(row["calories"]) * 100 / grams, 1)
         if "protein_g" in row and row["protein_g"]:
-            nutrition["protein"] = round(float(row["protein_g"]), 1)
+            nutrition["protein"] = round(float(row["protein_g"]) * 100 / grams, 1)
         if "carbs_g" in row and row["carbs_g"]:
-            nutrition["carbs"] = round(float(row["carbs_g"]), 1)
+            nutrition["carbs"] = round(float(row["carbs_g"]) * 100 / grams, 1)
         if "fat_g" in row and row["fat_g"]:
-            nutrition["fat"] = round(float(row["fat_g"]), 1)
+            nutrition["fat"] = round(float(row["fat_g"]) * 100 / grams, 1)
         if "fiber_g" in row and row["fiber_g"]:
-            nutrition["fiber"] = round(float(row["fiber_g"]), 1)
+            nutrition["fiber"] = round(float(row["fiber_g"]) * 100 / grams, 1)
     except (ValueError, TypeError):
         pass
     return nutrition
 
-def load_foods_from_ifct(csv_path: str) -> List[Dict[str, Any]]:
+def ifct_row_name(row: Dict[str, Any]) -> Optional[str]:
+    """Food name of an IFCT2017 row"""
+    return row.get("Dish Name")
+
+def healthy_row_name(row: Dict[str, Any]) -> Optional[str]:
+    """Food name of a Healthy Eating Dataset row (first non-empty name column)"""
+    food_names = [
+        row.get("meal_name"),
+        row.get("Food_items"),
+        row.get("food_name")
+    ]
+    return next((n for n in food_names if n), None)
+
+def parse_named_rows(header: List[str], rows: List[List[str]], name_fn, parse_fn) -> List[List[Any]]:
+    """[name, nutrition] for every row of a chunk, or [None, reason] for a row that cannot be used"""
+    parsed = []
+    for row in row_dicts(header, rows):
+        try:
+            name = name_fn(row)
+            if not name:
+                parsed.append([None, "missing_name"])
+                continue
+            parsed.append([name.strip(), parse_fn(row)])
+        except Exception as e:
+            parsed.append([None, rejection_reason(e)])
+    return parsed
+
+def first_occurrences(chunks: List[List[List[Any]]]) -> Dict[str, Any]:
+    """Keep the first occurrence of each name across chunks (in file order); count the rest as rejected"""
+    rows = []
+    rejected = {}
+    processed_names = set()
+    for chunk in chunks:
+        for name, value in chunk:
+            if name is None:
+                rejected[value] = rejected.get(value, 0) + 1
+                continue
+            if name.lower() in processed_names:
+                rejected["duplicate_name"] = rejected.get("duplicate_name", 0) + 1
+                continue
+            processed_names.add(name.lower())
+            rows.append([name, value])
+    return {"rows": rows, "rejected": rejected}
+
+def read_ifct_rows(csv_path: str, workers: int = 1) -> Dict[str, Any]:
+    """
+    Read and parse IFCT2017.csv into [name, nutrition] rows (first occurrence
+    of each name), plus the number of rows dropped per reason
+    """
+    chunks = map_chunks(csv_path, parse_named_rows, (ifct_row_name, parse_nutrition_from_ifct), workers)
+    return first_occurrences(chunks)
+
+def load_foods_from_ifct(csv_path: str, cache: Optional[BuildCache] = None,
+                        ids: Optional[IdAllocator] = None,
+                        stage: Optional[StageMetrics] = None, workers: int = 1) -> List[Dict[str, Any]]:
     """Load foods from IFCT2017.csv"""
     foods = []
     counter = 0
-    processed_names = set()
+    ids = ids or IdAllocator()
+    stage = stage or StageMetrics("load-ifct")
     
     try:
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                try:
-                    if "Dish Name" not in row or not row["Dish Name"]:
-                        continue
-                    
-                    dish_name = row["Dish Name"].strip()
-                    if dish_name.lower() in processed_names:
-                        continue
-                    
-                    processed_names.add(dish_name.lower())
-                    
-                    nutrition = parse_nutrition_from_ifct(row)
-                    
-                    # Skip if no calories
-                    if "calories" not in nutrition:
-                        continue
-                    
-                    food = {
-                        "id": f"food_{counter:04d}",
-                        "name": dish_name,
-                        "category": "Indian Food",
-                        "aliases": [dish_name.lower()],
-                        "portionHints": {
-                            "1x": 1.0,
-                            "0.5x": 0.5,
-                            "2x": 2.0
-                        },
-                        "nutrition": nutrition,
-                        "confidence": 0.95,
-                        "source": "IFCT2017",
-                        "lastVerified": "2026-01-15"
-                    }
-                    
-                    foods.append(food)
-                    counter += 1
-                    
-                    if counter % 200 == 0:
-                        print(f"  ✓ Processed {counter} foods from IFCT...")
-                
-                except Exception as e:
-                    continue
+        key = file_digest(csv_path) + rules_digest(parse_nutrition_from_ifct, ifct_row_name, parse_named_rows,
+                                                   first_occurrences, read_ifct_rows, row_dicts)
+        parsed = cached(cache, "ifct", key, lambda: read_ifct_rows(csv_path, workers))
+        rows = parsed["rows"]
+        stage.rows_in += len(rows) + sum(parsed["rejected"].values())
+        stage.reject_all(parsed["rejected"])
+        
+        for dish_name, nutrition in rows:
+            # Skip rows without the macros every food must state
+            if not REQUIRED_NUTRIENTS <= nutrition.keys():
+                stage.reject("missing_macros")
+                continue
+            
+            food = {
+                "id": ids.allocate("IFCT2017", dish_name),
+                "name": dish_name,
+                "category": "Indian Food",
+                "aliases": [dish_name.lower()],
+                "portionHints": {
+                    "1x": 1.0,
+                    "0.5x": 0.5,
+                    "2x": 2.0
+                },
+                "nutrition": nutrition,
+                "confidence": 0.95,
+                "source": "IFCT2017",
+                "lastVerified": "2026-01-15"
+            }
+            
+            foods.append(food)
+            counter += 1
+            
+            if counter % 200 == 0:
+                print(f"  ✓ Processed {counter} foods from IFCT...")
         
         print(f"  ✅ Loaded {len(foods)} foods from IFCT2017")
     except Exception as e:
+        stage.reject(rejection_reason(e) + ":file")
         print(f"  ❌ Error reading IFCT file: {e}")
     
+    stage.rows_out += len(foods)
     return foods
 
-def load_foods_from_healthy(csv_path: str, existing_names: set) -> List[Dict[str, Any]]:
+def read_healthy_rows(csv_path: str, workers: int = 1) -> Dict[str, Any]:
+    """
+    Read and parse healthy_eating_dataset.csv into [name, nutrition] rows
+    (first occurrence of each name), plus the number of rows dropped per reason
+    """
+    chunks = map_chunks(csv_path, parse_named_rows, (healthy_row_name, parse_nutrition_from_healthy), workers)
+    return first_occurrences(chunks)
+
+def load_foods_from_healthy(csv_path: str, existing_names: set, cache: Optional[BuildCache] = None,
+                            ids: Optional[IdAllocator] = None,
+                            stage: Optional[StageMetrics] = None, workers: int = 1) -> List[Dict[str, Any]]:
     """Load foods from healthy_eating_dataset.csv"""
     foods = []
     counter = 0
+    ids = ids or IdAllocator()
+    stage = stage or StageMetrics("load-healthy")
     
     try:
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                try:
-                    food_names = [
-                        row.get("meal_name"),
-                        row.get("Food_items"),
-                        row.get("food_name")
-                    ]
-                    
-                    food_name = next((n for n in food_names if n), None)
-                    if not food_name:
-                        continue
-                    
-                    food_name = food_name.strip()
-                    if food_name.lower() in existing_names:
-                        continue
-                    
-                    existing_names.add(food_name.lower())
-                    
-                    nutrition = parse_nutrition_from_healthy(row)
-                    
-                    # Skip if no calories
-                    if "calories" not in nutrition:
-                        continue
-                    
-                    food = {
-                        "id": f"food_{4000 + counter:04d}",
-                        "name": food_name,
-                        "category": "Healthy",
-                        "aliases": [food_name.lower()],
-                        "portionHints": {
-                            "1x": 1.0,
-                            "0.5x": 0.5,
-                            "2x": 2.0
-                        },
-                        "nutrition": nutrition,
-                        "confidence": 0.88,
-                        "source": "Healthy Eating Dataset",
-                        "lastVerified": "2026-01-15"
-                    }
-                    
-                    foods.append(food)
-                    counter += 1
-                    
-                    if counter % 200 == 0:
-                        print(f"  ✓ Processed {counter} additional foods...")
-                
-                except Exception as e:
-                    continue
+        key = file_digest(csv_path) + rules_digest(parse_nutrition_from_healthy, healthy_row_name, parse_named_rows,
+                                                   first_occurrences, read_healthy_rows, row_dicts)
+        parsed = cached(cache, "healthy", key, lambda: read_healthy_rows(csv_path, workers))
+        rows = parsed["rows"]
+        stage.rows_in += len(rows) + sum(parsed["rejected"].values())
+        stage.reject_all(parsed["rejected"])
+        
+        for food_name, nutrition in rows:
+            if food_name.lower() in existing_names:
+                stage.reject("duplicate_across_sources")
+                continue
+            
+            existing_names.add(food_name.lower())
+            
+            # Skip rows without the macros every food must state
+            if not REQUIRED_NUTRIENTS <= nutrition.keys():
+                stage.reject("missing_macros")
+                continue
+            
+            food = {
+                "id": ids.allocate("Healthy Eating Dataset", food_name),
+                "name": food_name,
+                "category": "Healthy",
+                "aliases": [food_name.lower()],
+                "portionHints": {
+                    "1x": 1.0,
+                    "0.5x": 0.5,
+                    "2x": 2.0
+                },
+                "nutrition": nutrition,
+                "confidence": 0.88,
+                "source": "Healthy Eating Dataset",
+                "lastVerified": "2026-01-15"
+            }
+            
+            foods.append(food)
+            counter += 1
+            
+            if counter % 200 == 0:
+                print(f"  ✓ Processed {counter} additional foods...")
         
         print(f"  ✅ Loaded {len(foods)} additional foods from Healthy Eating Dataset")
     except Exception as e:
+        stage.reject(rejection_reason(e) + ":file")
         print(f"  ❌ Error reading Healthy Eating file: {e}")
     
+    stage.rows_out += len(foods)
     return foods
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line options for the generator"""
+    parser = argparse.ArgumentParser(description="Generate foodDatabase.json and its derived artifacts")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="directory containing the source CSVs")
+    parser.add_argument("--output", default=OUTPUT_PATH, help="path of the foodDatabase.json to write")
+    parser.add_argument("--sqlite", metavar="PATH", default=None,
+                        help="also write a prebuilt SQLite catalog (with FTS5) to PATH")
+    parser.add_argument("--bundle-dir", metavar="DIR", default=None,
+                        help="also write sharded, precompressed bundles and a manifest to DIR")
+    parser.add_argument("--shard-by", choices=["category", "source"], default="category",
+                        help="how bundles are split (default: category)")
+    parser.add_argument("--merge-duplicates", action="store_true",
+                        help="fold near-duplicate foods into the aliases of a canonical record")
+    parser.add_argument("--merge-report", metavar="PATH", default=None,
+                        help="write the proposed near-duplicate merge groups to PATH")
+    parser.add_argument("--patch", metavar="PATH", default=None,
+                        help="write an added/changed/removed patch against the previous output to PATH")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="incremental build cache location")
+    parser.add_argument("--no-cache", action="store_true", help="re-derive every source and rewrite every output")
+    parser.add_argument("--quality-check", action="store_true",
+                        help="quarantine foods with impossible values and down-weight inconsistent or outlying ones")
+    parser.add_argument("--quality-report", metavar="PATH", default=None,
+                        help="write the data-quality findings to PATH")
+    parser.add_argument("--meal-plans", type=int, default=0, metavar="N",
+                        help="also precompute N meal plans per RDA profile and diet into foodPlanLibrary.json")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="parse large sources in this many processes (0 = one per core, default: 1)")
+    add_metrics_arguments(parser)
+    return parser.parse_args(argv)
 
-def main():
+def main(argv=None):
     """Generate foodDatabase.json"""
+    args = parse_args(argv)
+    metrics = metrics_from_args("generate", args)
+    try:
+        return generate(args, metrics)
+    finally:
+        metrics.close()
+
+def generate(args: argparse.Namespace, metrics: PipelineMetrics) -> bool:
+    """Run every generator stage under metrics; returns False on the first failed output"""
     print("\n" + "="*60)
     print("🍽️  FOOD DATABASE GENERATOR")
     print("="*60)
     
-    data_dir = "/home/franz/Documents/LOAF/Data"
-    output_path = "/home/franz/Documents/LOAF/LOAF/data/foodDatabase.json"
+    data_dir = args.data_dir
+    output_path = args.output
+    search_index_path = os.path.join(os.path.dirname(output_path), "foodSearchIndex.json")
     
     # Create output directory if needed
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    cache = None if args.no_cache else BuildCache(args.cache_dir)
     
     all_foods = []
     processed_names = set()
+    ids = IdAllocator()
     
     # Load from IFCT2017
     print("\n📥 Loading from IFCT2017 CSV...")
     ifct_path = os.path.join(data_dir, "Indian_Food_Nutrition_Processed.csv")
     if os.path.exists(ifct_path):
-        foods = load_foods_from_ifct(ifct_path)
+        with metrics.stage("load-ifct") as stage:
+            foods = load_foods_from_ifct(ifct_path, cache, ids, stage, args.workers)
         all_foods.extend(foods)
         processed_names.update(f["name"].lower() for f in foods)
     else:
@@ -210,31 +329,333 @@ def main():
     print("\n📥 Loading from Healthy Eating Dataset CSV...")
     healthy_path = os.path.join(data_dir, "healthy_eating_dataset.csv")
     if os.path.exists(healthy_path):
-        foods = load_foods_from_healthy(healthy_path, processed_names)
+        with metrics.stage("load-healthy") as stage:
+            foods = load_foods_from_healthy(healthy_path, processed_names, cache, ids, stage, args.workers)
         all_foods.extend(foods)
     else:
         print(f"  ⚠️  File not found: {healthy_path}")
     
+    # Near-duplicate detection across sources
+    if args.merge_duplicates or args.merge_report:
+        print("\n🧬 Detecting near-duplicates...")
+        with metrics.stage("near-duplicates") as stage:
+            merged_foods, report = merge_near_duplicates(all_foods)
+            stage.rows_in, stage.rows_out = len(all_foods), len(merged_foods)
+            stage.extra["mergeGroups"] = len(report)
+        print(f"  ✅ {len(report)} merge groups proposed")
+        if args.merge_report:
+            write_merge_report(report, args.merge_report)
+        if args.merge_duplicates:
+            print(f"  ✅ Folded {len(all_foods) - len(merged_foods)} foods into aliases")
+            all_foods = merged_foods
+    
+    # Portion hints in grams (the loaders describe portions as serving multipliers)
+    with metrics.stage("normalize-portions") as stage:
+        for food in all_foods:
+            normalize_food_portions(food)
+        stage.rows_in = stage.rows_out = len(all_foods)
+
+    # Canonical nutrition shape ({value, unit} objects and alias keys converted)
+    with metrics.stage("normalize-nutrition") as stage:
+        try:
+            for i, food in enumerate(all_foods):
+                normalize_food(food, i)
+        except CatalogValidationError as e:
+            print(f"  ❌ Invalid catalog: {e}")
+            return False
+        stage.rows_in = stage.rows_out = len(all_foods)
+
+    # Energy / outlier / impossible-value checks: quarantine or down-weight bad rows
+    if args.quality_check or args.quality_report:
+        print("\n🩺 Checking data quality...")
+        with metrics.stage("data-quality") as stage:
+            checked_foods, quality_report = quality_pass(all_foods)
+            summary = quality_report["summary"]
+            stage.rows_in = len(all_foods)
+            stage.rows_out = len(checked_foods) if args.quality_check else len(all_foods)
+            quarantined = Counter(entry["flags"][0] for entry in quality_report["quarantined"])
+            if args.quality_check:
+                stage.reject_all(quarantined)
+            else:
+                # Report only: every food is kept, so the quarantine findings are flags, not rejections
+                stage.extra["flagged"] = dict(quarantined)
+            stage.extra["downweighted"] = summary["downweighted"]
+        print(f"  ✅ {summary['quarantined']} quarantined, {summary['downweighted']} down-weighted "
+              f"{'' if args.quality_check else '(report only, nothing changed) '}"
+              f"({', '.join(f'{check}: {count}' for check, count in summary['byCheck'].items()) or 'no flags'})")
+        if args.quality_report:
+            write_quality_report(quality_report, args.quality_report)
+        if args.quality_check:
+            all_foods = checked_foods
+
+    # Fail fast on any food that breaks the schema
+    print("\n🧪 Validating catalog schema...")
+    try:
+        with metrics.stage("validate-schema") as stage:
+            stage.rows_in = len(all_foods)
+            stage.rows_out = validate_catalog(all_foods)
+        print(f"  ✅ {len(all_foods)} foods match nutrition schema v{SCHEMA_VERSION}")
+    except CatalogValidationError as e:
+        print(f"  ❌ Invalid catalog: {e}")
+        return False
+    
     # Create database structure
     database = {
         "version": "1.0",
         "lastUpdated": "2026-01-17",
         "totalFoods": len(all_foods),
+        "nutritionSchema": {"version": SCHEMA_VERSION, "units": NUTRITION_UNITS},
         "foods": all_foods
     }
     
-    # Write to file
+    # Diff against the version being replaced, for incremental client sync
+    if args.patch:
+        print(f"\n🧩 Writing patch to {args.patch}...")
+        try:
+            with metrics.stage("patch") as stage:
+                previous = {"foods": []}
+                if os.path.exists(output_path):
+                    with open(output_path, 'r', encoding='utf-8') as f:
+                        previous = json.load(f)
+                patch = diff_catalogs(previous, database)
+                apply_patch(catalog_foods(previous), patch)  # raises unless it reproduces this catalog
+                size = write_patch(patch, args.patch)
+                stage.rows_in = len(all_foods)
+                stage.rows_out = len(patch["added"]) + len(patch["changed"]) + len(patch["removed"])
+                stage.extra["bytes"] = size
+            print(f"  ✅ {len(patch['added'])} added, {len(patch['changed'])} changed, "
+                  f"{len(patch['removed'])} removed, {len(patch['idMap'])} re-keyed ({size / 1024:.1f} KB)")
+        except Exception as e:
+            print(f"  ❌ Error writing patch: {e}")
+            return False
+
+    # Write to file (skipped when the content is byte-identical)
     print(f"\n💾 Writing {len(all_foods)} foods to {output_path}...")
     try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(database, f, indent=2, ensure_ascii=False)
-        print(f"  ✅ Successfully created foodDatabase.json")
+        with metrics.stage("write-database") as stage:
+            payload = json.dumps(database, indent=2, ensure_ascii=False).encode("utf-8")
+            written = write_if_changed(output_path, payload)
+            stage.rows_in = stage.rows_out = len(all_foods)
+            stage.extra.update(bytes=len(payload), written=written)
+        if written:
+            print(f"  ✅ Successfully created foodDatabase.json")
+        else:
+            print(f"  ✅ foodDatabase.json unchanged, not rewritten")
+    except Exception as e:
+        print(f"  ❌ Error writing file: {e}")
+        return False
+    catalog_digest = bytes_digest(payload)
+
+    # Write the precomputed search index alongside the database
+    print(f"\n🔎 Building search index...")
+    search_index_inputs = catalog_digest + search_index_rules()
+    try:
+        if cache is not None and cache.output_fresh(search_index_path, search_index_inputs):
+            print(f"  ✅ foodSearchIndex.json up to date")
+        else:
+            with metrics.stage("search-index") as stage:
+                index = build_search_index(all_foods)
+                write_search_index(index, search_index_path)
+                stage.rows_in = stage.rows_out = len(all_foods)
+            print(f"  ✅ Successfully created foodSearchIndex.json")
+        if cache is not None:
+            cache.record_output(search_index_path, search_index_inputs)
         print(f"\n📊 Summary:")
         print(f"  Total foods: {len(all_foods)}")
         print(f"  File size: {os.path.getsize(output_path) / 1024:.1f} KB")
+        print(f"  Search index size: {os.path.getsize(search_index_path) / 1024:.1f} KB")
     except Exception as e:
-        print(f"  ❌ Error writing file: {e}")
+        print(f"  ❌ Error writing search index: {e}")
+        return False
+
+    # Phonetic key index for Hinglish / transliterated spellings
+    phonetic_index_path = os.path.join(os.path.dirname(output_path), "foodPhoneticIndex.json")
+    phonetic_inputs = catalog_digest + rules_digest(rules_signature(), phonetic_word, phonetic_key,
+                                                    build_phonetic_index)
+    try:
+        if cache is not None and cache.output_fresh(phonetic_index_path, phonetic_inputs):
+            print(f"\n🗣️  foodPhoneticIndex.json up to date")
+        else:
+            with metrics.stage("phonetic-index") as stage:
+                phonetic_index = build_phonetic_index(all_foods)
+                write_phonetic_index(phonetic_index, phonetic_index_path)
+                stage.rows_in = stage.rows_out = len(all_foods)
+            print(f"\n🗣️  Phonetic index: {len(phonetic_index['phrases'])} phrase keys, "
+                  f"{os.path.getsize(phonetic_index_path) / 1024:.1f} KB")
+        if cache is not None:
+            cache.record_output(phonetic_index_path, phonetic_inputs)
+    except Exception as e:
+        print(f"  ❌ Error writing phonetic index: {e}")
         return False
+
+    # TF-IDF n-gram vectors and precomputed similar-food lists
+    similarity_index_path = os.path.join(os.path.dirname(output_path), "foodSimilarityIndex.json")
+    similarity_inputs = catalog_digest + rules_digest(build_similarity_index, food_document)
+    try:
+        if cache is not None and cache.output_fresh(similarity_index_path, similarity_inputs):
+            print(f"\n🧭 foodSimilarityIndex.json up to date")
+        else:
+            with metrics.stage("similarity-index") as stage:
+                similarity_index = build_similarity_index(all_foods)
+                write_similarity_index(similarity_index, similarity_index_path)
+                stage.rows_in = stage.rows_out = len(all_foods)
+            print(f"\n🧭 Similarity index: {len(similarity_index['vocab'])} n-gram features, "
+                  f"{os.path.getsize(similarity_index_path) / 1024:.1f} KB")
+        if cache is not None:
+            cache.record_output(similarity_index_path, similarity_inputs)
+    except Exception as e:
+        print(f"  ❌ Error writing similarity index: {e}")
+        return False
+
+    # Nutrients pre-scaled to every standard portion
+    portion_table_path = os.path.join(os.path.dirname(output_path), "foodPortionTable.json")
+    portion_inputs = catalog_digest + rules_digest(TABLE_NUTRIENTS, build_portion_table, b64_array)
+    try:
+        if cache is not None and cache.output_fresh(portion_table_path, portion_inputs):
+            print(f"\n🍱 foodPortionTable.json up to date")
+        else:
+            with metrics.stage("portion-table") as stage:
+                portion_table = build_portion_table(all_foods)
+                write_portion_table(portion_table, portion_table_path)
+                stage.rows_in, stage.rows_out = len(all_foods), portion_table["totalPortions"]
+            print(f"\n🍱 Portion table: {portion_table['totalPortions']} portions, "
+                  f"{os.path.getsize(portion_table_path) / 1024:.1f} KB")
+        if cache is not None:
+            cache.record_output(portion_table_path, portion_inputs)
+    except Exception as e:
+        print(f"  ❌ Error writing portion table: {e}")
+        return False
+
+    # Memory-mapped binary catalog for backend lookups
+    binary_catalog_path = os.path.join(os.path.dirname(output_path), "foodCatalog.bin")
+    binary_inputs = catalog_digest + rules_digest(build_binary_catalog, normalize_text, FORMAT_VERSION, NUTRIENTS)
+    try:
+        if cache is not None and cache.output_fresh(binary_catalog_path, binary_inputs):
+            print(f"\n🗃️  foodCatalog.bin up to date")
+        else:
+            with metrics.stage("binary-catalog") as stage:
+                size = write_binary_catalog(all_foods, binary_catalog_path)
+                stage.rows_in = stage.rows_out = len(all_foods)
+            print(f"\n🗃️  Binary catalog: {len(all_foods)} foods, {size / 1024:.1f} KB")
+        if cache is not None:
+            cache.record_output(binary_catalog_path, binary_inputs)
+    except Exception as e:
+        print(f"  ❌ Error writing binary catalog: {e}")
+        return False
+
+    # Top foods per goal, RDA profile and diet filter
+    rankings_path = os.path.join(os.path.dirname(output_path), "foodGoalRankings.json")
+    try:
+        ranking_inputs = catalog_digest + file_digest(GOALS_PATH) + file_digest(RDA_PATH) + ranking_rules()
+        if cache is not None and cache.output_fresh(rankings_path, ranking_inputs):
+            print(f"\n🏅 foodGoalRankings.json up to date")
+        else:
+            with metrics.stage("goal-rankings") as stage:
+                goals = load_json(GOALS_PATH, "mappings")
+                recommendations = load_json(RDA_PATH, "recommendations")
+                rankings = build_goal_rankings(all_foods, goals, recommendations, tagger=diet_tagger())
+                write_goal_rankings(rankings, rankings_path)
+                stage.rows_in = len(all_foods)
+                stage.rows_out = len(goals) * len(recommendations) * len(rankings["dietFilters"])
+                stage.extra["emptyDiets"] = rankings["emptyDiets"]
+            print(f"\n🏅 Goal rankings: {len(goals)} goals x {len(recommendations)} profiles, "
+                  f"{os.path.getsize(rankings_path) / 1024:.1f} KB")
+        if cache is not None:
+            cache.record_output(rankings_path, ranking_inputs)
+    except Exception as e:
+        print(f"  ❌ Error writing goal rankings: {e}")
+        return False
+
+    # Token-budgeted AI context digests per food and per goal
+    ai_context_path = os.path.join(os.path.dirname(output_path), "foodAIContext.json")
+    try:
+        ai_context_inputs = catalog_digest + file_digest(GOALS_PATH) + file_digest(RDA_PATH) + ranking_rules() + \
+            ai_context_rules()
+        if cache is not None and cache.output_fresh(ai_context_path, ai_context_inputs):
+            print(f"\n🤖 foodAIContext.json up to date")
+        else:
+            with metrics.stage("ai-context") as stage:
+                ai_context = build_ai_context(all_foods, load_json(GOALS_PATH, "mappings"),
+                                              load_json(RDA_PATH, "recommendations"), tagger=diet_tagger())
+                write_ai_context(ai_context, ai_context_path)
+                stage.rows_in, stage.rows_out = len(all_foods), len(ai_context["foods"])
+                if ai_context["implausibleFoods"]:
+                    stage.reject("implausible", len(ai_context["implausibleFoods"]))
+            tokens = [entry["tokens"] for entry in ai_context["goals"].values()]
+            print(f"\n🤖 AI context: {len(tokens)} goal digests (~{max(tokens, default=0)} tokens max), "
+                  f"{os.path.getsize(ai_context_path) / 1024:.1f} KB")
+        if cache is not None:
+            cache.record_output(ai_context_path, ai_context_inputs)
+    except Exception as e:
+        print(f"  ❌ Error writing AI context digests: {e}")
+        return False
+
+    # Optional offline meal-plan library
+    plan_library_path = os.path.join(os.path.dirname(output_path), "foodPlanLibrary.json")
+    if args.meal_plans:
+        try:
+            plan_inputs = catalog_digest + file_digest(RDA_PATH) + ranking_rules() + rules_digest(
+                MealPlanner, meal_category, build_plan_library, MEAL_SLOTS, CATEGORY_SLOTS, PLAN_NUTRIENTS, TOLERANCE,
+                args.meal_plans)
+            if cache is not None and cache.output_fresh(plan_library_path, plan_inputs):
+                print(f"\n🥗 foodPlanLibrary.json up to date")
+            else:
+                with metrics.stage("meal-plans") as stage:
+                    recommendations = load_json(RDA_PATH, "recommendations")
+                    library = build_plan_library(MealPlanner(all_foods, diet_tagger()), recommendations, args.meal_plans)
+                    write_plan_library(library, plan_library_path)
+                    stage.rows_in = len(all_foods)
+                    stage.rows_out = sum(len(plans) for by_diet in library["profiles"].values()
+                                         for plans in by_diet.values())
+                print(f"\n🥗 Meal plans: {stage.rows_out} plans, {os.path.getsize(plan_library_path) / 1024:.1f} KB")
+            if cache is not None:
+                cache.record_output(plan_library_path, plan_inputs)
+        except Exception as e:
+            print(f"  ❌ Error writing meal plans: {e}")
+            return False
+
+    # Optional SQLite output mode
+    sqlite_inputs = catalog_digest + sqlite_rules()
+    if args.sqlite and cache is not None and cache.output_fresh(args.sqlite, sqlite_inputs):
+        print(f"\n🗄️  SQLite catalog {args.sqlite} up to date")
+    elif args.sqlite:
+        print(f"\n🗄️  Writing SQLite catalog to {args.sqlite}...")
+        try:
+            with metrics.stage("sqlite") as stage:
+                counts = write_sqlite_catalog(all_foods, args.sqlite, database["version"], database["lastUpdated"],
+                                              diet_tagger())
+                stage.rows_in, stage.rows_out = len(all_foods), counts["foods"]
+            print(f"  ✅ {counts['foods']} foods, {counts['aliases']} aliases, {counts['nutrientValues']} nutrient values")
+            print(f"  SQLite size: {os.path.getsize(args.sqlite) / 1024:.1f} KB")
+            if cache is not None:
+                cache.record_output(args.sqlite, sqlite_inputs)
+        except Exception as e:
+            print(f"  ❌ Error writing SQLite catalog: {e}")
+            return False
+
+    # Optional sharded bundle output mode
+    bundle_manifest = os.path.join(args.bundle_dir or "", "manifest.json")
+    bundle_inputs = catalog_digest + args.shard_by + bundle_rules()
+    if args.bundle_dir and cache is not None and cache.output_fresh(bundle_manifest, bundle_inputs):
+        print(f"\n📦 Bundles in {args.bundle_dir} up to date")
+    elif args.bundle_dir:
+        print(f"\n📦 Writing bundles to {args.bundle_dir}...")
+        try:
+            with metrics.stage("bundles") as stage:
+                manifest = write_bundles(database, args.bundle_dir, args.shard_by)
+                stage.rows_in = stage.rows_out = len(all_foods)
+                stage.extra["shards"] = len(manifest["shards"])
+            print(f"  ✅ {len(manifest['shards'])} shards, {manifest['totalBytes'] / 1024:.1f} KB "
+                  f"({manifest['totalGzipBytes'] / 1024:.1f} KB gzip)")
+            if cache is not None:
+                cache.record_output(bundle_manifest, bundle_inputs)
+        except Exception as e:
+            print(f"  ❌ Error writing bundles: {e}")
+            return False
+
+    if cache is not None:
+        cache.save()
+        print(f"\n♻️  Build cache: {cache.hits} sources reused, {cache.misses} re-derived")
     
     return True
 
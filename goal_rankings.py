@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Precomputed goal-specific food rankings
+Scores every food's nutrient density against each goal in goalMappings.json
+and each age/gender profile in rdaRecommendations.json, and writes the
+top-k food ids per (goal, profile, diet filter), so recommendation screens
+read a ranked list instead of scanning and sorting the catalog on device.
+Diet filters no food passes are listed under emptyDiets instead of
+getting empty lists.
+"""
+
+import heapq
+import json
+import os
+from array import array
+from typing import Dict, List, Any, Optional, Tuple
+
+from build_cache import rules_digest
+from food_schema import NUTRITION_UNITS
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+GOALS_PATH = os.path.join(REPO_ROOT, "LOAF", "data", "goalMappings.json")
+RDA_PATH = os.path.join(REPO_ROOT, "LOAF", "data", "rdaRecommendations.json")
+
+TOP_K = 20
+# A food counts for at most one day's target of any nutrient
+DENSITY_CAP = 1.0
+# Share of the score that depends on how close the food's macro split is to the goal's
+MACRO_WEIGHT = 0.5
+DIET_FILTERS = ["all", "vegetarian", "vegan"]
+# Goal nutrient names that differ from the canonical schema
+_GOAL_NUTRIENT_KEYS = {"vitaminD": "vitaminD_ug", "carbohydrates": "carbs", "fibre": "fiber"}
+_MACRO_KCAL = {"protein": 4.0, "carbs": 4.0, "fat": 9.0}
+
+
+def load_json(path: str, key: str) -> List[Dict[str, Any]]:
+    """The list under key in one of the LOAF/data JSON files"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get(key, [])
+
+
+def profile_key(recommendation: Dict[str, Any]) -> str:
+    """Stable key of an RDA profile, e.g. "19-30_female\""""
+    return f"{recommendation['ageGroup']}_{recommendation['gender'].lower()}"
+
+
+def rankable_nutrients(recommendations: List[Dict[str, Any]]) -> List[str]:
+    """Canonical nutrients that every RDA profile gives a positive target for"""
+    return [n for n in NUTRITION_UNITS
+            if recommendations and all(isinstance(r.get(n), (int, float)) and r[n] > 0 for r in recommendations)]
+
+
+def goal_weights(goal: Dict[str, Any], nutrients: List[str]) -> Tuple[List[float], List[str]]:
+    """
+    Weight per rankable nutrient for a goal (keyNutrients are listed most
+    important first, so weights fall linearly and sum to 1), plus the key
+    nutrients that cannot be scored from the catalog
+    """
+    usable, skipped = [], []
+    for name in goal.get("keyNutrients", []):
+        key = _GOAL_NUTRIENT_KEYS.get(name, name)
+        if key not in nutrients:
+            skipped.append(name)
+        elif key not in usable:
+            usable.append(key)
+    raw = {key: float(len(usable) - i) for i, key in enumerate(usable)}
+    total = sum(raw.values()) or 1.0
+    return [raw.get(n, 0.0) / total for n in nutrients], skipped
+
+
+def macro_shares(macros: Dict[str, Any]) -> Optional[Tuple[float, float, float]]:
+    """Protein / carbs / fat shares of energy from gram amounts, or None without any"""
+    kcal = [float(macros.get(m) or 0.0) * factor for m, factor in _MACRO_KCAL.items()]
+    total = sum(kcal)
+    return tuple(k / total for k in kcal) if total > 0 else None
+
+
+def macro_fit(food_shares: Optional[Tuple[float, ...]], target_shares: Optional[Tuple[float, ...]]) -> float:
+    """1 for an identical macro split, 0 for a disjoint one (half the L1 distance)"""
+    if food_shares is None or target_shares is None:
+        return 0.0
+    return 1.0 - 0.5 * sum(abs(a - b) for a, b in zip(food_shares, target_shares))
+
+
+def food_diet(food: Dict[str, Any], tagger=None) -> str:
+    """vegan / vegetarian / non-vegetarian from the food's flags, else from its name; unknown without a tagger"""
+    if "vegan" in food or "vegetarian" in food:
+        if food.get("vegan"):
+            return "vegan"
+        return "vegetarian" if food.get("vegetarian") else "non-vegetarian"
+    if tagger is None:
+        return "unknown"
+    return tagger.tag(food.get("name", ""))["diet"]
+
+
+def diet_tagger():
+    """The migrator's keyword tagger, used for foods without diet flags"""
+    from migrate_foods import FoodDatabaseMigrator
+    return FoodDatabaseMigrator().tagger
+
+
+def rules_fingerprint() -> str:
+    """Fingerprint of the scoring code, constants and diet keyword rules, for build cache keys"""
+    from migrate_foods import FoodDatabaseMigrator
+    return rules_digest(build_goal_rankings, rankable_nutrients, goal_weights, macro_shares, macro_fit, food_diet,
+                        [TOP_K, DENSITY_CAP, MACRO_WEIGHT, DIET_FILTERS, _GOAL_NUTRIENT_KEYS]) + \
+        FoodDatabaseMigrator().rules_fingerprint()
+
+
+def diet_allows(diet_filter: str, diet: str) -> bool:
+    """Whether a food of the given diet passes a filter (vegan foods are also vegetarian, unknown ones only "all")"""
+    if diet_filter == "vegan":
+        return diet == "vegan"
+    if diet_filter == "vegetarian":
+        return diet in ("vegetarian", "vegan")
+    return True
+
+
+def build_goal_rankings(foods: List[Dict[str, Any]], goals: List[Dict[str, Any]],
+                        recommendations: List[Dict[str, Any]], top_k: int = TOP_K, tagger=None) -> Dict[str, Any]:
+    """
+    Score matrix per RDA profile: D = min(V / rda, cap) (foods x nutrients),
+    S = D . W (nutrients x goals), scaled by each food's macro fit to the
+    goal; then the top_k food ids per (goal, profile, diet filter)
+    """
+    nutrients = rankable_nutrients(recommendations)
+    width = len(nutrients)
+    values = array('d')
+    for food in foods:
+        nutrition = food.get("nutrition", {})
+        values.extend(float(nutrition.get(n) or 0.0) for n in nutrients)
+
+    weights, goal_meta = [], {}
+    for goal in goals:
+        w, skipped = goal_weights(goal, nutrients)
+        weights.append(w)
+        goal_meta[goal["goalId"]] = {
+            "nutrients": {n: round(x, 4) for n, x in zip(nutrients, w) if x},
+            "unscored": skipped,
+        }
+    # Goal-major macro fits, independent of the profile
+    shares = [macro_shares(food.get("nutrition", {})) for food in foods]
+    fits = [[1.0 - MACRO_WEIGHT + MACRO_WEIGHT * macro_fit(s, macro_shares(goal.get("targetMacros") or {}))
+             for s in shares] for goal in goals]
+
+    diets = [food_diet(food, tagger) for food in foods]
+    members = {f: [i for i, d in enumerate(diets) if diet_allows(f, d)] for f in DIET_FILTERS}
+    diet_filters = [f for f in DIET_FILTERS if members[f]]
+
+    rankings: Dict[str, Dict[str, Dict[str, List[str]]]] = {goal["goalId"]: {} for goal in goals}
+    scores_out: Dict[str, Dict[str, Dict[str, List[float]]]] = {goal["goalId"]: {} for goal in goals}
+    for recommendation in recommendations:
+        inverse = [1.0 / recommendation[n] for n in nutrients]
+        scores = [array('d', bytes(8 * len(foods))) for _ in goals]
+        for i in range(len(foods)):
+            base = i * width
+            density = [min(values[base + j] * inverse[j], DENSITY_CAP) for j in range(width)]
+            for g, w in enumerate(weights):
+                scores[g][i] = sum(d * x for d, x in zip(density, w)) * fits[g][i]
+
+        key = profile_key(recommendation)
+        for g, goal in enumerate(goals):
+            column = scores[g]
+            by_diet, score_lists = {}, {}
+            for diet_filter in diet_filters:
+                best = heapq.nlargest(top_k, (i for i in members[diet_filter] if column[i] > 0),
+                                      key=lambda i: (column[i], -i))
+                by_diet[diet_filter] = [foods[i].get("id") for i in best]
+                score_lists[diet_filter] = [round(column[i], 4) for i in best]
+            rankings[goal["goalId"]][key] = by_diet
+            scores_out[goal["goalId"]][key] = score_lists
+
+    return {
+        "version": 1,
+        "totalFoods": len(foods),
+        "topK": top_k,
+        "nutrients": nutrients,
+        "densityCap": DENSITY_CAP,
+        "macroWeight": MACRO_WEIGHT,
+        "dietFilters": diet_filters,
+        "emptyDiets": [f for f in DIET_FILTERS if f not in diet_filters],
+        "profiles": [profile_key(r) for r in recommendations],
+        "goals": goal_meta,
+        "rankings": rankings,
+        "scores": scores_out,
+    }
+
+
+def write_goal_rankings(rankings: Dict[str, Any], output_path: str) -> None:
+    """Write the rankings as a compact JSON artifact"""
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(rankings, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def main():
+    """Build foodGoalRankings.json from an existing foodDatabase.json"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the per-goal food rankings artifact")
+    parser.add_argument("--database", default=os.path.join(REPO_ROOT, "LOAF", "data", "foodDatabase.json"))
+    parser.add_argument("--goals", default=GOALS_PATH)
+    parser.add_argument("--rda", default=RDA_PATH)
+    parser.add_argument("--output", default=None, help="defaults to foodGoalRankings.json next to the database")
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    args = parser.parse_args()
+
+    output_path = args.output or os.path.join(os.path.dirname(args.database), "foodGoalRankings.json")
+
+    with open(args.database, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+    foods = database.get("foods") or database.get("foodDatabase", {}).get("foods", [])
+    goals = load_json(args.goals, "mappings")
+    recommendations = load_json(args.rda, "recommendations")
+
+    print(f"\n🏅 Ranking {len(foods)} foods for {len(goals)} goals x {len(recommendations)} RDA profiles...")
+    rankings = build_goal_rankings(foods, goals, recommendations, args.top_k, diet_tagger())
+    write_goal_rankings(rankings, output_path)
+    for goal_id, meta in rankings["goals"].items():
+        if meta["unscored"]:
+            print(f"  ⚠️  {goal_id}: no catalog data for {', '.join(meta['unscored'])}")
+    for diet_filter in rankings["emptyDiets"]:
+        print(f"  ⚠️  No {diet_filter} foods, {diet_filter} rankings omitted")
+    print(f"  ✅ Top {rankings['topK']} per goal, profile and diet filter")
+    print(f"  File size: {os.path.getsize(output_path) / 1024:.1f} KB")
+    return True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Compiled multi-pattern keyword tagging for food names
+An Aho-Corasick automaton is built once from the category, diet and
+allergen keyword tables; each name is then scanned in a single pass and
+the matches are resolved with explicit priority and scoring rules
+"""
+
+from collections import deque
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+# Dish-level categories outrank ingredient-level ones when both match
+CATEGORY_BOOST = {
+    "beverages": 4,
+    "desserts": 4,
+    "breakfast": 4,
+    "lunch": 4,
+    "dinner": 4,
+}
+# Tie-break order (earlier wins); lunch precedes dinner as they share dish keywords
+CATEGORY_PRIORITY = [
+    "breakfast", "lunch", "dinner", "beverages", "desserts", "snacks",
+    "dairy", "grains", "vegetables", "fruits",
+]
+# A category named outright in the food name always wins
+EXPLICIT_MEALS = {"breakfast": "breakfast", "lunch": "lunch", "dinner": "dinner"}
+DEFAULT_CATEGORY = "snacks"
+# Allergens that come from animals, so a name that carries one is never vegan
+ANIMAL_ALLERGENS = {"milk", "egg", "fish", "shellfish"}
+# Plant products named after a dairy product; a dairy keyword inside one of them tags nothing
+PLANT_COMPOUNDS = ["peanut butter", "cocoa butter", "coconut milk", "coconut cream", "almond milk", "soy milk",
+                   "soya milk", "oat milk"]
+# Tags that make a keyword a dairy keyword
+DAIRY_TAGS = {("category", "dairy"), ("allergen", "milk"), ("diet", "animal-product")}
+# Only a name that says so outright is marked gluten-free; without it or a gluten keyword the flag is unknown
+GLUTEN_FREE_MARKERS = ["gluten free", "gluten-free"]
+
+Match = Tuple[int, int, str]  # (start, end, keyword)
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton mapping keywords to payload tags"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[str]] = [[]]
+        self.payloads: Dict[str, List[Tuple[str, str]]] = {}
+        self._built = False
+
+    def add(self, keyword: str, group: str, tag: str) -> None:
+        """Register keyword as evidence for tag within group (e.g. 'category', 'lunch')"""
+        keyword = keyword.lower()
+        self.payloads.setdefault(keyword, [])
+        if (group, tag) not in self.payloads[keyword]:
+            self.payloads[keyword].append((group, tag))
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        if keyword not in self._out[node]:
+            self._out[node].append(keyword)
+        self._built = False
+
+    def add_table(self, group: str, table: Dict[str, Iterable[str]]) -> None:
+        for tag, keywords in table.items():
+            for keyword in keywords:
+                self.add(keyword, group, tag)
+
+    def build(self) -> "KeywordAutomaton":
+        """Compute failure links (breadth-first)"""
+        queue = deque()
+        for nxt in self._goto[0].values():
+            self._fail[nxt] = 0
+            queue.append(nxt)
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        self._built = True
+        return self
+
+    def find_all(self, text: str) -> List[Match]:
+        """All keyword occurrences in text, in one left-to-right pass"""
+        if not self._built:
+            self.build()
+        matches = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for keyword in self._out[node]:
+                matches.append((i - len(keyword) + 1, i + 1, keyword))
+        return matches
+
+
+def is_whole_word(text: str, start: int, end: int) -> bool:
+    """True if text[start:end] is a word on its own, allowing a plural 's'/'es'"""
+    if start > 0 and text[start - 1].isalnum():
+        return False
+    for suffix in ("", "s", "es"):
+        tail = end + len(suffix)
+        if text[end:tail] == suffix and (tail >= len(text) or not text[tail].isalnum()):
+            return True
+    return False
+
+
+class FoodTagger:
+    """Category, diet and allergen tagging from a single automaton scan per name"""
+
+    def __init__(self, category_keywords: Dict[str, List[str]], diet_keywords: Dict[str, List[str]],
+                 allergen_keywords: Dict[str, List[str]]):
+        self.automaton = KeywordAutomaton()
+        self.automaton.add_table("category", category_keywords)
+        self.automaton.add_table("diet", diet_keywords)
+        self.automaton.add_table("allergen", allergen_keywords)
+        self.automaton.add_table("meal", {meal: [meal] for meal in EXPLICIT_MEALS})
+        self.automaton.add_table("plant", {"compound": PLANT_COMPOUNDS})
+        self.automaton.add_table("marker", {"gluten-free": GLUTEN_FREE_MARKERS})
+        self.automaton.build()
+
+    def scan(self, food_name: str) -> List[Tuple[str, str, str, bool]]:
+        """
+        (group, tag, keyword, whole_word) for every match in the name, minus
+        dairy keywords that fall inside a plant compound ("peanut butter")
+        """
+        text = food_name.lower()
+        matches = self.automaton.find_all(text)
+        plant = [(start, end) for start, end, keyword in matches
+                 if ("plant", "compound") in self.automaton.payloads[keyword] and is_whole_word(text, start, end)]
+        hits = []
+        for start, end, keyword in matches:
+            whole = is_whole_word(text, start, end)
+            payloads = self.automaton.payloads[keyword]
+            if any(s <= start and end <= e for s, e in plant) and DAIRY_TAGS.intersection(payloads):
+                continue
+            for group, tag in payloads:
+                hits.append((group, tag, keyword, whole))
+        return hits
+
+    @staticmethod
+    def resolve_category(hits: List[Tuple[str, str, str, bool]]) -> str:
+        """
+        Highest scoring category. Each distinct keyword scores its length,
+        doubled for a whole-word match; dish-level categories get a boost and
+        CATEGORY_PRIORITY breaks ties.
+        """
+        for group, tag, _keyword, whole in hits:
+            if group == "meal" and whole:
+                return EXPLICIT_MEALS[tag]
+
+        best: Dict[Tuple[str, str], int] = {}
+        for group, tag, keyword, whole in hits:
+            if group != "category":
+                continue
+            weight = len(keyword) * (2 if whole else 1)
+            best[(tag, keyword)] = max(best.get((tag, keyword), 0), weight)
+        scores: Dict[str, int] = {}
+        for (tag, _keyword), weight in best.items():
+            scores[tag] = scores.get(tag, 0) + weight
+        if not scores:
+            return DEFAULT_CATEGORY
+
+        def rank(tag: str) -> Tuple[int, int]:
+            priority = CATEGORY_PRIORITY.index(tag) if tag in CATEGORY_PRIORITY else len(CATEGORY_PRIORITY)
+            return (scores[tag] + CATEGORY_BOOST.get(tag, 0), -priority)
+
+        return max(scores, key=rank)
+
+    @staticmethod
+    def resolve_diet(hits: List[Tuple[str, str, str, bool]]) -> str:
+        """non-vegetarian beats everything; vegan markers are vetoed by animal products and animal allergens"""
+        tags = {tag for group, tag, _keyword, whole in hits if group == "diet" and whole}
+        if "non-vegetarian" in tags:
+            return "non-vegetarian"
+        animal = "animal-product" in tags or any(
+            group == "allergen" and whole and tag in ANIMAL_ALLERGENS for group, tag, _keyword, whole in hits)
+        if "vegan" in tags and not animal:
+            return "vegan"
+        return "vegetarian"
+
+    @staticmethod
+    def resolve_allergens(hits: List[Tuple[str, str, str, bool]]) -> List[str]:
+        return sorted({tag for group, tag, _keyword, whole in hits if group == "allergen" and whole})
+
+    @staticmethod
+    def resolve_gluten_free(hits: List[Tuple[str, str, str, bool]]) -> Optional[bool]:
+        """True when the name says gluten-free, False on a gluten keyword, else None (unknown)"""
+        if any(group == "marker" and tag == "gluten-free" for group, tag, _keyword, _whole in hits):
+            return True
+        if any(group == "allergen" and tag == "gluten" and whole for group, tag, _keyword, whole in hits):
+            return False
+        return None
+
+    def tag(self, food_name: str) -> Dict[str, Any]:
+        """Category, diet type, allergens and gluten flag (None when the name gives no evidence) for one name"""
+        hits = self.scan(food_name)
+        gluten_free = self.resolve_gluten_free(hits)
+        allergens = self.resolve_allergens(hits)
+        return {
+            "category": self.resolve_category(hits),
+            "diet": self.resolve_diet(hits),
+            "allergens": [a for a in allergens if a != "gluten"] if gluten_free else allergens,
+            "glutenFree": gluten_free,
+        }
+
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Batch daily meal-plan generation from the food catalog
+Plans are built greedily over the pre-scaled (food, portion) nutrient table:
+each meal slot takes the standard portions whose calories fit its share of
+the day and whose macros best close the gap to the RDA profile's targets,
+then a portion-swap pass tightens the totals. Candidate rows are indexed
+once per (profile, diet), so thousands of plans per second can be drawn
+to precompute offline plan libraries.
+"""
+
+import heapq
+import json
+import math
+import os
+import random
+import time
+from bisect import bisect_left
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+from goal_rankings import DIET_FILTERS, RDA_PATH, diet_allows, food_diet, load_json, profile_key
+from portion_table import PortionTable, build_portion_table
+
+# (slot, share of the day's calories, items per slot)
+MEAL_SLOTS: List[Tuple[str, float, int]] = [
+    ("breakfast", 0.25, 2),
+    ("lunch", 0.35, 2),
+    ("dinner", 0.30, 2),
+    ("snacks", 0.10, 1),
+]
+# Meal categories that only belong in some slots; any other category fits every slot. Catalog
+# categories that are not meal categories ("Indian Food") are read from the name by the tagger
+CATEGORY_SLOTS: Dict[str, List[str]] = {
+    "breakfast": ["breakfast"],
+    "lunch": ["lunch", "dinner"],
+    "dinner": ["lunch", "dinner"],
+    "snacks": ["snacks"],
+    "desserts": ["snacks"],
+    "beverages": ["breakfast", "snacks"],
+    "fruits": ["breakfast", "snacks"],
+}
+# Planned nutrients and their weight in the squared relative error
+PLAN_NUTRIENTS: List[Tuple[str, float]] = [("calories", 2.0), ("protein", 1.0), ("carbs", 1.0), ("fat", 1.0)]
+TOLERANCE = 0.10
+WINDOW = 12         # candidates either side of the calorie-sorted insertion point
+FINAL_WINDOW = 48   # wider search for the item that closes the day
+CHOICES = 3         # other steps pick randomly among this many best candidates
+JITTER = 0.35       # other steps aim up to this much above or below their even share, for variety
+MAX_ATTEMPTS = 8
+MAX_MISSES = 20
+PLANS_PER_PROFILE = 50
+
+
+def meal_category(food: Dict[str, Any], tagger=None) -> str:
+    """The food's category if it is a meal category, else the tagger's category for its name"""
+    category = food.get("category", "")
+    if category in CATEGORY_SLOTS or tagger is None:
+        return category
+    return tagger.tag(food.get("name", ""))["category"]
+
+
+class PlanCandidates:
+    """
+    (food, portion) rows eligible for one profile and diet. Each row is its
+    contribution to the profile's targets, scaled by sqrt(weight), so the
+    plan error is a plain Euclidean distance.
+    """
+
+    def __init__(self, rel: List[Tuple[float, ...]], row_food: List[int], row_portion: List[int],
+                 slot_rows: List[List[int]], food_rows: Dict[int, List[int]], targets: Dict[str, float]):
+        self.rel = rel
+        self.row_food = row_food
+        self.row_portion = row_portion  # row in the portion table
+        self.slot_rows = slot_rows
+        self.slot_keys = [[rel[r][0] for r in rows] for rows in slot_rows]
+        self.food_rows = food_rows
+        self.targets = targets
+        # Slots no allowed food can fill; no plan can be drawn while any are left
+        self.empty_slots = [slot for (slot, _share, _items), rows in zip(MEAL_SLOTS, slot_rows) if not rows]
+
+
+class MealPlanner:
+    """Precomputed nutrient rows for a catalog; builds plans for any RDA profile"""
+
+    def __init__(self, foods: List[Dict[str, Any]], tagger=None):
+        self.foods = foods
+        self.table = PortionTable(build_portion_table(foods))
+        columns = {n: i for i, n in enumerate(self.table.nutrients)}
+        self.columns = [columns[n] for n, _weight in PLAN_NUTRIENTS]
+        # Weighted-space point where every target is met exactly
+        self.unit = [math.sqrt(weight) for _n, weight in PLAN_NUTRIENTS]
+        self.diets = [food_diet(food, tagger) for food in foods]
+        self.meal_categories = [meal_category(food, tagger) for food in foods]
+        slot_names = [slot for slot, _share, _items in MEAL_SLOTS]
+        self.food_slots = [[slot_names.index(s) for s in CATEGORY_SLOTS.get(category, slot_names)]
+                           for category in self.meal_categories]
+
+    def candidates(self, recommendation: Dict[str, Any], diet: str = "all",
+                   categories: Optional[Iterable[str]] = None,
+                   exclude_categories: Optional[Iterable[str]] = None) -> PlanCandidates:
+        """
+        Rows allowed by the diet and category constraints (matched against
+        the catalog or the meal category), scaled by the profile's daily targets
+        """
+        targets = {n: float(recommendation[n]) for n, _weight in PLAN_NUTRIENTS}
+        inverse = [u / targets[n] for u, (n, _weight) in zip(self.unit, PLAN_NUTRIENTS)]
+        include = set(categories) if categories else None
+        exclude = set(exclude_categories or [])
+        width = len(self.table.nutrients)
+        values, offsets = self.table.values, self.table.offsets
+
+        rel, row_food, row_portion = [], [], []
+        slot_rows: List[List[int]] = [[] for _ in MEAL_SLOTS]
+        food_rows: Dict[int, List[int]] = {}
+        for f, food in enumerate(self.foods):
+            names = {food.get("category", ""), self.meal_categories[f]}
+            if not diet_allows(diet, self.diets[f]) or names & exclude or (include and not names & include):
+                continue
+            for r in range(offsets[f], offsets[f + 1]):
+                contribution = tuple(values[r * width + c] * x for c, x in zip(self.columns, inverse))
+                # Foods with no calories cannot be placed by calorie share
+                if contribution[0] <= 0:
+                    continue
+                row = len(rel)
+                rel.append(contribution)
+                row_food.append(f)
+                row_portion.append(r)
+                food_rows.setdefault(f, []).append(row)
+                for s in self.food_slots[f]:
+                    slot_rows[s].append(row)
+        for rows in slot_rows:
+            rows.sort(key=lambda r: rel[r][0])
+        return PlanCandidates(rel, row_food, row_portion, slot_rows, food_rows, targets)
+
+    def plan(self, candidates: PlanCandidates, rng: random.Random) -> Optional[Tuple[List[Tuple[int, int]], List[float]]]:
+        """
+        One greedy plan as [(slot, row)] plus its totals as fractions of each
+        target, or None if a slot has no candidates or runs out of unused foods
+        """
+        rel, row_food, unit, dist = candidates.rel, candidates.row_food, self.unit, math.dist
+        totals = [0.0] * len(unit)
+        items: List[Tuple[int, int]] = []
+        used = set()
+        goal = 0.0
+        for s, (_slot, share, count) in enumerate(MEAL_SLOTS):
+            rows, keys = candidates.slot_rows[s], candidates.slot_keys[s]
+            if not rows:
+                return None
+            goal += share
+            final = s == len(MEAL_SLOTS) - 1
+            for left in range(count, 0, -1):
+                # What each remaining item of the slot should add to stay on track
+                closing = final and left == 1
+                scale = 1.0 if closing else 1.0 + rng.uniform(-JITTER, JITTER)
+                need = [(goal * u - t) * scale / left for u, t in zip(unit, totals)]
+                window = FINAL_WINDOW if closing else WINDOW
+                mid = bisect_left(keys, need[0])
+                scored = [(dist(rel[r], need), r) for r in rows[max(mid - window, 0):mid + window]
+                          if row_food[r] not in used]
+                if not scored:
+                    # Every food near the target is already planned: look across the whole slot
+                    scored = [(dist(rel[r], need), r) for r in rows if row_food[r] not in used]
+                if not scored:
+                    return None
+                if closing:
+                    row = min(scored)[1]
+                else:
+                    best = heapq.nsmallest(CHOICES, scored)
+                    row = best[rng.randrange(len(best))][1]
+                used.add(row_food[row])
+                items.append((s, row))
+                totals = [t + c for t, c in zip(totals, rel[row])]
+
+        # Swap each item to another standard portion of the same food while that helps
+        error = dist(totals, unit)
+        for i, (s, row) in enumerate(items):
+            for other in candidates.food_rows[row_food[row]]:
+                trial = [t - a + b for t, a, b in zip(totals, rel[items[i][1]], rel[other])]
+                trial_error = dist(trial, unit)
+                if trial_error < error:
+                    items[i], totals, error = (s, other), trial, trial_error
+        return items, [t / u for t, u in zip(totals, unit)]
+
+    def generate(self, candidates: PlanCandidates, count: int, seed: int = 0,
+                 tolerance: float = TOLERANCE) -> List[Dict[str, Any]]:
+        """
+        Up to count distinct plans whose calories and macros are all within
+        tolerance of the targets. Each plan gets MAX_ATTEMPTS draws; after
+        MAX_MISSES plans in a row come up empty the candidates are taken to
+        be exhausted (a narrow diet or category filter) and generation stops.
+        """
+        rng = random.Random(seed)
+        plans, seen = [], set()
+        misses = 0
+        while len(plans) < count and misses < MAX_MISSES:
+            misses += 1
+            for _attempt in range(MAX_ATTEMPTS):
+                result = self.plan(candidates, rng)
+                if result is None:
+                    return plans
+                items, totals = result
+                key = tuple(sorted(row for _s, row in items))
+                if key in seen or any(abs(t - 1.0) > tolerance for t in totals):
+                    continue
+                seen.add(key)
+                plans.append(self.describe(candidates, items, totals))
+                misses = 0
+                break
+        return plans
+
+    def describe(self, candidates: PlanCandidates, items: List[Tuple[int, int]], totals: List[float]) -> Dict[str, Any]:
+        """Serializable plan: [slot, food id, portion label, grams] items and absolute totals"""
+        table = self.table
+        described = []
+        for s, row in items:
+            portion = candidates.row_portion[row]
+            described.append([MEAL_SLOTS[s][0], self.foods[candidates.row_food[row]].get("id"), table.labels[portion],
+                              round(table.grams[portion], 1)])
+        return {
+            "items": described,
+            "totals": {n: round(t * candidates.targets[n], 1) for (n, _w), t in zip(PLAN_NUTRIENTS, totals)},
+        }
+
+
+def build_plan_library(planner: MealPlanner, recommendations: List[Dict[str, Any]], plans_per_profile: int,
+                       tolerance: float = TOLERANCE, seed: int = 0) -> Dict[str, Any]:
+    """plans_per_profile plans for every RDA profile and diet filter"""
+    profiles: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+    empty_slots: Dict[str, Dict[str, List[str]]] = {}
+    for p, recommendation in enumerate(recommendations):
+        by_diet = {}
+        for d, diet in enumerate(DIET_FILTERS):
+            candidates = planner.candidates(recommendation, diet)
+            by_diet[diet] = planner.generate(candidates, plans_per_profile, seed + p * len(DIET_FILTERS) + d, tolerance)
+            if candidates.empty_slots:
+                empty_slots.setdefault(profile_key(recommendation), {})[diet] = candidates.empty_slots
+        profiles[profile_key(recommendation)] = by_diet
+    return {
+        "version": 1,
+        "totalFoods": len(planner.foods),
+        "tolerance": tolerance,
+        "slots": [{"slot": slot, "calorieShare": share, "items": count} for slot, share, count in MEAL_SLOTS],
+        "nutrients": [n for n, _weight in PLAN_NUTRIENTS],
+        "plansPerProfile": plans_per_profile,
+        "emptySlots": empty_slots,
+        "profiles": profiles,
+    }
+
+
+def write_plan_library(library: Dict[str, Any], output_path: str) -> None:
+    """Write the plan library as a compact JSON artifact"""
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(library, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def main():
+    """Generate plans for one profile, or a foodPlanLibrary.json for every profile"""
+    import argparse
+    from goal_rankings import diet_tagger
+
+    repo_root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Generate daily meal plans that meet RDA targets")
+    parser.add_argument("--database", default=os.path.join(repo_root, "LOAF", "data", "foodDatabase.json"))
+    parser.add_argument("--rda", default=RDA_PATH)
+    parser.add_argument("--profile", default=None, help="e.g. 19-30_female; omit to build the whole library")
+    parser.add_argument("--diet", choices=DIET_FILTERS, default="all")
+    parser.add_argument("--categories", nargs="*", default=None, help="only use foods in these categories")
+    parser.add_argument("--exclude-categories", nargs="*", default=None)
+    parser.add_argument("--plans", type=int, default=PLANS_PER_PROFILE)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="defaults to foodPlanLibrary.json next to the database")
+    args = parser.parse_args()
+
+    with open(args.database, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+    foods = database.get("foods") or database.get("foodDatabase", {}).get("foods", [])
+    recommendations = load_json(args.rda, "recommendations")
+    planner = MealPlanner(foods, diet_tagger())
+
+    if args.profile:
+        matches = [r for r in recommendations if profile_key(r) == args.profile]
+        if not matches:
+            print(f"❌ Unknown profile {args.profile}; choose from {', '.join(profile_key(r) for r in recommendations)}")
+            return False
+        candidates = planner.candidates(matches[0], args.diet, args.categories, args.exclude_categories)
+        if candidates.empty_slots:
+            print(f"❌ No allowed foods for {', '.join(candidates.empty_slots)}; relax the diet or category filters")
+            return False
+        start = time.perf_counter()
+        plans = planner.generate(candidates, args.plans, args.seed, args.tolerance)
+        elapsed = time.perf_counter() - start
+        print(f"\n🍽️  {len(plans)}/{args.plans} plans within ±{args.tolerance:.0%} for {args.profile} ({args.diet}), "
+              f"{len(plans) / max(elapsed, 1e-9):.0f} plans/s")
+        for plan in plans[:3]:
+            print(f"  {plan['totals']}")
+            for slot, food_id, label, grams in plan["items"]:
+                print(f"    {slot:<10} {label:<15} {grams:>6}g  {food_id}")
+        if args.output:
+            write_plan_library({"version": 1, "profile": args.profile, "diet": args.diet, "plans": plans}, args.output)
+        return True
+
+    output_path = args.output or os.path.join(os.path.dirname(args.database), "foodPlanLibrary.json")
+    print(f"\n🍽️  Building {args.plans} plans per profile and diet for {len(recommendations)} profiles...")
+    start = time.perf_counter()
+    library = build_plan_library(planner, recommendations, args.plans, args.tolerance, args.seed)
+    elapsed = time.perf_counter() - start
+    write_plan_library(library, output_path)
+    total = sum(len(plans) for by_diet in library["profiles"].values() for plans in by_diet.values())
+    print(f"  ✅ {total} plans in {elapsed:.2f}s")
+    for profile, by_diet in library["emptySlots"].items():
+        for diet, slots in by_diet.items():
+            print(f"  ⚠️  {profile} ({diet}): no foods for {', '.join(slots)}")
+    print(f"  File size: {os.path.getsize(output_path) / 1024:.1f} KB")
+    return True
+
+
+if __name__ == "__main__":
+    main()
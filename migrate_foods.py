@@ -5,17 +5,44 @@ Migrates CSV food data into the JSON foodDatabase format
 Handles 300+ foods with all required fields
 """
 
+import argparse
 import json
-import csv
 import os
+from collections import Counter
+from itertools import chain
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+from build_cache import CACHE_DIR_NAME, BuildCache, cached, file_digest, rules_digest, write_if_changed
+from catalog_stream import WRAPPER_KEY, CatalogReader, NameIndex, empty_catalog_meta, write_catalog_stream
+from data_quality import quality_pass, write_quality_report
+from dedupe_foods import merge_near_duplicates, write_merge_report
+from food_ids import IdAllocator
+from food_schema import (NUTRITION_UNITS, REQUIRED_NUTRIENTS, SCHEMA_VERSION, CatalogValidationError, normalize_food,
+                         normalize_nutrition, validate_catalog, validated)
+from keyword_tagger import FoodTagger, KeywordAutomaton
+from nutrient_matrix import (NUTRITION_FIELDS, NutrientMatrix, parse_row_nutrition, read_csv_columns, row_dicts,
+                             sourced_nutrients)
+from parallel_ingest import map_chunks, resolve_workers
+from phonetic_index import spelling_variants
+from pipeline_metrics import PipelineMetrics, add_metrics_arguments, metrics_from_args, rejection_reason
+from portion_table import normalize_food_portions
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(REPO_ROOT, "Data")
+DB_PATH = os.path.join(REPO_ROOT, "LOAF", "data", "foodDatabase.json")
+CACHE_DIR = os.path.join(REPO_ROOT, CACHE_DIR_NAME)
 
 class FoodDatabaseMigrator:
-    def __init__(self):
-        self.food_counter = 4  # Starting from food_004 (first 3 already exist)
+    def __init__(self, cache: Optional[BuildCache] = None, metrics: Optional[PipelineMetrics] = None,
+                 workers: int = 1):
+        self.cache = cache
+        self.metrics = metrics or PipelineMetrics("migrate")
+        self.workers = workers  # Processes used to derive entries (0 = one per core)
+        self.ids = IdAllocator()  # Stable ids derived from source + canonical name
         self.processed_foods = set()  # Track duplicate foods
         self.aliases_map = self._build_aliases_map()
+        self.spelling_variants = self._build_spelling_variants()
         self.portion_defaults = {
             "beverages": {"1_cup": 240, "1_glass": 200, "half_cup": 120},
             "breakfast": {"1_serving": 100, "1_plate": 150, "half_plate": 75},
@@ -29,6 +56,9 @@ class FoodDatabaseMigrator:
             "grains": {"1_cup": 200, "1_serving": 100, "handful": 50},
         }
         self.category_keywords = self._build_category_keywords()
+        self.diet_keywords = self._build_diet_keywords()
+        self.allergen_keywords = self._build_allergen_keywords()
+        self.tagger = FoodTagger(self.category_keywords, self.diet_keywords, self.allergen_keywords)
         
     def _build_aliases_map(self) -> Dict[str, List[str]]:
         """Build a map of food names to their common aliases in Indian context"""
@@ -57,6 +87,10 @@ class FoodDatabaseMigrator:
             "juice": ["juice", "fresh juice", "orange juice", "mango juice"],
         }
         
+    def _build_spelling_variants(self) -> Dict[str, List[str]]:
+        """Alternate spellings of single words (khichdi / khichuri), never synonyms such as bread / roti"""
+        return spelling_variants()
+
     def _build_category_keywords(self) -> Dict[str, List[str]]:
         """Build category detection keywords"""
         return {
@@ -72,34 +106,47 @@ class FoodDatabaseMigrator:
             "dinner": ["dinner", "curry", "dal", "sabzi", "biryani", "pulao", "khichdi"],
         }
 
+    def _build_diet_keywords(self) -> Dict[str, List[str]]:
+        """Build diet detection keywords (matched as whole words)"""
+        return {
+            "non-vegetarian": ["chicken", "meat", "fish", "egg", "mutton", "omelette", "omelet", "keema",
+                               "prawn", "shrimp", "crab", "lobster", "beef", "pork", "lamb", "bacon",
+                               "salmon", "tuna", "turkey", "sausage", "gelatin"],
+            "vegan": ["vegan", "tofu"],
+            # Vetoes a vegan match (e.g. "tofu paneer"), as do milk, egg, fish and shellfish allergens
+            "animal-product": ["milk", "paneer", "ghee", "curd", "yogurt", "yoghurt", "cheese", "butter",
+                               "cream", "lassi", "raita", "kheer", "khoa", "khoya", "honey", "dahi", "malai"],
+        }
+
+    def _build_allergen_keywords(self) -> Dict[str, List[str]]:
+        """Build allergen detection keywords (matched as whole words)"""
+        return {
+            "milk": ["milk", "paneer", "ghee", "curd", "yogurt", "yoghurt", "cheese", "butter", "cream",
+                     "lassi", "raita", "kheer", "khoa", "khoya", "dahi", "malai", "kulfi", "rabri", "shake", "milkshake"],
+            "gluten": ["wheat", "atta", "maida", "roti", "chapati", "naan", "paratha", "parantha", "puri",
+                       "poori", "bhatura", "kulcha", "bread", "toast", "pasta", "noodle", "semolina", "suji",
+                       "sooji", "rava", "upma", "barley", "seviyan", "vermicelli", "biscuit", "cookie", "cake",
+                       "pastry", "samosa", "kachori", "pizza", "burger", "sandwich", "dalia", "daliya",
+                       "pancake", "waffle", "spaghetti", "macaroni", "pie", "pav", "bun", "crumb", "breadcrumb",
+                       "momo", "cutlet", "croissant", "muffin", "doughnut", "donut", "lasagna",
+                       "lasagne", "couscous", "bulgur", "crouton", "cracker", "rusk"],
+            "egg": ["egg", "omelette", "omelet", "mayonnaise"],
+            "fish": ["fish", "salmon", "tuna", "sardine", "mackerel", "pomfret", "rohu", "hilsa"],
+            "shellfish": ["prawn", "shrimp", "crab", "lobster", "oyster", "mussel", "clam"],
+            "tree-nuts": ["almond", "badam", "cashew", "kaju", "pistachio", "pista", "walnut", "akhrot"],
+            "peanuts": ["peanut", "groundnut", "moongphali"],
+            "soy": ["soy", "soya", "tofu"],
+            "sesame": ["sesame", "til", "gingelly"],
+            "mustard": ["mustard", "sarson"],
+        }
+
     def detect_category(self, food_name: str) -> str:
         """Detect category based on food name"""
-        food_lower = food_name.lower()
-        
-        # Check keywords
-        for category, keywords in self.category_keywords.items():
-            for keyword in keywords:
-                if keyword in food_lower:
-                    return category
-        
-        # Default based on common patterns
-        if any(x in food_lower for x in ["curry", "dal", "sabzi", "biryani", "khichdi"]):
-            return "lunch"
-        if any(x in food_lower for x in ["sandwich", "toast", "porridge"]):
-            return "breakfast"
-        
-        return "snacks"  # Default
+        return self.tagger.tag(food_name)["category"]
 
     def detect_diet_type(self, food_name: str) -> str:
         """Detect diet type (vegan, vegetarian, etc.)"""
-        food_lower = food_name.lower()
-        
-        if any(x in food_lower for x in ["chicken", "meat", "fish", "egg", "mutton"]):
-            return "non-vegetarian"
-        if any(x in food_lower for x in ["vegan", "tofu", "vegetable"]):
-            return "vegan"
-        
-        return "vegetarian"
+        return self.tagger.tag(food_name)["diet"]
 
     def generate_aliases(self, food_name: str) -> List[str]:
         """Generate aliases for a food item"""
@@ -108,6 +155,16 @@ class FoodDatabaseMigrator:
         # Add common variations
         name_parts = food_name.lower().split()
         
+        # Add alternate spellings of the same word (panir for paneer, khichuri for khichdi)
+        substitutions = 0
+        for i, part in enumerate(name_parts):
+            alternates = self.spelling_variants.get(part)
+            if alternates and substitutions < 2:
+                variant = " ".join(name_parts[:i] + [alternates[0]] + name_parts[i + 1:])
+                if variant not in aliases:
+                    aliases.append(variant)
+                    substitutions += 1
+        
         # Add individual word aliases
         for part in name_parts:
             if len(part) > 2 and part not in aliases:
@@ -148,83 +205,68 @@ class FoodDatabaseMigrator:
         return min(base_score, 0.99)
 
     def parse_nutrition(self, row: Dict[str, Any], source: str) -> Dict[str, Any]:
-        """Parse nutrition data based on source format"""
-        nutrition = {}
-        
-        # Common fields across sources
-        fields_map = {
-            "calories": ["Calories (kcal)", "calories", "Calories"],
-            "carbohydrates": ["Carbohydrates (g)", "carbs_g", "Carbohydrates"],
-            "protein": ["Protein (g)", "protein_g", "Proteins"],
-            "fat": ["Fats (g)", "fat_g", "Fats"],
-            "fiber": ["Fibre (g)", "fiber_g", "Fibre"],
-            "sugar": ["Free Sugar (g)", "sugar_g", "Sugars"],
-            "sodium": ["Sodium (mg)", "sodium_mg", "Sodium"],
-            "calcium": ["Calcium (mg)", None, "Calcium"],
-            "iron": ["Iron (mg)", None, "Iron"],
-            "vitaminC": ["Vitamin C (mg)", None, "Vitamin C"],
-            "folate": ["Folate (µg)", None, "Folate"],
-        }
-        
-        # Extract nutrition values
+        """Parse nutrition data for a single row (see NutrientMatrix for the bulk path)"""
         try:
-            for nutrient, possible_keys in fields_map.items():
-                value = None
-                for key in possible_keys:
-                    if key and key in row:
-                        try:
-                            value = float(row[key]) if row[key] else 0
-                            break
-                        except (ValueError, TypeError):
-                            continue
-                
-                if value is not None:
-                    if nutrient in ["carbohydrates", "protein", "fat", "fiber", "sugar", "sodium", "calcium", "iron", "vitaminC"]:
-                        if nutrient == "sodium":
-                            nutrition[nutrient] = {"value": round(value, 2), "unit": "mg"}
-                        elif nutrient == "calcium":
-                            nutrition[nutrient] = {"value": round(value, 2), "unit": "mg"}
-                        elif nutrient == "iron":
-                            nutrition[nutrient] = {"value": round(value, 2), "unit": "mg"}
-                        elif nutrient == "vitaminC":
-                            nutrition[nutrient] = {"value": round(value, 2), "unit": "mg"}
-                        elif nutrient in ["carbohydrates", "protein", "fat", "fiber", "sugar"]:
-                            nutrition[nutrient] = {"value": round(value, 2), "unit": "g"}
-                    elif nutrient == "folate":
-                        nutrition[nutrient] = {"value": round(value, 2), "unit": "µg"}
-                    elif nutrient == "calories":
-                        nutrition[nutrient] = round(value, 2)
+            return parse_row_nutrition(row)
         except Exception as e:
             print(f"Warning: Error parsing nutrition for {row.get('Dish Name', 'Unknown')}: {str(e)}")
-        
-        return nutrition
+            return {}
 
-    def create_food_entry(self, row: Dict[str, Any], source: str) -> Dict[str, Any]:
-        """Create a food entry from a CSV row"""
-        
-        # Determine food name
+    def rules_fingerprint(self) -> str:
+        """Fingerprint of everything derive_entry depends on (tables, and the modules holding the code)"""
+        return rules_digest(
+            self.category_keywords,
+            self.aliases_map,
+            self.spelling_variants,
+            self.portion_defaults,
+            self.diet_keywords,
+            self.allergen_keywords,
+            FoodTagger,
+            KeywordAutomaton,
+            FoodDatabaseMigrator.generate_aliases,
+            FoodDatabaseMigrator._build_spelling_variants,
+            FoodDatabaseMigrator.get_portion_hints,
+            FoodDatabaseMigrator.calculate_confidence,
+            FoodDatabaseMigrator.parse_nutrition,
+            FoodDatabaseMigrator.derive_entry,
+            FoodDatabaseMigrator.derive_rows,
+            NUTRITION_FIELDS,
+            NutrientMatrix,
+            normalize_nutrition,
+        )
+
+    @staticmethod
+    def food_name_from_row(row: Dict[str, Any]) -> str:
+        """Determine the food name of a CSV row, or None if the row has none"""
         if "Dish Name" in row:
-            food_name = row["Dish Name"].strip()
+            return row["Dish Name"].strip()
         elif "meal_name" in row:
-            food_name = row["meal_name"].strip()
+            return row["meal_name"].strip()
         elif "Food_items" in row:
-            food_name = row["Food_items"].strip()
-        else:
-            return None
-        
-        # Check for duplicates (case-insensitive)
-        food_key = food_name.lower()
-        if food_key in self.processed_foods:
+            return row["Food_items"].strip()
+        return None
+
+    def derive_entry(self, row: Dict[str, Any], source: str, nutrition: Optional[Dict[str, Any]] = None,
+                     complete: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Derive a food entry from a CSV row (everything except the id and
+        duplicate check). complete says whether every nutrient the source
+        has a column for was present; both are parsed from the row when not
+        given.
+        """
+        food_name = self.food_name_from_row(row)
+        if food_name is None:
             return None
+        if nutrition is None:
+            nutrition = self.parse_nutrition(row, source)
+        if complete is None:
+            complete = len(nutrition) == len(sourced_nutrients(list(row.keys())))
         
-        self.processed_foods.add(food_key)
+        tags = self.tagger.tag(food_name)
+        category = tags["category"]
+        diet_type = tags["diet"]
         
-        # Create food entry
-        category = self.detect_category(food_name)
-        diet_type = self.detect_diet_type(food_name)
-        
-        food_entry = {
-            "id": f"food_{self.food_counter:04d}",
+        return {
             "name": food_name,
             "aliases": self.generate_aliases(food_name),
             "category": category,
@@ -232,41 +274,124 @@ class FoodDatabaseMigrator:
             "servingSize": 100,
             "servingSizeUnit": "g" if "g" not in row.get("serving_size_g", "") else "g",
             "portionHints": self.get_portion_hints(category),
-            "nutrition": self.parse_nutrition(row, source),
+            "nutrition": nutrition,
             "isHealthy": str(row.get("is_healthy", "1")) != "0",
             "vegetarian": diet_type in ["vegetarian", "vegan"],
             "vegan": diet_type == "vegan",
-            "glutenFree": True,  # Default to True, can be refined
-            "allergens": [],
+            "glutenFree": tags["glutenFree"],
+            "allergens": tags["allergens"],
             "prepTime": int(row.get("prep_time_min", 5)) if row.get("prep_time_min") else 5,
             "cookTime": int(row.get("cook_time_min", 5)) if row.get("cook_time_min") else 5,
-            "confidence": self.calculate_confidence(source, len(self.parse_nutrition(row, source)) > 3),
+            "confidence": self.calculate_confidence(source, complete),
             "source": source,
             "lastVerified": "2026-01-15"
         }
+
+    def assign_entry(self, derived: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply the duplicate check and give a derived entry its id"""
+        if derived is None:
+            return None
+        
+        # Check for duplicates (case-insensitive)
+        food_key = derived["name"].lower()
+        if food_key in self.processed_foods:
+            return None
+        
+        self.processed_foods.add(food_key)
+        
+        food_entry = {"id": self.ids.allocate(derived["source"], derived["name"])}
+        food_entry.update(derived)
         
-        self.food_counter += 1
         return food_entry
 
+    def create_food_entry(self, row: Dict[str, Any], source: str) -> Dict[str, Any]:
+        """Create a food entry from a CSV row"""
+        food_name = self.food_name_from_row(row)
+        if food_name is None or food_name.lower() in self.processed_foods:
+            return None
+        return self.assign_entry(self.derive_entry(row, source))
+
+    def derive_from_csv(self, csv_path: str, source: str) -> Dict[str, Any]:
+        """Derive entries for every row of a CSV file, in file order, plus rejected row counts by reason"""
+        if resolve_workers(self.workers) == 1:
+            with self.metrics.stage(f"read-{source_slug(source)}") as stage:
+                header, raw_rows = read_csv_columns(csv_path)
+                stage.rows_in = stage.rows_out = len(raw_rows)
+            return self.derive_rows(header, raw_rows, source)
+        
+        # Workers use a default-configured migrator; chunks come back in file
+        # order, so concatenating them matches a serial pass
+        derived = {"entries": [], "rejected": {}}
+        for chunk in map_chunks(csv_path, _derive_chunk, (source,), self.workers):
+            derived["entries"].extend(chunk["entries"])
+            for reason, count in chunk["rejected"].items():
+                derived["rejected"][reason] = derived["rejected"].get(reason, 0) + count
+        return derived
+
+    def derive_rows(self, header: List[str], raw_rows: List[List[str]], source: str) -> Dict[str, Any]:
+        """Derive entries for already-read CSV rows, plus rejected row counts by reason"""
+        slug = source_slug(source)
+        # Parse all nutrients column-wise, then build entries
+        with self.metrics.stage(f"parse-{slug}") as stage:
+            matrix = NutrientMatrix.from_columns(header, raw_rows)
+            matrix.round()
+            completeness = matrix.completeness()
+            stage.rows_in = stage.rows_out = len(raw_rows)
+        
+        derived = []
+        rejected = {}
+        with self.metrics.stage(f"tag-{slug}") as stage:
+            for i, row in enumerate(row_dicts(header, raw_rows)):
+                try:
+                    nutrition = matrix.nutrition_dict(i)
+                    if not REQUIRED_NUTRIENTS <= normalize_nutrition(nutrition).keys():
+                        rejected["missing_macros"] = rejected.get("missing_macros", 0) + 1
+                        continue
+                    entry = self.derive_entry(row, source, nutrition, completeness[i] == len(matrix.sourced))
+                    if entry:
+                        derived.append(entry)
+                    else:
+                        rejected["missing_name"] = rejected.get("missing_name", 0) + 1
+                except Exception as e:
+                    print(f"  Warning: Error processing row from {source}: {str(e)}")
+                    reason = rejection_reason(e)
+                    rejected[reason] = rejected.get(reason, 0) + 1
+            # The rejections are reported once, by the migrate stage that also sees cache hits
+            stage.rows_in, stage.rows_out = len(raw_rows), len(derived)
+        return {"entries": derived, "rejected": rejected}
+
     def migrate_from_csv(self, csv_path: str, source: str) -> List[Dict[str, Any]]:
         """Migrate foods from CSV file"""
         foods = []
+        slug = source_slug(source)
         
+        # A cache miss records read / parse / tag stages of its own; this stage is the duplicate check
         try:
-            with open(csv_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    try:
-                        food_entry = self.create_food_entry(row, source)
-                        if food_entry:
-                            foods.append(food_entry)
-                            if len(foods) % 100 == 0:
-                                print(f"  Processed {len(foods)} foods from {source}...")
-                    except Exception as e:
-                        print(f"  Warning: Error processing row from {source}: {str(e)}")
-                        continue
+            key = file_digest(csv_path) + source + self.rules_fingerprint()
+            derived = cached(self.cache, f"migrate-{slug}", key,
+                             lambda: self.derive_from_csv(csv_path, source))
+            error = None
         except Exception as e:
-            print(f"Error reading {csv_path}: {str(e)}")
+            derived, error = None, e
+        
+        with self.metrics.stage(f"migrate-{slug}") as stage:
+            try:
+                if error is not None:
+                    raise error
+                stage.rows_in = len(derived["entries"]) + sum(derived["rejected"].values())
+                stage.reject_all(derived["rejected"])
+                for entry in derived["entries"]:
+                    food_entry = self.assign_entry(entry)
+                    if food_entry:
+                        foods.append(food_entry)
+                        if len(foods) % 100 == 0:
+                            print(f"  Processed {len(foods)} foods from {source}...")
+                    else:
+                        stage.reject("duplicate_name")
+            except Exception as e:
+                stage.reject(rejection_reason(e) + ":file")
+                print(f"Error reading {csv_path}: {str(e)}")
+            stage.rows_out = len(foods)
         
         return foods
 
@@ -300,11 +425,15 @@ class FoodDatabaseMigrator:
         merged = existing_foods.copy()
         duplicates_skipped = 0
         
-        for new_food in new_foods:
-            if new_food["name"].lower() not in existing_names:
-                merged.append(new_food)
-            else:
-                duplicates_skipped += 1
+        with self.metrics.stage("merge-existing") as stage:
+            for new_food in new_foods:
+                if new_food["name"].lower() not in existing_names:
+                    merged.append(new_food)
+                else:
+                    duplicates_skipped += 1
+            stage.rows_in, stage.rows_out = len(new_foods), len(merged) - len(existing_foods)
+            if duplicates_skipped:
+                stage.reject("already_in_database", duplicates_skipped)
         
         if duplicates_skipped > 0:
             print(f"⚠️  Skipped {duplicates_skipped} duplicate food entries")
@@ -312,52 +441,271 @@ class FoodDatabaseMigrator:
         return merged
 
 
-def main():
+def source_slug(source: str) -> str:
+    """Stage / cache name fragment for a source ("Healthy Eating Dataset" -> "healthy-eating-dataset")"""
+    return source.lower().replace(' ', '-')
+
+
+_WORKER_MIGRATOR: Optional[FoodDatabaseMigrator] = None
+
+
+def _derive_chunk(header: List[str], raw_rows: List[List[str]], source: str) -> Dict[str, Any]:
+    """Pool task: derive one chunk with a migrator built once per worker process"""
+    global _WORKER_MIGRATOR
+    if _WORKER_MIGRATOR is None:
+        _WORKER_MIGRATOR = FoodDatabaseMigrator()
+    return _WORKER_MIGRATOR.derive_rows(header, raw_rows, source)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line options for the migration"""
+    parser = argparse.ArgumentParser(description="Migrate CSV food data into foodDatabase.json")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="directory containing the source CSVs")
+    parser.add_argument("--database", default=DB_PATH, help="foodDatabase.json to merge into")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="incremental build cache location")
+    parser.add_argument("--no-cache", action="store_true", help="re-derive every source")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="derive large sources in this many processes (0 = one per core, default: 1)")
+    parser.add_argument("--merge-duplicates", action="store_true",
+                        help="fold near-duplicate foods across sources into a canonical record's aliases")
+    parser.add_argument("--merge-report", metavar="PATH", default=None,
+                        help="write the proposed near-duplicate merge groups to PATH")
+    parser.add_argument("--stream", action="store_true",
+                        help="merge without loading the existing database into memory")
+    parser.add_argument("--quality-check", action="store_true",
+                        help="quarantine migrated foods with impossible values and down-weight inconsistent ones")
+    parser.add_argument("--quality-report", metavar="PATH", default=None,
+                        help="write the data-quality findings for the migrated foods to PATH")
+    add_metrics_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Main migration script"""
+    args = parse_args(argv)
+    metrics = metrics_from_args("migrate", args)
+    try:
+        return migrate(args, metrics)
+    finally:
+        metrics.close()
+
+
+class CatalogStats:
+    """Category / source / confidence tallies, collected as foods go past"""
+
+    def __init__(self):
+        self.total = 0
+        self.categories = {}
+        self.sources = {}
+        self.confidence_sum = 0.0
+
+    def add(self, food: Dict[str, Any]) -> None:
+        self.total += 1
+        cat = food.get("category", "unknown")
+        self.categories[cat] = self.categories.get(cat, 0) + 1
+        src = food.get("source", "unknown")
+        self.sources[src] = self.sources.get(src, 0) + 1
+        self.confidence_sum += food.get("confidence", 0)
+
+    def tap(self, foods: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Pass foods through unchanged while counting them"""
+        for food in foods:
+            self.add(food)
+            yield food
+
+
+def load_existing_database(db_path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Whole existing database and its foods list, accepting both layouts"""
+    try:
+        with open(db_path, 'r', encoding='utf-8') as f:
+            existing_db = json.load(f)
+        # generate_food_db.py writes the foods at the top level, older migrations under "foodDatabase"
+        container = existing_db.get(WRAPPER_KEY, existing_db)
+        container.setdefault("foods", [])
+        print(f"   ✅ Loaded {len(container['foods'])} existing foods")
+        return existing_db, container["foods"]
+    except Exception as e:
+        print(f"   ⚠️  Could not load existing database: {str(e)}")
+        existing_db = empty_catalog_meta()
+        existing_db[WRAPPER_KEY]["foods"] = []
+        return existing_db, []
+
+
+def stream_merge(db_path: str, new_foods: List[Dict[str, Any]], stats: CatalogStats,
+                 metrics: PipelineMetrics) -> bool:
+    """
+    Merge new foods into the database without holding the existing catalog
+    in memory: one pass indexes existing names on disk, a second streams the
+    existing foods followed by the additions into the new file. Returns True
+    if the file was rewritten.
+    """
+    reader = CatalogReader(db_path)
+    names = NameIndex()
+    meta = empty_catalog_meta()
+    existing_count = 0
+    try:
+        with metrics.stage("index-existing") as stage:
+            try:
+                if os.path.exists(db_path):
+                    for food in reader.foods():
+                        names.add(food["name"])
+                    meta, existing_count = reader.meta, reader.count
+                    print(f"   ✅ Indexed {existing_count} existing foods")
+            except Exception as e:
+                print(f"   ⚠️  Could not read existing database: {str(e)}")
+                stage.reject(rejection_reason(e) + ":file")
+                meta, existing_count = empty_catalog_meta(), 0
+            stage.rows_in = stage.rows_out = existing_count
+
+        with metrics.stage("merge-existing") as stage:
+            additions = [food for food in new_foods if food["name"] not in names]
+            stage.rows_in, stage.rows_out = len(new_foods), len(additions)
+            skipped = len(new_foods) - len(additions)
+            if skipped:
+                stage.reject("already_in_database", skipped)
+                print(f"⚠️  Skipped {skipped} duplicate food entries")
+    finally:
+        names.close()
+
+    container = meta.get(WRAPPER_KEY, meta)
+    container.setdefault("foods", None)
+    container["totalFoods"] = existing_count + len(additions)
+    container["lastUpdated"] = "2026-01-15"
+    container["nutritionSchema"] = {"version": SCHEMA_VERSION, "units": NUTRITION_UNITS}
+
+    existing = reader.foods() if existing_count else iter(())
+    with metrics.stage("write-database") as stage:
+        # Existing foods are normalized and validated as they stream past; a bad row aborts the write
+        foods = map(normalize_food, map(normalize_food_portions, chain(existing, additions)))
+        written = write_catalog_stream(db_path, meta, stats.tap(validated(foods)))
+        stage.rows_in = stage.rows_out = container["totalFoods"]
+        stage.extra["written"] = written
+    return written
+
+
+def migrate(args: argparse.Namespace, metrics: PipelineMetrics) -> bool:
+    """Run the migration stages under metrics"""
     print("\n" + "="*80)
     print("🚀 FOOD DATABASE MIGRATION - STARTING")
     print("="*80)
     
     # Paths
-    data_dir = "/home/franz/Documents/LOAF/Data"
-    db_path = "/home/franz/Documents/LOAF/LOAF/data/foodDatabase.json"
+    data_dir = args.data_dir
+    db_path = args.database
     
-    # Load existing database
-    print("\n📂 Loading existing database...")
-    try:
-        with open(db_path, 'r', encoding='utf-8') as f:
-            existing_db = json.load(f)
-        existing_foods = existing_db["foodDatabase"]["foods"]
-        print(f"   ✅ Loaded {len(existing_foods)} existing foods")
-    except Exception as e:
-        print(f"   ⚠️  Could not load existing database: {str(e)}")
-        existing_foods = []
+    # Load existing database (in streaming mode it is only read while merging)
+    if args.stream:
+        print("\n📂 Existing database will be streamed during the merge")
+        existing_db, existing_foods = None, []
+    else:
+        print("\n📂 Loading existing database...")
+        existing_db, existing_foods = load_existing_database(db_path)
     
     # Migrate from CSVs
     print("\n🔄 Starting migration from CSV files...")
-    migrator = FoodDatabaseMigrator()
+    cache = None if args.no_cache else BuildCache(args.cache_dir)
+    migrator = FoodDatabaseMigrator(cache, metrics, args.workers)
     new_foods = migrator.migrate_all(data_dir)
     
-    print(f"\n📊 Migration Summary:")
-    print(f"   Total new foods migrated: {len(new_foods)}")
-    print(f"   Existing foods: {len(existing_foods)}")
+    if args.merge_duplicates or args.merge_report:
+        print("\n🧬 Detecting near-duplicates across sources...")
+        with metrics.stage("near-duplicates") as stage:
+            merged_foods, report = merge_near_duplicates(new_foods)
+            stage.rows_in, stage.rows_out = len(new_foods), len(merged_foods)
+            stage.extra["mergeGroups"] = len(report)
+        print(f"   ✅ {len(report)} merge groups proposed")
+        if args.merge_report:
+            write_merge_report(report, args.merge_report)
+        if args.merge_duplicates:
+            print(f"   ✅ Folded {len(new_foods) - len(merged_foods)} foods into aliases")
+            new_foods = merged_foods
     
-    # Merge
-    print("\n🔗 Merging with existing foods...")
-    all_foods = migrator.merge_with_existing(existing_foods, new_foods)
+    # Portion hints in grams, also for existing foods written with serving multipliers
+    with metrics.stage("normalize-portions") as stage:
+        for food in existing_foods + new_foods:
+            normalize_food_portions(food)
+        stage.rows_in = stage.rows_out = len(existing_foods) + len(new_foods)
+
+    # Canonical flat nutrition ({value, unit} objects and "carbohydrates" keys converted)
+    with metrics.stage("normalize-nutrition") as stage:
+        try:
+            for i, food in enumerate(existing_foods + new_foods):
+                normalize_food(food, i)
+        except CatalogValidationError as e:
+            print(f"   ❌ Invalid catalog, database not written: {e}")
+            return False
+        stage.rows_in = stage.rows_out = len(existing_foods) + len(new_foods)
+
+    # Energy / outlier / impossible-value checks on the foods this run derived
+    if args.quality_check or args.quality_report:
+        print("\n🩺 Checking data quality of migrated foods...")
+        with metrics.stage("data-quality") as stage:
+            checked_foods, quality_report = quality_pass(new_foods)
+            summary = quality_report["summary"]
+            stage.rows_in = len(new_foods)
+            stage.rows_out = len(checked_foods) if args.quality_check else len(new_foods)
+            quarantined = Counter(entry["flags"][0] for entry in quality_report["quarantined"])
+            if args.quality_check:
+                stage.reject_all(quarantined)
+            else:
+                # Report only: every food is kept, so the quarantine findings are flags, not rejections
+                stage.extra["flagged"] = dict(quarantined)
+            stage.extra["downweighted"] = summary["downweighted"]
+        print(f"   ✅ {summary['quarantined']} quarantined, {summary['downweighted']} down-weighted "
+              f"{'' if args.quality_check else '(report only, nothing changed) '}"
+              f"({', '.join(f'{check}: {count}' for check, count in summary['byCheck'].items()) or 'no flags'})")
+        if args.quality_report:
+            write_quality_report(quality_report, args.quality_report)
+        if args.quality_check:
+            new_foods = checked_foods
     
-    # Update database
-    print("\n💾 Updating database structure...")
-    existing_db["foodDatabase"]["foods"] = all_foods
-    existing_db["foodDatabase"]["totalFoods"] = len(all_foods)
-    existing_db["foodDatabase"]["lastUpdated"] = "2026-01-15"
+    print(f"\n📊 Migration Summary:")
+    print(f"   Total new foods migrated: {len(new_foods)}")
+    if not args.stream:
+        print(f"   Existing foods: {len(existing_foods)}")
     
-    # Save to file
-    print(f"\n💾 Saving to {db_path}...")
+    stats = CatalogStats()
     try:
-        with open(db_path, 'w', encoding='utf-8') as f:
-            json.dump(existing_db, f, ensure_ascii=False, indent=2)
-        print(f"   ✅ Database saved successfully!")
+        if args.stream:
+            # Merge and save in one streaming pass
+            print(f"\n🔗 Streaming merge into {db_path}...")
+            written = stream_merge(db_path, new_foods, stats, metrics)
+        else:
+            # Merge
+            print("\n🔗 Merging with existing foods...")
+            all_foods = migrator.merge_with_existing(existing_foods, new_foods)
+
+            print("\n🧪 Validating catalog schema...")
+            with metrics.stage("validate-schema") as stage:
+                stage.rows_in = len(all_foods)
+                stage.rows_out = validate_catalog(all_foods)
+            
+            # Update database
+            print("\n💾 Updating database structure...")
+            container = existing_db.get(WRAPPER_KEY, existing_db)
+            container["foods"] = all_foods
+            container["totalFoods"] = len(all_foods)
+            container["lastUpdated"] = "2026-01-15"
+            container["nutritionSchema"] = {"version": SCHEMA_VERSION, "units": NUTRITION_UNITS}
+            
+            # Save to file
+            print(f"\n💾 Saving to {db_path}...")
+            with metrics.stage("write-database") as stage:
+                payload = json.dumps(existing_db, ensure_ascii=False, indent=2).encode("utf-8")
+                written = write_if_changed(db_path, payload)
+                stage.rows_in = stage.rows_out = len(all_foods)
+                stage.extra.update(bytes=len(payload), written=written)
+            for food in all_foods:
+                stats.add(food)
+        if written:
+            print(f"   ✅ Database saved successfully!")
+        else:
+            print(f"   ✅ Database unchanged, not rewritten")
+        if cache is not None:
+            cache.save()
+    except CatalogValidationError as e:
+        print(f"   ❌ Invalid catalog, database not written: {e}")
+        return False
     except Exception as e:
         print(f"   ❌ Error saving database: {str(e)}")
         return False
@@ -367,35 +715,22 @@ def main():
     print("✅ MIGRATION COMPLETE")
     print("="*80)
     print(f"\n📊 FINAL STATISTICS:")
-    print(f"   Total foods in database: {len(all_foods)}")
+    print(f"   Total foods in database: {stats.total}")
     print(f"   Original foods: 3")
     print(f"   Migrated foods: {len(new_foods)}")
-    print(f"   Total unique foods: {len(all_foods)}")
+    print(f"   Total unique foods: {stats.total}")
     print(f"\n   Database size: {os.path.getsize(db_path) / 1024:.1f} KB")
     print(f"   File location: {db_path}")
     
     # Show some statistics
-    categories = {}
-    sources = {}
-    confidence_avg = 0
-    
-    for food in all_foods:
-        cat = food.get("category", "unknown")
-        categories[cat] = categories.get(cat, 0) + 1
-        
-        src = food.get("source", "unknown")
-        sources[src] = sources.get(src, 0) + 1
-        
-        confidence_avg += food.get("confidence", 0)
-    
-    confidence_avg /= len(all_foods)
+    confidence_avg = stats.confidence_sum / max(stats.total, 1)
     
     print(f"\n📈 BREAKDOWN BY CATEGORY:")
-    for cat, count in sorted(categories.items(), key=lambda x: x[1], reverse=True):
+    for cat, count in sorted(stats.categories.items(), key=lambda x: x[1], reverse=True):
         print(f"   {cat}: {count}")
     
     print(f"\n📊 BREAKDOWN BY SOURCE:")
-    for src, count in sorted(sources.items(), key=lambda x: x[1], reverse=True):
+    for src, count in sorted(stats.sources.items(), key=lambda x: x[1], reverse=True):
         print(f"   {src}: {count}")
     
     print(f"\n⭐ AVERAGE CONFIDENCE: {confidence_avg:.2f}")
@@ -0,0 +1,155 @@
+"""
+Columnar nutrient matrix for the ingest pipeline
+Reads a source CSV once into typed per-nutrient columns with missing-value
+masks, applies per-100 g conversion, rounding and completeness scoring a
+column at a time, and only builds per-food dicts at output time
+"""
+
+import csv
+from array import array
+from typing import Dict, List, Any, Optional, Tuple
+
+# (nutrient, candidate CSV columns in priority order, unit)
+NUTRITION_FIELDS: List[Tuple[str, List[str], str]] = [
+    ("calories", ["Calories (kcal)", "calories", "Calories"], "kcal"),
+    ("carbohydrates", ["Carbohydrates (g)", "carbs_g", "Carbohydrates"], "g"),
+    ("protein", ["Protein (g)", "protein_g", "Proteins"], "g"),
+    ("fat", ["Fats (g)", "fat_g", "Fats"], "g"),
+    ("fiber", ["Fibre (g)", "fiber_g", "Fibre"], "g"),
+    ("sugar", ["Free Sugar (g)", "sugar_g", "Sugars"], "g"),
+    ("sodium", ["Sodium (mg)", "sodium_mg", "Sodium"], "mg"),
+    ("calcium", ["Calcium (mg)", "Calcium"], "mg"),
+    ("iron", ["Iron (mg)", "Iron"], "mg"),
+    ("vitaminC", ["Vitamin C (mg)", "Vitamin C"], "mg"),
+    ("folate", ["Folate (µg)", "Folate"], "µg"),
+]
+
+ROUND_DIGITS = 2
+# Columns giving the grams a row's values describe (the healthy-eating source is per meal);
+# such rows are converted to per 100 g, and rows where the column is unusable keep no values
+SERVING_COLUMNS = ["serving_size_g"]
+
+
+def read_csv_columns(csv_path: str) -> Tuple[List[str], List[List[str]]]:
+    """Read a CSV once; returns the header and the raw rows (short rows padded)"""
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        width = len(header)
+        rows = [row + [""] * (width - len(row)) if len(row) < width else row for row in reader if row]
+    return header, rows
+
+
+def _parse_column(cells: List[str], values: array, mask: bytearray, pending: List[int]) -> List[int]:
+    """Parse the pending rows of one string column into values/mask; returns rows that failed"""
+    failed = []
+    for i in pending:
+        cell = cells[i]
+        if not cell:
+            # An empty cell is an unmeasured nutrient, not a zero; a later candidate column may have it
+            failed.append(i)
+            continue
+        try:
+            values[i] = float(cell)
+            mask[i] = 1
+        except ValueError:
+            failed.append(i)
+    return failed
+
+
+def sourced_nutrients(header: List[str], fields: List[Tuple[str, List[str], str]] = NUTRITION_FIELDS) -> List[str]:
+    """Nutrients with at least one candidate column in a CSV header"""
+    positions = set(header)
+    return [nutrient for nutrient, candidates, _unit in fields if positions.intersection(candidates)]
+
+
+def _grams(cell: str) -> Optional[float]:
+    """A positive serving size in grams, or None"""
+    try:
+        grams = float(cell)
+    except ValueError:
+        return None
+    return grams if grams > 0 else None
+
+
+class NutrientMatrix:
+    """Typed nutrient columns (array('d')) plus a presence mask per nutrient"""
+
+    def __init__(self, nutrients: List[str], units: List[str], rows: int):
+        self.nutrients = nutrients
+        self.units = units
+        self.rows = rows
+        # Nutrients the source file has a column for; a row is complete when all of them are present
+        self.sourced: List[str] = []
+        self.values: Dict[str, array] = {n: array('d', bytes(8 * rows)) for n in nutrients}
+        self.mask: Dict[str, bytearray] = {n: bytearray(rows) for n in nutrients}
+
+    @classmethod
+    def from_columns(cls, header: List[str], rows: List[List[str]],
+                     fields: List[Tuple[str, List[str], str]] = NUTRITION_FIELDS) -> "NutrientMatrix":
+        """Build the matrix from already-read CSV rows, resolving source columns once per file"""
+        positions = {name: i for i, name in enumerate(header)}
+        matrix = cls([f[0] for f in fields], [f[2] for f in fields], len(rows))
+        matrix.sourced = sourced_nutrients(header, fields)
+        if not rows:
+            return matrix
+
+        columns = list(zip(*rows))
+        for nutrient, candidates, _unit in fields:
+            pending = list(range(len(rows)))
+            for name in candidates:
+                if name not in positions or not pending:
+                    continue
+                pending = _parse_column(columns[positions[name]], matrix.values[nutrient], matrix.mask[nutrient], pending)
+        serving = next((positions[name] for name in SERVING_COLUMNS if name in positions), None)
+        if serving is not None:
+            matrix.per_100g([_grams(row[serving]) for row in rows])
+        return matrix
+
+    def per_100g(self, grams: List[Optional[float]]) -> None:
+        """Rescale each row from per-serving to per-100 g values; rows without grams lose their values"""
+        for nutrient in self.nutrients:
+            column, mask = self.values[nutrient], self.mask[nutrient]
+            for i, g in enumerate(grams):
+                if g is None:
+                    column[i], mask[i] = 0.0, 0
+                else:
+                    column[i] *= 100.0 / g
+
+    def round(self, digits: int = ROUND_DIGITS) -> None:
+        """Round every column in place"""
+        for nutrient, column in self.values.items():
+            self.values[nutrient] = array('d', [round(v, digits) for v in column])
+
+    def completeness(self) -> array:
+        """Number of present nutrients per row (compare with len(sourced))"""
+        counts = array('H', bytes(2 * self.rows))
+        for mask in self.mask.values():
+            for i, present in enumerate(mask):
+                if present:
+                    counts[i] += 1
+        return counts
+
+    def nutrition_dict(self, i: int) -> Dict[str, Any]:
+        """Per-food nutrition in the migrator's {value, unit} shape (calories stay a bare number)"""
+        nutrition: Dict[str, Any] = {}
+        for nutrient, unit in zip(self.nutrients, self.units):
+            if not self.mask[nutrient][i]:
+                continue
+            value = self.values[nutrient][i]
+            nutrition[nutrient] = value if nutrient == "calories" else {"value": value, "unit": unit}
+        return nutrition
+
+
+def row_dicts(header: List[str], rows: List[List[str]]) -> List[Dict[str, str]]:
+    """csv.DictReader-style rows built from already-read columns"""
+    return [dict(zip(header, row)) for row in rows]
+
+
+def parse_row_nutrition(row: Dict[str, Any],
+                        fields: List[Tuple[str, List[str], str]] = NUTRITION_FIELDS) -> Dict[str, Any]:
+    """Single-row fallback with the same semantics as the columnar path"""
+    header = list(row.keys())
+    matrix = NutrientMatrix.from_columns(header, [[row[k] if row[k] is not None else "" for k in header]], fields)
+    matrix.round()
+    return matrix.nutrition_dict(0)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Phonetic key index for Hinglish / transliterated food names
+Reduces names, aliases and queries to an Indic-aware phonetic key
+("paneer" / "panir", "chawal" / "chaval", "biryani" / "biriyani" all
+collapse to one key) and writes a key -> food index so spelling-variant
+lookups are a single dictionary probe
+"""
+
+import json
+import os
+import re
+import unicodedata
+from typing import Dict, List, Any, Tuple
+
+SCHEME = "indic-v1"
+MAX_POSTINGS = 50
+MIN_WORD_KEY = 3
+
+# Ordered rewrite rules, applied to each lowercased ASCII word
+PHONETIC_RULES: List[Tuple[re.Pattern, str]] = [(re.compile(p), r) for p, r in [
+    (r"chh|ch", "C"),         # ch / chh -> one symbol, so the plain c below can become k
+    (r"ph", "f"),
+    (r"sh", "s"),
+    (r"x", "ks"),
+    (r"ck|q|c", "k"),
+    (r"w", "v"),
+    (r"z", "j"),
+    (r"([kgbdtj])h", r"\1"),  # aspirated consonants: kh, gh, bh, dh, th, jh
+    (r"(?<=[^aeiouy])h|h$", ""),  # any other h after a consonant or at the end of a word
+    (r"ey$|ee|ie|ii|e|y", "i"),
+    (r"oo|ou|uu|o", "u"),
+    (r"aa", "a"),
+    (r"(.)\1+", r"\1"),       # doubled letters: lassi / lasi
+]]
+_NON_ALPHA_RE = re.compile(r"[^a-z]+")
+
+# Alternate spellings of one word. The migrator adds them as aliases and the index posts
+# every spelling, which covers the variants the rules do not fold (makhani / makhni)
+SPELLING_VARIANTS: List[List[str]] = [
+    ["khichdi", "khichri", "khichuri", "khichadi"],
+    ["chawal", "chaval"],
+    ["paneer", "panir"],
+    ["makhani", "makhni"],
+    ["dosa", "dosai"],
+    ["poha", "pohe"],
+    ["pulao", "pulav", "pilaf"],
+    ["biryani", "biriyani", "biriani"],
+]
+
+
+def rules_signature() -> List[Any]:
+    """Scheme name, rewrite rules and spelling variants, for build cache keys"""
+    return [SCHEME, [(pattern.pattern, replacement) for pattern, replacement in PHONETIC_RULES], SPELLING_VARIANTS]
+
+
+def spelling_variants() -> Dict[str, List[str]]:
+    """word -> its other spellings, for every word in SPELLING_VARIANTS"""
+    return {word: [w for w in group if w != word] for group in SPELLING_VARIANTS for word in group}
+
+
+def phonetic_word(word: str) -> str:
+    """Phonetic key of a single lowercased ASCII word"""
+    for pattern, replacement in PHONETIC_RULES:
+        word = pattern.sub(replacement, word)
+    return word.replace("C", "c")
+
+
+def phonetic_key(text: str) -> str:
+    """Phonetic key of a name, alias or query: per-word keys joined by single spaces"""
+    ascii_text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode("ascii").lower()
+    words = [w for w in _NON_ALPHA_RE.split(ascii_text) if w]
+    return " ".join(phonetic_word(w) for w in words)
+
+
+def _variant_keys(key: str, word_variants: Dict[str, List[str]]) -> List[str]:
+    """The key plus one key per alternate spelling of each of its words"""
+    words = key.split(" ")
+    keys = [key]
+    for i, word in enumerate(words):
+        for alternate in word_variants.get(word, []):
+            keys.append(" ".join(words[:i] + [alternate] + words[i + 1:]))
+    return keys
+
+
+def build_phonetic_index(foods: List[Dict[str, Any]], max_postings: int = MAX_POSTINGS) -> Dict[str, Any]:
+    """
+    Phrase keys (whole names / aliases, under every spelling in
+    SPELLING_VARIANTS) and word keys, each mapping to food positions
+    """
+    phrase_postings: Dict[str, List[int]] = {}
+    word_postings: Dict[str, List[int]] = {}
+    word_variants: Dict[str, List[str]] = {}
+    for group in SPELLING_VARIANTS:
+        keys = sorted({phonetic_word(w) for w in group})
+        for key in keys:
+            word_variants[key] = [k for k in keys if k != key]
+
+    def post(table: Dict[str, List[int]], key: str, idx: int) -> None:
+        postings = table.setdefault(key, [])
+        if not postings or postings[-1] != idx:
+            postings.append(idx)
+
+    for idx, food in enumerate(foods):
+        terms = [food.get("name", "")] + list(food.get("aliases", []))
+        for term in terms:
+            key = phonetic_key(term)
+            if not key:
+                continue
+            for variant in _variant_keys(key, word_variants):
+                post(phrase_postings, variant, idx)
+                for word in variant.split(" "):
+                    if len(word) >= MIN_WORD_KEY:
+                        post(word_postings, word, idx)
+
+    return {
+        "version": 1,
+        "scheme": SCHEME,
+        "totalFoods": len(foods),
+        "maxPostings": max_postings,
+        "foods": [food.get("id") for food in foods],
+        "phrases": {key: sorted(set(phrase_postings[key]))[:max_postings] for key in sorted(phrase_postings)},
+        "words": {key: sorted(set(word_postings[key]))[:max_postings] for key in sorted(word_postings)},
+    }
+
+
+def lookup(index: Dict[str, Any], query: str, limit: int = 20) -> List[str]:
+    """
+    Food ids whose name or alias sounds like the query. A whole-phrase hit
+    is a single probe; otherwise foods containing every word of the query
+    (by phonetic key) are returned as candidates.
+    """
+    key = phonetic_key(query)
+    if not key:
+        return []
+    food_ids = index["foods"]
+    if key in index["phrases"]:
+        return [food_ids[idx] for idx in index["phrases"][key][:limit]]
+
+    candidates = None
+    for word in key.split(" "):
+        if len(word) < MIN_WORD_KEY:
+            continue
+        postings = set(index["words"].get(word, []))
+        candidates = postings if candidates is None else candidates & postings
+        if not candidates:
+            return []
+    return [food_ids[idx] for idx in sorted(candidates or [])[:limit]]
+
+
+def write_phonetic_index(index: Dict[str, Any], output_path: str) -> None:
+    """Write the index as a compact JSON artifact"""
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def main():
+    """Build foodPhoneticIndex.json from an existing foodDatabase.json"""
+    import argparse
+
+    repo_root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Build the phonetic food name index artifact")
+    parser.add_argument("--database", default=os.path.join(repo_root, "LOAF", "data", "foodDatabase.json"))
+    parser.add_argument("--output", default=None, help="defaults to foodPhoneticIndex.json next to the database")
+    args = parser.parse_args()
+
+    output_path = args.output or os.path.join(os.path.dirname(args.database), "foodPhoneticIndex.json")
+
+    with open(args.database, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+    foods = database.get("foods") or database.get("foodDatabase", {}).get("foods", [])
+
+    print(f"\n🗣️  Building phonetic index for {len(foods)} foods...")
+    index = build_phonetic_index(foods)
+    write_phonetic_index(index, output_path)
+    print(f"  ✅ {len(index['phrases'])} phrase keys, {len(index['words'])} word keys")
+    print(f"  File size: {os.path.getsize(output_path) / 1024:.1f} KB")
+    return True
+
+
+if __name__ == "__main__":
+    main()
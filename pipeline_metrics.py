@@ -0,0 +1,178 @@
+"""
+Structured per-stage metrics for the food database pipeline
+Each stage runs inside PipelineMetrics.stage(), which records wall and CPU
+time, rows in/out, rejected rows by reason, throughput and the RSS
+high-water mark, and emits one JSON line per stage. cProfile and
+tracemalloc capture can be switched on per run for build dashboards.
+"""
+
+import cProfile
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Any, Iterator, Optional, TextIO
+
+TOP_ALLOCATIONS = 10
+
+
+def max_rss_kb() -> int:
+    """Process RSS high-water mark in KB (ru_maxrss is bytes on macOS, KB on Linux)"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def rejection_reason(error: Exception) -> str:
+    """Stable rejection reason for a row that raised while being processed"""
+    return f"error:{type(error).__name__}"
+
+
+class StageMetrics:
+    """Counters one stage fills in while it runs"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows_in = 0
+        self.rows_out = 0
+        self.rejected: Counter = Counter()
+        self.extra: Dict[str, Any] = {}
+
+    def reject(self, reason: str, count: int = 1) -> None:
+        self.rejected[reason] += count
+
+    def reject_all(self, reasons: Dict[str, int]) -> None:
+        """Merge a {reason: count} mapping (e.g. one restored from the build cache)"""
+        self.rejected.update(reasons)
+
+
+class PipelineMetrics:
+    """
+    Wraps pipeline stages and writes their metrics as JSON lines.
+    Metrics go to output (a path, "-" for stderr, or None to only keep them
+    in memory). With profile_dir set each stage also dumps a cProfile .prof
+    file there; with trace_memory each stage reports its traced peak and
+    top allocation sites.
+    """
+
+    def __init__(self, run: str, output: Optional[str] = None, profile_dir: Optional[str] = None,
+                 trace_memory: bool = False):
+        self.run = run
+        self.output = output
+        self.profile_dir = profile_dir
+        self.trace_memory = trace_memory
+        self.records: List[Dict[str, Any]] = []
+        self._stream: Optional[TextIO] = None
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        self.records.append(record)
+        if self.output is None:
+            return
+        if self._stream is None:
+            if self.output == "-":
+                self._stream = sys.stderr
+            else:
+                os.makedirs(os.path.dirname(self.output) or ".", exist_ok=True)
+                self._stream = open(self.output, 'a', encoding='utf-8')
+        self._stream.write(json.dumps(record, ensure_ascii=False, sort_keys=True) + "\n")
+        self._stream.flush()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageMetrics]:
+        """Measure the enclosed block as one stage; the yielded StageMetrics collects row counts"""
+        stage = StageMetrics(name)
+        profiler = None
+        if self.profile_dir:
+            profiler = cProfile.Profile()
+        started_tracing = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        status = "ok"
+        if profiler:
+            profiler.enable()
+        try:
+            yield stage
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            if profiler:
+                profiler.disable()
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+
+            record: Dict[str, Any] = {
+                "run": self.run,
+                "stage": name,
+                "status": status,
+                "wallSeconds": round(wall, 6),
+                "cpuSeconds": round(cpu, 6),
+                "rowsIn": stage.rows_in,
+                "rowsOut": stage.rows_out,
+                "rejected": dict(stage.rejected),
+                "rowsPerSecond": round(stage.rows_in / wall, 1) if wall > 0 else None,
+                "maxRssKB": max_rss_kb(),
+            }
+            if profiler:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                profile_path = os.path.join(self.profile_dir, f"{self.run}-{name}.prof")
+                profiler.dump_stats(profile_path)
+                record["profile"] = profile_path
+            if self.trace_memory:
+                record["tracedPeakBytes"] = tracemalloc.get_traced_memory()[1]
+                top = tracemalloc.take_snapshot().compare_to(before, "lineno")[:TOP_ALLOCATIONS]
+                record["topAllocations"] = [
+                    {"site": str(diff.traceback[0]), "sizeDiffBytes": diff.size_diff, "countDiff": diff.count_diff}
+                    for diff in top
+                ]
+                if started_tracing:
+                    tracemalloc.stop()
+            record.update(stage.extra)
+            self._write(record)
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals across all stages recorded so far"""
+        rejected: Counter = Counter()
+        for record in self.records:
+            rejected.update(record["rejected"])
+        return {
+            "run": self.run,
+            "stage": "total",
+            "stages": len(self.records),
+            "wallSeconds": round(sum(r["wallSeconds"] for r in self.records), 6),
+            "cpuSeconds": round(sum(r["cpuSeconds"] for r in self.records), 6),
+            "rejected": dict(rejected),
+            "maxRssKB": max_rss_kb(),
+        }
+
+    def close(self) -> None:
+        """Emit the summary line and release the output file"""
+        if self.records:
+            self._write(self.summary())
+        if self._stream is not None and self._stream is not sys.stderr:
+            self._stream.close()
+        self._stream = None
+
+
+def add_metrics_arguments(parser) -> None:
+    """Shared --metrics / --profile-dir / --trace-memory options"""
+    parser.add_argument("--metrics", metavar="PATH", default=None,
+                        help="append per-stage JSON-lines metrics to PATH ('-' for stderr)")
+    parser.add_argument("--profile-dir", metavar="DIR", default=None,
+                        help="write a cProfile .prof file per stage to DIR")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="record tracemalloc peak and top allocation sites per stage (slow)")
+
+
+def metrics_from_args(run: str, args) -> PipelineMetrics:
+    return PipelineMetrics(run, args.metrics, args.profile_dir, args.trace_memory)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Portion normalization and pre-scaled per-portion nutrient tables
+Normalizes every food's portionHints to grams (the generator writes
+serving multipliers such as "1x": 1.0, the migrator writes grams) and
+builds a dense, array-backed table of nutrients already scaled to each
+(food, portion), so logging a standard portion is a table read
+"""
+
+import json
+import os
+import re
+from array import array
+from typing import Dict, List, Any, Optional, Tuple
+
+from similarity_index import b64_array, unb64_array
+
+# Serving size assumed for multiplier hints when a food has no servingSize
+DEFAULT_SERVING_GRAMS = 150
+# Nutrient columns, in the order of CalculatedNutrition in utils/nutritionCalculator.ts
+TABLE_NUTRIENTS = ["calories", "protein", "carbs", "fat", "fiber", "iron", "calcium", "vitaminD_ug"]
+# Alternative keys the producers use for the same nutrient
+_NUTRIENT_KEYS = {
+    "carbs": ["carbs", "carbohydrates"],
+    "vitaminD_ug": ["vitaminD_ug", "vitaminD"],
+}
+MULTIPLIER_LABELS = {1.0: "1_serving", 0.5: "0.5_serving", 2.0: "double_serving"}
+
+_MULTIPLIER_KEY_RE = re.compile(r"^(\d+(?:\.\d+)?)x$")
+
+
+def is_multiplier_hints(hints: Dict[str, Any]) -> bool:
+    """True for multiplier-style hints ({"1x": 1.0, "0.5x": 0.5, ...})"""
+    return bool(hints) and all(_MULTIPLIER_KEY_RE.match(key) for key in hints)
+
+
+def normalize_portion_hints(hints: Optional[Dict[str, Any]], serving_grams: Optional[float] = None) -> Dict[str, float]:
+    """
+    Portion hints as {label: grams}. Multiplier hints are scaled by the
+    serving size and relabelled ("1x" -> "1_serving"); gram hints are kept,
+    dropping non-positive or non-numeric values.
+    """
+    serving = serving_grams or DEFAULT_SERVING_GRAMS
+    if not hints:
+        return {"1_serving": serving}
+    if is_multiplier_hints(hints):
+        normalized = {}
+        for key, multiplier in hints.items():
+            multiplier = float(multiplier)
+            label = MULTIPLIER_LABELS.get(multiplier, f"{multiplier:g}_serving")
+            grams = round(serving * multiplier, 1)
+            normalized[label] = int(grams) if grams.is_integer() else grams
+        return normalized
+    return {key: grams for key, grams in hints.items()
+            if isinstance(grams, (int, float)) and not isinstance(grams, bool) and grams > 0}
+
+
+def normalize_food_portions(food: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize one food's portionHints in place; returns the food"""
+    food["portionHints"] = normalize_portion_hints(food.get("portionHints"), food.get("servingSize"))
+    return food
+
+
+def nutrient_per_100g(nutrition: Dict[str, Any], nutrient: str) -> float:
+    """Per-100 g value of a nutrient from either nutrition shape (flat or {value, unit})"""
+    for key in _NUTRIENT_KEYS.get(nutrient, [nutrient]):
+        value = nutrition.get(key)
+        if isinstance(value, dict):
+            value = value.get("value")
+        if isinstance(value, (int, float)):
+            return float(value)
+    return 0.0
+
+
+def build_portion_table(foods: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Dense table with one row per (food, portion): offsets[i]..offsets[i + 1]
+    are the rows of foods[i]; values holds len(nutrients) float32s per row,
+    already scaled to that portion's grams.
+    """
+    offsets, grams, values = array('I', [0]), array('f'), array('f')
+    labels: List[str] = []
+    for food in foods:
+        per_100g = [nutrient_per_100g(food.get("nutrition", {}), n) for n in TABLE_NUTRIENTS]
+        hints = normalize_portion_hints(food.get("portionHints"), food.get("servingSize"))
+        for label, portion_grams in hints.items():
+            factor = portion_grams / 100.0
+            labels.append(label)
+            grams.append(portion_grams)
+            values.extend(v * factor for v in per_100g)
+        offsets.append(len(labels))
+
+    return {
+        "version": 1,
+        "totalFoods": len(foods),
+        "totalPortions": len(labels),
+        "nutrients": TABLE_NUTRIENTS,
+        "foods": [food.get("id") for food in foods],
+        "labels": labels,
+        "offsets": b64_array(offsets),
+        "grams": b64_array(grams),
+        "values": b64_array(values),
+    }
+
+
+class PortionTable:
+    """Loaded portion table; portion_nutrition is a slice read, no per-nutrient scaling"""
+
+    def __init__(self, table: Dict[str, Any]):
+        self.nutrients = table["nutrients"]
+        self.labels = table["labels"]
+        self.offsets = unb64_array('I', table["offsets"])
+        self.grams = unb64_array('f', table["grams"])
+        self.values = unb64_array('f', table["values"])
+        self.rows = {food_id: i for i, food_id in enumerate(table["foods"])}
+
+    def portions(self, food_id: str) -> List[Tuple[str, float]]:
+        i = self.rows.get(food_id)
+        if i is None:
+            return []
+        return [(self.labels[r], self.grams[r]) for r in range(self.offsets[i], self.offsets[i + 1])]
+
+    def portion_nutrition(self, food_id: str, label: str) -> Optional[Dict[str, float]]:
+        """Nutrients for one standard portion of a food, or None if unknown"""
+        i = self.rows.get(food_id)
+        if i is None:
+            return None
+        width = len(self.nutrients)
+        for r in range(self.offsets[i], self.offsets[i + 1]):
+            if self.labels[r] == label:
+                return dict(zip(self.nutrients, self.values[r * width:(r + 1) * width]))
+        return None
+
+
+def write_portion_table(table: Dict[str, Any], output_path: str) -> None:
+    """Write the table as a compact JSON artifact"""
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(table, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def main():
+    """Build foodPortionTable.json from an existing foodDatabase.json"""
+    import argparse
+
+    repo_root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Build the per-portion nutrient table artifact")
+    parser.add_argument("--database", default=os.path.join(repo_root, "LOAF", "data", "foodDatabase.json"))
+    parser.add_argument("--output", default=None, help="defaults to foodPortionTable.json next to the database")
+    args = parser.parse_args()
+
+    output_path = args.output or os.path.join(os.path.dirname(args.database), "foodPortionTable.json")
+
+    with open(args.database, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+    foods = database.get("foods") or database.get("foodDatabase", {}).get("foods", [])
+
+    print(f"\n🍱 Building portion table for {len(foods)} foods...")
+    table = build_portion_table(foods)
+    write_portion_table(table, output_path)
+    print(f"  ✅ {table['totalPortions']} portions x {len(table['nutrients'])} nutrients")
+    print(f"  File size: {os.path.getsize(output_path) / 1024:.1f} KB")
+    return True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Publish the generated food catalog to the Postgres / Supabase backend
+Streams foods from foodDatabase.json, compares each food's content hash
+with the hash stored on the server, and writes only new or changed rows:
+batches are COPY'd into a temp staging table and upserted from there, all
+inside one transaction on a pooled connection, so a failed publish leaves
+the server catalog untouched
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import os
+from contextlib import contextmanager
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+try:
+    import psycopg2  # optional, only needed to talk to the server
+    from psycopg2 import pool, sql
+except ImportError:
+    psycopg2 = None
+
+from catalog_diff import canonical_food
+from catalog_stream import CatalogReader
+from pipeline_metrics import PipelineMetrics, add_metrics_arguments, metrics_from_args
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(REPO_ROOT, "LOAF", "data", "foodDatabase.json")
+DSN_ENV_VARS = ["LOAF_DATABASE_URL", "DATABASE_URL"]
+DEFAULT_TABLE = "food_catalog"
+BATCH_ROWS = 2000
+COLUMNS = ["id", "name", "category", "source", "confidence", "data", "content_hash", "catalog_version"]
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS {table} (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    category TEXT,
+    source TEXT,
+    confidence REAL,
+    data JSONB NOT NULL,
+    content_hash TEXT NOT NULL,
+    catalog_version TEXT,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE TABLE IF NOT EXISTS {meta} (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+STAGE_SQL = """
+CREATE TEMP TABLE {stage} (
+    id TEXT,
+    name TEXT,
+    category TEXT,
+    source TEXT,
+    confidence REAL,
+    data JSONB,
+    content_hash TEXT,
+    catalog_version TEXT
+) ON COMMIT DROP
+"""
+UPSERT_SQL = """
+INSERT INTO {table} (id, name, category, source, confidence, data, content_hash, catalog_version, updated_at)
+SELECT id, name, category, source, confidence, data, content_hash, catalog_version, now() FROM {stage}
+ON CONFLICT (id) DO UPDATE SET
+    name = EXCLUDED.name,
+    category = EXCLUDED.category,
+    source = EXCLUDED.source,
+    confidence = EXCLUDED.confidence,
+    data = EXCLUDED.data,
+    content_hash = EXCLUDED.content_hash,
+    catalog_version = EXCLUDED.catalog_version,
+    updated_at = now()
+WHERE {table}.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+"""
+
+
+def resolve_dsn(dsn: Optional[str] = None) -> Optional[str]:
+    """Explicit DSN, else the first of the DSN environment variables that is set"""
+    if dsn:
+        return dsn
+    for name in DSN_ENV_VARS:
+        if os.environ.get(name):
+            return os.environ[name]
+    return None
+
+
+def catalog_rows(foods: Iterable[Dict[str, Any]], version: str) -> Iterator[Tuple[Any, ...]]:
+    """Table rows (in COLUMNS order) for a stream of foods"""
+    for food in foods:
+        data = canonical_food(food)
+        yield (food["id"], food["name"], food.get("category"), food.get("source"), food.get("confidence"),
+               data.decode("utf-8"), hashlib.sha256(data).hexdigest(), version)
+
+
+def content_hash(hashes: Dict[str, str]) -> str:
+    """Order-independent hash of a whole catalog from its per-food hashes"""
+    digest = hashlib.sha256()
+    for food_id in sorted(hashes):
+        digest.update(f"{food_id}\t{hashes[food_id]}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _copy_buffer(rows: List[Tuple[Any, ...]]) -> io.StringIO:
+    """CSV text for COPY ... FROM STDIN (None becomes an unquoted empty field, i.e. NULL)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows(rows)
+    buffer.seek(0)
+    return buffer
+
+
+class CatalogPublisher:
+    """Pooled connections to the backend and the publish transaction"""
+
+    def __init__(self, dsn: str, table: str = DEFAULT_TABLE, batch_rows: int = BATCH_ROWS, max_connections: int = 2):
+        if psycopg2 is None:
+            raise RuntimeError("psycopg2 is not installed (pip install psycopg2-binary)")
+        self.pool = pool.SimpleConnectionPool(1, max_connections, dsn)
+        self.table = table
+        self.batch_rows = batch_rows
+        self.names = {
+            "table": sql.Identifier(table),
+            "meta": sql.Identifier(f"{table}_meta"),
+            "stage": sql.Identifier(f"{table}_stage"),
+            "seen": sql.Identifier(f"{table}_seen"),
+        }
+
+    def close(self) -> None:
+        self.pool.closeall()
+
+    @contextmanager
+    def transaction(self):
+        """A pooled connection inside one transaction: committed on success, rolled back on any error"""
+        conn = self.pool.getconn()
+        try:
+            with conn:
+                with conn.cursor() as cur:
+                    yield conn, cur
+        finally:
+            self.pool.putconn(conn)
+
+    def _sql(self, template: str) -> "sql.Composed":
+        return sql.SQL(template).format(**self.names)
+
+    def server_hashes(self, conn) -> Dict[str, str]:
+        """id -> content_hash of every food on the server, read through a server-side cursor"""
+        hashes: Dict[str, str] = {}
+        with conn.cursor(name="catalog_hashes") as cur:
+            cur.itersize = 10000
+            cur.execute(self._sql("SELECT id, content_hash FROM {table}"))
+            for food_id, digest in cur:
+                hashes[food_id] = digest
+        return hashes
+
+    def _copy(self, cur, target: str, columns: List[str], rows: List[Tuple[Any, ...]]) -> None:
+        statement = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+            self.names[target], sql.SQL(", ").join(map(sql.Identifier, columns)))
+        cur.copy_expert(statement.as_string(cur), _copy_buffer(rows))
+
+    def publish(self, foods: Iterable[Dict[str, Any]], version: str, prune: bool = False,
+                dry_run: bool = False, metrics: Optional[PipelineMetrics] = None) -> Dict[str, Any]:
+        """
+        Write new and changed foods (and with prune, delete server foods that
+        are no longer in the catalog) in a single transaction. A dry run
+        computes the same counts and rolls back without writing.
+        """
+        metrics = metrics or PipelineMetrics("publish")
+        counts = {"total": 0, "added": 0, "changed": 0, "unchanged": 0, "removed": 0}
+        with self.transaction() as (conn, cur):
+            cur.execute(self._sql(SCHEMA_SQL))
+            # One publisher at a time; readers are not blocked
+            cur.execute(self._sql("LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE"))
+            with metrics.stage("server-hashes") as stage:
+                server = self.server_hashes(conn)
+                stage.rows_in = stage.rows_out = len(server)
+
+            local: Dict[str, str] = {}
+            with metrics.stage("upsert") as stage:
+                cur.execute(self._sql(STAGE_SQL))
+                batch: List[Tuple[Any, ...]] = []
+                for row in catalog_rows(foods, version):
+                    food_id, digest = row[0], row[6]
+                    local[food_id] = digest
+                    counts["total"] += 1
+                    previous = server.get(food_id)
+                    if previous == digest:
+                        counts["unchanged"] += 1
+                        continue
+                    counts["added" if previous is None else "changed"] += 1
+                    batch.append(row)
+                    if len(batch) >= self.batch_rows:
+                        self._flush(cur, batch, dry_run)
+                        batch = []
+                self._flush(cur, batch, dry_run)
+                stage.rows_in = counts["total"]
+                stage.rows_out = counts["added"] + counts["changed"]
+
+            if prune:
+                with metrics.stage("prune") as stage:
+                    removed = [food_id for food_id in server if food_id not in local]
+                    counts["removed"] = len(removed)
+                    stage.rows_in, stage.rows_out = len(server), len(removed)
+                    if removed and not local:
+                        raise ValueError("Refusing to prune every food: the catalog being published is empty")
+                    if removed and not dry_run:
+                        cur.execute(self._sql("CREATE TEMP TABLE {seen} (id TEXT PRIMARY KEY) ON COMMIT DROP"))
+                        self._copy(cur, "seen", ["id"], [(food_id,) for food_id in local])
+                        cur.execute(self._sql(
+                            "DELETE FROM {table} t WHERE NOT EXISTS (SELECT 1 FROM {seen} s WHERE s.id = t.id)"))
+
+            counts["contentHash"] = content_hash(local)
+            if dry_run:
+                conn.rollback()
+                return counts
+            meta = [("version", version), ("totalFoods", str(counts["total"])), ("contentHash", counts["contentHash"])]
+            cur.executemany(self._sql(
+                "INSERT INTO {meta} (key, value) VALUES (%s, %s) "
+                "ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value"), meta)
+        return counts
+
+    def _flush(self, cur, batch: List[Tuple[Any, ...]], dry_run: bool) -> None:
+        """COPY one batch into the staging table and upsert it"""
+        if not batch or dry_run:
+            return
+        self._copy(cur, "stage", COLUMNS, batch)
+        cur.execute(self._sql(UPSERT_SQL))
+        cur.execute(self._sql("TRUNCATE {stage}"))
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line options for the publisher"""
+    parser = argparse.ArgumentParser(description="Upsert foodDatabase.json into the Postgres / Supabase backend")
+    parser.add_argument("--database", default=DB_PATH, help="catalog to publish (either layout)")
+    parser.add_argument("--dsn", default=None,
+                        help=f"Postgres connection string (default: ${' or $'.join(DSN_ENV_VARS)})")
+    parser.add_argument("--table", default=DEFAULT_TABLE)
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS, help="rows per COPY batch")
+    parser.add_argument("--prune", action="store_true", help="delete server foods that are not in the catalog")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    add_metrics_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Publish the catalog"""
+    args = parse_args(argv)
+    metrics = metrics_from_args("publish", args)
+    try:
+        return publish(args, metrics)
+    finally:
+        metrics.close()
+
+
+def publish(args: argparse.Namespace, metrics: PipelineMetrics) -> bool:
+    """Run the publish under metrics; returns False on failure"""
+    print("\n" + "="*60)
+    print("📤 FOOD CATALOG PUBLISH")
+    print("="*60)
+
+    # The reader only knows the catalog's metadata once the foods have been read, and every row
+    # carries the version, so count and version come from a first pass over the file
+    reader = CatalogReader(args.database)
+    for _food in reader.foods():
+        pass
+    version = str(reader.container().get("version", ""))
+    print(f"\n📂 {reader.count} foods in {args.database} (version {version or 'unknown'})")
+
+    dsn = resolve_dsn(args.dsn)
+    if not dsn:
+        if args.dry_run:
+            # Nothing to compare against: report the catalog as it would land in an empty table
+            with metrics.stage("upsert") as stage:
+                hashes = {row[0]: row[6] for row in catalog_rows(reader.foods(), version)}
+                stage.rows_in = stage.rows_out = len(hashes)
+            print(f"\n  ⚠️  No database configured, all {len(hashes)} foods would be added to an empty table")
+            print(f"  Content hash: {content_hash(hashes)}")
+            return True
+        print(f"  ❌ No database configured: pass --dsn or set {' / '.join(DSN_ENV_VARS)}")
+        return False
+    if psycopg2 is None:
+        print("  ❌ psycopg2 is not installed (pip install psycopg2-binary)")
+        return False
+
+    publisher = None
+    try:
+        publisher = CatalogPublisher(dsn, args.table, args.batch_rows)
+        counts = publisher.publish(reader.foods(), version, args.prune, args.dry_run, metrics)
+    except Exception as e:
+        print(f"  ❌ Publish failed, server unchanged: {e}")
+        return False
+    finally:
+        if publisher is not None:
+            publisher.close()
+
+    verb = "would be" if args.dry_run else "were"
+    print(f"\n  ✅ {counts['added']} added, {counts['changed']} changed, {counts['removed']} removed "
+          f"{verb} written; {counts['unchanged']} unchanged")
+    print(f"  Content hash: {counts['contentHash']}")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    print("\n" + "="*60)
+    print("✅ Publish complete!" if success else "❌ Publish failed!")
+    print("="*60 + "\n")
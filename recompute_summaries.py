@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Batch recomputation of daily nutrition summaries from exported meal logs
+Joins meal_logs rows (user_id, date, food_id, portion_grams) against the
+per-100 g nutrient matrix of foodDatabase.json (translating food ids
+logged before a re-key through catalog patch idMaps) and rebuilds per-user,
+per-day totals and RDA gap percentages, so summaries can be refreshed for
+every user after a catalog correction. Logs are streamed and hash-
+partitioned by user into temp files, and each partition is aggregated a
+nutrient column at a time, so memory is bounded by the largest partition
+rather than by the export
+"""
+
+import argparse
+import csv
+import json
+import os
+import tempfile
+import zlib
+from array import array
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+from goal_rankings import RDA_PATH, load_json, profile_key
+from pipeline_metrics import PipelineMetrics, add_metrics_arguments, metrics_from_args
+from portion_table import TABLE_NUTRIENTS, nutrient_per_100g
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(REPO_ROOT, "LOAF", "data", "foodDatabase.json")
+DEFAULT_PROFILE = "19-30_female"
+PARTITIONS = 16
+# daily_nutrition_summary / meal_logs column for each catalog nutrient (see LOAF/src/db/db.ts)
+SUMMARY_COLUMNS = {n: ("vitamin_d_ug" if n == "vitaminD_ug" else n) for n in TABLE_NUTRIENTS}
+# Logged rows whose food is not in the catalog (custom foods) keep the nutrients stored with the log
+UNKNOWN_FOOD = -1
+
+
+class FoodMatrix:
+    """Per-gram nutrient columns for the catalog, addressed by food row"""
+
+    def __init__(self, foods: List[Dict[str, Any]]):
+        self.rows: Dict[str, int] = {}
+        self.columns = {n: array('d') for n in TABLE_NUTRIENTS}
+        for food in foods:
+            food_id = food.get("id")
+            if not food_id or food_id in self.rows:
+                continue
+            self.rows[food_id] = len(self.rows)
+            nutrition = food.get("nutrition", {})
+            for nutrient, column in self.columns.items():
+                column.append(nutrient_per_100g(nutrition, nutrient) / 100.0)
+
+
+def read_log_rows(path: str) -> Iterator[Dict[str, Any]]:
+    """Rows of a meal_logs export, CSV with a header or JSON lines (by extension)"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number == number else None
+
+
+def load_id_map(patch_paths: Optional[List[str]]) -> Dict[str, str]:
+    """
+    Old food id -> current id from catalog patches (catalog_diff.py), oldest
+    first, so logs written against positional ids (food_0000) join the
+    catalog's stable ids
+    """
+    id_map: Dict[str, str] = {}
+    for path in patch_paths or []:
+        with open(path, 'r', encoding='utf-8') as f:
+            step = json.load(f).get("idMap") or {}
+        id_map = {old: step.get(new, new) for old, new in id_map.items()}
+        for old, new in step.items():
+            id_map.setdefault(old, new)
+    return id_map
+
+
+def partition_logs(paths: List[str], matrix: FoodMatrix, workdir: str, partitions: int,
+                   default_user: str, id_map: Optional[Dict[str, str]] = None) -> Tuple[List[str], Dict[str, int]]:
+    """
+    First pass: resolve each log row to (user, date, food row, grams) and
+    append it to the partition file for its user, translating re-keyed food
+    ids through id_map. Rows for foods outside the catalog carry their
+    logged nutrients instead of a food row.
+    """
+    id_map = id_map or {}
+    paths_out = [os.path.join(workdir, f"part-{p:03d}.csv") for p in range(partitions)]
+    files = [open(p, 'w', encoding='utf-8', newline='') for p in paths_out]
+    writers = [csv.writer(f) for f in files]
+    counts = {"rows": 0, "remapped": 0, "unknownFoods": 0, "skipped": 0}
+    logged = [SUMMARY_COLUMNS[n] for n in TABLE_NUTRIENTS]
+    try:
+        for path in paths:
+            for row in read_log_rows(path):
+                counts["rows"] += 1
+                user = str(row.get("user_id") or default_user)
+                date = row.get("date")
+                grams = _number(row.get("portion_grams"))
+                if not date or grams is None or grams < 0:
+                    counts["skipped"] += 1
+                    continue
+                writer = writers[zlib.crc32(user.encode("utf-8")) % partitions]
+                food_id = row.get("food_id")
+                if food_id in id_map and food_id not in matrix.rows:
+                    food_id = id_map[food_id]
+                    counts["remapped"] += 1
+                food_row = matrix.rows.get(food_id)
+                if food_row is not None:
+                    writer.writerow((user, date, food_row, grams))
+                else:
+                    counts["unknownFoods"] += 1
+                    writer.writerow((user, date, UNKNOWN_FOOD, grams, *(_number(row.get(c)) or 0.0 for c in logged)))
+    finally:
+        for f in files:
+            f.close()
+    return paths_out, counts
+
+
+def summarize_partition(path: str, matrix: FoodMatrix) -> Iterator[Tuple[str, str, int, List[float]]]:
+    """
+    Second pass over one partition: group rows by (user, date) and sum each
+    nutrient column over the group ids; yields (user, date, meals, totals)
+    in user, date order
+    """
+    groups: Dict[Tuple[str, str], int] = {}
+    keys, food_rows, grams = array('l'), array('l'), array('d')
+    logged: Dict[int, List[float]] = {}
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for i, row in enumerate(csv.reader(f)):
+            keys.append(groups.setdefault((row[0], row[1]), len(groups)))
+            food_rows.append(int(row[2]))
+            grams.append(float(row[3]))
+            if len(row) > 4:
+                logged[i] = [float(v) for v in row[4:]]
+
+    size = len(groups)
+    meals = array('l', bytes(array('l').itemsize * size))
+    for g in keys:
+        meals[g] += 1
+    totals = []
+    for j, nutrient in enumerate(TABLE_NUTRIENTS):
+        column = matrix.columns[nutrient]
+        total = array('d', bytes(8 * size))
+        for g, r, w in zip(keys, food_rows, grams):
+            if r != UNKNOWN_FOOD:
+                total[g] += column[r] * w
+        for i, values in logged.items():
+            total[keys[i]] += values[j]
+        totals.append(total)
+
+    for (user, date), g in sorted(groups.items()):
+        yield user, date, meals[g], [total[g] for total in totals]
+
+
+def gap_percent(total: float, target: float) -> float:
+    """Share of the day's target still missing, 0 when met"""
+    return round(max(0.0, 100.0 * (1.0 - total / target)), 1) if target > 0 else 0.0
+
+
+def load_user_profiles(path: Optional[str]) -> Dict[str, str]:
+    """user_id -> RDA profile key from a CSV with user_id, age_group and gender columns"""
+    if not path:
+        return {}
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return {row["user_id"]: profile_key({"ageGroup": row["age_group"], "gender": row["gender"]})
+                for row in csv.DictReader(f)}
+
+
+def recompute(log_paths: List[str], foods: List[Dict[str, Any]], recommendations: List[Dict[str, Any]],
+              output_path: str, user_profiles: Optional[Dict[str, str]] = None,
+              default_profile: str = DEFAULT_PROFILE, partitions: int = PARTITIONS,
+              default_user: str = "local", metrics: Optional[PipelineMetrics] = None,
+              id_map: Optional[Dict[str, str]] = None) -> Dict[str, int]:
+    """Rebuild summaries from the logs into output_path (CSV); returns row counts"""
+    metrics = metrics or PipelineMetrics("summaries")
+    user_profiles = user_profiles or {}
+    targets = {profile_key(r): [float(r.get(n) or 0.0) for n in TABLE_NUTRIENTS] for r in recommendations}
+    if default_profile not in targets:
+        raise ValueError(f"Unknown RDA profile {default_profile!r} (have {', '.join(sorted(targets))})")
+
+    with metrics.stage("nutrient-matrix") as stage:
+        matrix = FoodMatrix(foods)
+        stage.rows_in, stage.rows_out = len(foods), len(matrix.rows)
+
+    columns = [SUMMARY_COLUMNS[n] for n in TABLE_NUTRIENTS]
+    header = ["user_id", "date", "meals", *columns, *(f"{c}_gap_pct" for c in columns), "rda_profile"]
+    counts = {"summaries": 0, "users": 0}
+    with tempfile.TemporaryDirectory(prefix="loaf-summaries-") as workdir:
+        with metrics.stage("partition") as stage:
+            parts, log_counts = partition_logs(log_paths, matrix, workdir, partitions, default_user, id_map)
+            stage.rows_in = log_counts["rows"]
+            stage.rows_out = log_counts["rows"] - log_counts["skipped"]
+            stage.reject("invalid-row", log_counts["skipped"])
+        counts.update(log_counts)
+
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        with metrics.stage("aggregate") as stage, open(output_path, 'w', encoding='utf-8', newline='') as out:
+            writer = csv.writer(out)
+            writer.writerow(header)
+            users = set()
+            for part in parts:
+                for user, date, meals, totals in summarize_partition(part, matrix):
+                    profile = user_profiles.get(user, default_profile)
+                    target = targets.get(profile) or targets[default_profile]
+                    rounded = [round(t) if n == "calories" else round(t, 2) for n, t in zip(TABLE_NUTRIENTS, totals)]
+                    gaps = [gap_percent(t, r) for t, r in zip(totals, target)]
+                    writer.writerow((user, date, meals, *rounded, *gaps, profile))
+                    users.add(user)
+                    counts["summaries"] += 1
+                os.remove(part)
+            counts["users"] = len(users)
+            stage.rows_in = stage.rows_out = counts["summaries"]
+    return counts
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line options for the recomputation"""
+    parser = argparse.ArgumentParser(description="Recompute daily nutrition summaries from exported meal logs")
+    parser.add_argument("logs", nargs="+", help="meal_logs exports (.csv with a header, or .jsonl)")
+    parser.add_argument("--database", default=DB_PATH)
+    parser.add_argument("--rda", default=RDA_PATH)
+    parser.add_argument("--users", default=None, help="CSV of user_id, age_group, gender for per-user RDA targets")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, help="RDA profile for users without one")
+    parser.add_argument("--default-user", default="local", help="user_id for exports without that column")
+    parser.add_argument("--partitions", type=int, default=PARTITIONS, help="user partitions (more = less memory)")
+    parser.add_argument("--id-map", action="append", default=None, metavar="PATCH",
+                        help="catalog patch whose idMap translates old food ids (repeat oldest first)")
+    parser.add_argument("--output", default="dailyNutritionSummaries.csv")
+    add_metrics_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Recompute summaries for every user in the exports"""
+    args = parse_args(argv)
+    metrics = metrics_from_args("summaries", args)
+    try:
+        with open(args.database, 'r', encoding='utf-8') as f:
+            database = json.load(f)
+        foods = database.get("foods") or database.get("foodDatabase", {}).get("foods", [])
+        recommendations = load_json(args.rda, "recommendations")
+        id_map = load_id_map(args.id_map)
+
+        print(f"\n📊 Recomputing daily summaries from {len(args.logs)} export(s) against {len(foods)} foods...")
+        try:
+            counts = recompute(args.logs, foods, recommendations, args.output, load_user_profiles(args.users),
+                               args.profile, max(1, args.partitions), args.default_user, metrics, id_map)
+        except (ValueError, KeyError) as e:
+            print(f"  ❌ Error: {e}")
+            return False
+        print(f"  ✅ {counts['summaries']} summaries for {counts['users']} users from {counts['rows']} log rows")
+        if counts["remapped"]:
+            print(f"  🔁 {counts['remapped']} rows joined through the patch idMap")
+        if counts["unknownFoods"]:
+            print(f"  ⚠️  {counts['unknownFoods']} rows for foods outside the catalog kept their logged nutrients")
+        if counts["skipped"]:
+            print(f"  ⚠️  {counts['skipped']} rows without a date or portion skipped")
+        print(f"  Output: {args.output}")
+        return True
+    finally:
+        metrics.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Offline character n-gram similarity index for the LOAF food database
+Builds TF-IDF char n-gram vectors for every food, stores them as a
+uint8-quantized CSR matrix and precomputes each food's nearest
+neighbours, so free-text dish names from image inference or chat can be
+matched to the catalog, and "similar foods" shown, without network calls
+"""
+
+import base64
+import heapq
+import json
+import math
+import os
+import re
+import sys
+from array import array
+from typing import Dict, List, Any, Tuple
+
+NGRAM_SIZE = 3
+QUANT_SCALE = 255
+TOP_K = 10
+MIN_SIMILARITY = 0.2
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+
+def _char_ngrams(text: str, size: int = NGRAM_SIZE) -> List[str]:
+    """n-grams of each word padded with '#', so word starts and ends carry weight"""
+    grams = []
+    for word in _NON_WORD_RE.split(text.lower()):
+        if not word:
+            continue
+        padded = f"#{word}#"
+        grams.extend(padded[i:i + size] for i in range(max(len(padded) - size + 1, 1)))
+    return grams
+
+
+def food_document(food: Dict[str, Any]) -> List[str]:
+    """n-grams of a food's name and distinct aliases"""
+    terms = [food.get("name", "")]
+    terms.extend(a for a in dict.fromkeys(food.get("aliases", [])) if a and a.lower() != terms[0].lower())
+    grams = []
+    for term in terms:
+        grams.extend(_char_ngrams(term))
+    return grams
+
+
+def _weights(grams: List[str], vocab: Dict[str, int], idf: List[float]) -> Dict[int, float]:
+    """L2-normalized sublinear TF-IDF weights over known features"""
+    counts: Dict[int, int] = {}
+    for gram in grams:
+        feature = vocab.get(gram)
+        if feature is not None:
+            counts[feature] = counts.get(feature, 0) + 1
+    weights = {f: (1.0 + math.log(c)) * idf[f] for f, c in counts.items()}
+    norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+    return {f: w / norm for f, w in weights.items()}
+
+
+def _quantize(weights: Dict[int, float]) -> List[Tuple[int, int]]:
+    return sorted((f, max(1, min(QUANT_SCALE, round(w * QUANT_SCALE)))) for f, w in weights.items())
+
+
+def b64_array(values: array) -> str:
+    """Base64 of an array's little-endian bytes, for arrays embedded in JSON artifacts"""
+    if sys.byteorder != "little" and values.itemsize > 1:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return base64.b64encode(values.tobytes()).decode("ascii")
+
+
+def unb64_array(typecode: str, text: str) -> array:
+    """Inverse of b64_array"""
+    values = array(typecode)
+    values.frombytes(base64.b64decode(text))
+    if sys.byteorder != "little" and values.itemsize > 1:
+        values.byteswap()
+    return values
+
+
+def _postings(indptr: array, indices: array, data: array, features: int) -> List[List[Tuple[int, int]]]:
+    """Inverted view of the CSR matrix: feature -> [(row, quantized weight)]"""
+    postings: List[List[Tuple[int, int]]] = [[] for _ in range(features)]
+    for row in range(len(indptr) - 1):
+        for pos in range(indptr[row], indptr[row + 1]):
+            postings[indices[pos]].append((row, data[pos]))
+    return postings
+
+
+def _scores(row_weights: List[Tuple[int, int]], postings: List[List[Tuple[int, int]]]) -> Dict[int, int]:
+    """Integer dot products of one quantized vector against every row sharing a feature"""
+    scores: Dict[int, int] = {}
+    for feature, weight in row_weights:
+        for other, other_weight in postings[feature]:
+            scores[other] = scores.get(other, 0) + weight * other_weight
+    return scores
+
+
+def build_similarity_index(foods: List[Dict[str, Any]], top_k: int = TOP_K,
+                           min_similarity: float = MIN_SIMILARITY) -> Dict[str, Any]:
+    """TF-IDF vectors (quantized CSR) plus the top_k neighbours of every food"""
+    documents = [food_document(food) for food in foods]
+
+    document_frequency: Dict[str, int] = {}
+    for grams in documents:
+        for gram in set(grams):
+            document_frequency[gram] = document_frequency.get(gram, 0) + 1
+    vocab_list = sorted(document_frequency)
+    vocab = {gram: i for i, gram in enumerate(vocab_list)}
+    total = len(documents)
+    idf = [round(math.log((1 + total) / (1 + document_frequency[g])) + 1.0, 4) for g in vocab_list]
+
+    indptr, indices, data = array('I', [0]), array('I'), array('B')
+    for grams in documents:
+        for feature, weight in _quantize(_weights(grams, vocab, idf)):
+            indices.append(feature)
+            data.append(weight)
+        indptr.append(len(indices))
+
+    postings = _postings(indptr, indices, data, len(vocab_list))
+    denominator = QUANT_SCALE * QUANT_SCALE
+    neighbors = []
+    for row in range(total):
+        row_weights = list(zip(indices[indptr[row]:indptr[row + 1]], data[indptr[row]:indptr[row + 1]]))
+        scores = _scores(row_weights, postings)
+        scores.pop(row, None)
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+        neighbors.append([[other, round(score / denominator, 3)] for other, score in best
+                          if score / denominator >= min_similarity])
+
+    return {
+        "version": 1,
+        "totalFoods": total,
+        "ngramSize": NGRAM_SIZE,
+        "quantScale": QUANT_SCALE,
+        "topK": top_k,
+        "minSimilarity": min_similarity,
+        "foods": [food.get("id") for food in foods],
+        "vocab": vocab_list,
+        "idf": idf,
+        "matrix": {
+            "indptr": b64_array(indptr),
+            "indices": b64_array(indices),
+            "data": b64_array(data),
+        },
+        "neighbors": neighbors,
+    }
+
+
+class SimilarityMatcher:
+    """Loaded similarity index: fuzzy matching of free text and similar-food lookups"""
+
+    def __init__(self, index: Dict[str, Any]):
+        self.index = index
+        self.food_ids = index["foods"]
+        self.positions = {food_id: i for i, food_id in enumerate(self.food_ids)}
+        self.vocab = {gram: i for i, gram in enumerate(index["vocab"])}
+        self.idf = index["idf"]
+        matrix = index["matrix"]
+        self.postings = _postings(unb64_array('I', matrix["indptr"]),
+                                  unb64_array('I', matrix["indices"]),
+                                  unb64_array('B', matrix["data"]), len(index["vocab"]))
+
+    def match(self, text: str, limit: int = 5, min_similarity: float = 0.0) -> List[Tuple[str, float]]:
+        """(food id, cosine similarity) of the closest foods to free text, best first"""
+        weights = _quantize(_weights(_char_ngrams(text), self.vocab, self.idf))
+        scores = _scores(weights, self.postings)
+        denominator = QUANT_SCALE * QUANT_SCALE
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(self.food_ids[row], round(score / denominator, 3)) for row, score in best
+                if score / denominator >= min_similarity]
+
+    def similar(self, food_id: str, limit: int = TOP_K) -> List[Tuple[str, float]]:
+        """Precomputed neighbours of a food"""
+        row = self.positions.get(food_id)
+        if row is None:
+            return []
+        return [(self.food_ids[other], score) for other, score in self.index["neighbors"][row][:limit]]
+
+
+def write_similarity_index(index: Dict[str, Any], output_path: str) -> None:
+    """Write the index as a compact JSON artifact"""
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def main():
+    """Build foodSimilarityIndex.json from an existing foodDatabase.json"""
+    import argparse
+
+    repo_root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Build the food similarity index artifact")
+    parser.add_argument("--database", default=os.path.join(repo_root, "LOAF", "data", "foodDatabase.json"))
+    parser.add_argument("--output", default=None, help="defaults to foodSimilarityIndex.json next to the database")
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    parser.add_argument("--match", metavar="TEXT", default=None, help="print the closest foods to TEXT and exit")
+    args = parser.parse_args()
+
+    output_path = args.output or os.path.join(os.path.dirname(args.database), "foodSimilarityIndex.json")
+
+    if args.match:
+        with open(output_path, 'r', encoding='utf-8') as f:
+            matcher = SimilarityMatcher(json.load(f))
+        for food_id, score in matcher.match(args.match):
+            print(f"  {score:.3f}  {food_id}")
+        return True
+
+    with open(args.database, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+    foods = database.get("foods") or database.get("foodDatabase", {}).get("foods", [])
+
+    print(f"\n🧭 Building similarity index for {len(foods)} foods...")
+    index = build_similarity_index(foods, top_k=args.top_k)
+    write_similarity_index(index, output_path)
+    print(f"  ✅ {len(index['vocab'])} n-gram features, {len(index['matrix']['data']) * 3 // 4} quantized bytes")
+    print(f"  File size: {os.path.getsize(output_path) / 1024:.1f} KB")
+    return True
+
+
+if __name__ == "__main__":
+    main()